@@ -0,0 +1,283 @@
+"""Page rerun latency at scale, driving the app through Streamlit's AppTest.
+
+Builds a synthetic gym per scale (members, classes, payments, workout logs, meals,
+posts and progress photos), logs in as each role and visits every sidebar page,
+recording cold and warm rerun latency, element payload size and peak RSS. Latency
+is the app's own render time, read back from its Prometheus export, since an
+AppTest run also spends hundreds of milliseconds polling; the AppTest wall time
+is kept alongside for reference. Each scale runs in its own process so its peak
+RSS is its own:
+
+    python bench_app.py --members 1000 10000 100000 --output bench_baseline.json
+    python bench_app.py --members 1000 10000 --compare bench_baseline.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import re
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from multiprocessing import get_context
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gym_app.py')
+# (role, username, password); the member is the synthetic one with a long history
+ROLES = [('Admin', 'admin', 'password123'), ('Trainer', 'karthik', 'pass'), ('Member', 'bench0', 'pw')]
+BENCH_MEMBER_ID = 1000
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def payload_bytes(node):
+    """Serialized size of an AppTest element tree node and everything under it."""
+    proto = getattr(node, 'proto', None)
+    size = proto.ByteSize() if hasattr(proto, 'ByteSize') else 0
+    return size + sum(payload_bytes(child) for child in getattr(node, 'children', {}).values())
+
+
+def render_totals(metrics_file):
+    """{page: (render count, total render seconds)} from the app's Prometheus export."""
+    totals = {}
+    with open(metrics_file) as f:
+        for line in f:
+            match = re.match(r'gym_page_render_seconds_(sum|count)\{page="(.*)"\} (\S+)$', line)
+            if match:
+                kind, page, value = match.groups()
+                count, seconds = totals.get(page, (0, 0.0))
+                totals[page] = (int(value), seconds) if kind == 'count' else (count, float(value))
+    return totals
+
+
+def render_ms(before, after, page):
+    """Mean render time in ms of the runs of `page` (the app's "Role/Page" label) recorded between two render_totals readings."""
+    count, seconds = after.get(page, (0, 0.0))
+    old_count, old_seconds = before.get(page, (0, 0.0))
+    return round((seconds - old_seconds) * 1000 / (count - old_count), 2) if count > old_count else None
+
+
+def open_backend(name, data_dir):
+    """The store backend the app would open for GYM_STORE_BACKEND=`name` under `data_dir`."""
+    import gym_app
+
+    if name == 'journal':
+        return gym_app.JournalBackend(os.path.join(data_dir, 'journal'))
+    return gym_app.SQLiteBackend(os.path.join(data_dir, 'bench.db'))
+
+
+def build_dataset(backend, data_dir, members, history, seed=0):
+    """Writes a synthetic gym with `members` members to a fresh `backend`, its images under `data_dir`."""
+    import gym_app
+    from PIL import Image
+
+    rng = random.Random(seed)
+    today = date.today()
+    blobs = gym_app.BlobStore(os.path.join(data_dir, 'blobs'))
+    store = gym_app.GymStore(backend, blobs, gym_app.Authenticator(rounds=4))
+    password = store.auth.hash_password('pw')
+    plans = [name for name, _ in gym_app.sample_data()['plans']]
+    trainer_ids = [101, 102]
+    member_ids = range(BENCH_MEMBER_ID, BENCH_MEMBER_ID + members)
+
+    backend.put_many('members', (
+        (member_id, {
+            'ID': member_id, 'Name': f"Bench Member {member_id}", 'username': f"bench{member_id - BENCH_MEMBER_ID}", 'Password': password,
+            'Email': f"bench{member_id}@example.com", 'Phone': f"9{member_id:09d}", 'DOB': date(1980, 1, 1) + timedelta(days=rng.randrange(9000)),
+            'Address': 'Bengaluru', 'Photo URL': f"https://api.dicebear.com/8.x/avataaars/svg?seed={member_id}", 'Plan': rng.choice(plans), 'Status': rng.choice(gym_app.MEMBER_STATUSES),
+            'Join Date': today - timedelta(days=rng.randrange(1500)), 'Expiry Date': today + timedelta(days=rng.randrange(-60, 365)),
+            'Trainer ID': rng.choice(trainer_ids), 'Uploaded Photo': None,
+        })
+        for member_id in member_ids
+    ))
+    backend.put_many('payments', (
+        (seq, {'Member ID': rng.choice(member_ids), 'Amount': 1500, 'Date': today - timedelta(days=rng.randrange(1500)), 'Plan': rng.choice(plans)})
+        for seq in range(1000, 1000 + 3 * members)
+    ))
+    backend.put_many('classes', (
+        (class_id, {
+            'ID': class_id, 'Name': f"Bench Class {class_id}", 'Trainer': 'Karthik Murali', 'Trainer ID': rng.choice(trainer_ids),
+            'Date': today + timedelta(days=rng.randrange(-30, 30)), 'Time': f"{rng.randrange(6, 21):02d}:00", 'Duration': 60,
+            'Capacity': 20, 'Booked': rng.sample(member_ids, min(10, members)), 'Waitlist': [],
+        })
+        for class_id in range(5000, 5000 + max(members // 10, 10))
+    ))
+    backend.put_many('community_posts', (
+        (seq, {'user': f"Bench Member {seq}", 'text': "Welcome to the hub!", 'date': datetime.now() - timedelta(minutes=1000 + members - seq)})
+        for seq in range(1000, 1000 + members)
+    ))
+
+    exercises = [exercise['Name'] for _, exercise in gym_app.sample_data()['workout_library']]
+    photo_refs = []
+    for shade in range(4):
+        image = io.BytesIO()
+        Image.new('RGB', (1600, 1200), (60 * shade, 120, 200)).save(image, format='JPEG')
+        photo_refs.append(blobs.put(image.getvalue()))
+
+    def workouts(count):
+        return [{'Date': today - timedelta(days=(count - i) // 3), 'Exercise': rng.choice(exercises), 'Weight': rng.randrange(20, 140, 5), 'Sets': 3, 'Reps': rng.randrange(3, 12)} for i in range(count)]
+
+    def meals(count):
+        return [{'Date': today - timedelta(days=(count - i) // 4), 'Meal': 'Lunch', 'Food': 'Chapati', 'Calories': 400, 'Protein': 20, 'Carbs': 50, 'Fat': 10, 'Macronutrients': ''} for i in range(count)]
+
+    # The benchmarked member carries a long history; everyone else a light one
+    lengths = {member_id: history if member_id == BENCH_MEMBER_ID else 5 for member_id in member_ids}
+    backend.put_many('member_workouts', ((member_id, workouts(length)) for member_id, length in lengths.items()))
+    backend.put_many('nutrition', ((member_id, meals(length)) for member_id, length in lengths.items()))
+    backend.put_many('body_metrics', (
+        (member_id, [{'date': today - timedelta(days=length - i), 'weight': 70 + rng.random() * 5, 'body_fat': 20} for i in range(length)])
+        for member_id, length in lengths.items()
+    ))
+    backend.put_many('progress_photos', (
+        (member_id, [{'date': today - timedelta(days=30 * i), 'photo': rng.choice(photo_refs)} for i in range(3 if member_id % 20 == 0 else 0)])
+        for member_id in member_ids
+    ))
+    for collection in ('badges', 'member_plans'):
+        backend.put_many(collection, ((member_id, []) for member_id in member_ids))
+
+
+def bench_scale(members, history, reruns, timeout, backend_name):
+    """Runs every role's pages against a fresh dataset of `members` members; returns the results dict."""
+    from streamlit.testing.v1 import AppTest
+
+    data_dir = tempfile.mkdtemp(prefix='gym_bench_')
+    try:
+        start = time.perf_counter()
+        backend = open_backend(backend_name, data_dir)
+        build_dataset(backend, data_dir, members, history)
+        backend.close()
+        setup_seconds = time.perf_counter() - start
+        # What a restart costs before the first page can load
+        start = time.perf_counter()
+        open_backend(backend_name, data_dir).close()
+        open_seconds = time.perf_counter() - start
+        print(f"  {members:>7} members  store opened in {open_seconds * 1000:.1f} ms", flush=True)
+        metrics_file = os.path.join(data_dir, 'metrics.prom')
+        # Export after every rerun so each page's render time can be read back straight away
+        os.environ.update({'GYM_STORE_BACKEND': backend_name, 'GYM_DB_PATH': os.path.join(data_dir, 'bench.db'),
+                           'GYM_JOURNAL_DIR': os.path.join(data_dir, 'journal'), 'GYM_BLOB_DIR': os.path.join(data_dir, 'blobs'),
+                           'GYM_BCRYPT_ROUNDS': '4', 'GYM_METRICS_FILE': metrics_file, 'GYM_METRICS_INTERVAL': '0'})
+
+        pages = {}
+        for role, username, password in ROLES:
+            at = AppTest.from_file(APP_PATH, default_timeout=timeout).run()
+            at.selectbox(key='login_role').set_value(role).run()
+            at.text_input[0].input(username)
+            at.text_input[1].input(password)
+            at.button[0].click().run()
+            if not at.session_state['logged_in']:
+                raise RuntimeError(f"Could not log in as {role} {username}")
+            for page in at.sidebar.radio[0].options:
+                label = f"{role}/{page}"
+                before = render_totals(metrics_file)
+                cold_start = time.perf_counter()
+                at.sidebar.radio[0].set_value(page).run()
+                cold_wall_ms = (time.perf_counter() - cold_start) * 1000
+                cold = render_totals(metrics_file)
+                warm, warm_wall, last = [], [], cold
+                for _ in range(reruns):
+                    rerun_start = time.perf_counter()
+                    at.run()
+                    warm_wall.append((time.perf_counter() - rerun_start) * 1000)
+                    totals = render_totals(metrics_file)
+                    warm.append(render_ms(last, totals, label))
+                    last = totals
+                warm = [ms for ms in warm if ms is not None]
+                errors = [e.message for e in at.exception]
+                numbers = pages[label] = {
+                    'cold_ms': render_ms(before, cold, label),
+                    'p50_ms': round(statistics.median(warm), 2) if warm else None,
+                    'max_ms': round(max(warm), 2) if warm else None,
+                    'cold_wall_ms': round(cold_wall_ms, 2),
+                    'p50_wall_ms': round(statistics.median(warm_wall), 2) if warm_wall else None,
+                    'payload_kb': round((payload_bytes(at.main) + payload_bytes(at.sidebar)) / 1024, 2),
+                    'errors': errors,
+                }
+                print(f"  {members:>7} members  {label:<32} cold {numbers['cold_ms'] or 0:8.1f} ms  "
+                      f"warm p50 {numbers['p50_ms'] or 0:8.1f} ms  {numbers['payload_kb']:8.1f} KB"
+                      + (f"  ERROR {errors[0][:60]}" if errors else ""), flush=True)
+        return {'setup_seconds': round(setup_seconds, 2), 'open_seconds': round(open_seconds, 3), 'peak_rss_mb': round(peak_rss_mb(), 1), 'pages': pages}
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """Prints page latencies against a baseline; returns the regressions found."""
+    regressions = []
+    for scale, result in results['scales'].items():
+        base = baseline.get('scales', {}).get(scale)
+        if base is None:
+            print(f"{scale} members: no baseline")
+            continue
+        print(f"{scale} members (peak RSS {result['peak_rss_mb']} MB, baseline {base['peak_rss_mb']} MB)")
+        if result['peak_rss_mb'] > base['peak_rss_mb'] * (1 + threshold):
+            regressions.append(f"{scale} members: peak RSS {base['peak_rss_mb']} -> {result['peak_rss_mb']} MB")
+        if 'open_seconds' in base and result['open_seconds'] * 1000 - base['open_seconds'] * 1000 > max(min_delta_ms, base['open_seconds'] * 1000 * threshold):
+            regressions.append(f"{scale} members: store open {base['open_seconds']} -> {result['open_seconds']} s")
+        for page, numbers in result['pages'].items():
+            old = base['pages'].get(page)
+            if old is None:
+                continue
+            for metric in ('cold_ms', 'p50_ms', 'payload_kb'):
+                new_value, old_value = numbers[metric] or 0, old[metric] or 0
+                slower = new_value > old_value * (1 + threshold) and (metric == 'payload_kb' or new_value - old_value > min_delta_ms)
+                if slower:
+                    regressions.append(f"{scale} members {page}: {metric} {old_value} -> {new_value}")
+                print(f"  {page:<32} {metric:<10} {old_value:>10} -> {new_value:>10}{'  REGRESSION' if slower else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--members', type=int, nargs='+', default=[1000, 10000, 100000], help="dataset sizes to run")
+    parser.add_argument('--history', type=int, default=2000, help="workouts, meals and body metrics logged by the benchmarked member")
+    parser.add_argument('--reruns', type=int, default=5, help="warm reruns per page after the first visit")
+    parser.add_argument('--backend', choices=['sqlite', 'journal'], default='sqlite', help="store backend to run against")
+    parser.add_argument('--timeout', type=float, default=600, help="seconds allowed per AppTest run")
+    parser.add_argument('--output', help="write results to this JSON file")
+    parser.add_argument('--compare', metavar='BASELINE', help="compare against a JSON file written by --output")
+    parser.add_argument('--threshold', type=float, default=0.25, help="relative slowdown flagged as a regression")
+    parser.add_argument('--min-delta-ms', type=float, default=20, help="ignore latency changes smaller than this")
+    args = parser.parse_args()
+
+    results = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'history': args.history,
+        'reruns': args.reruns,
+        'backend': args.backend,
+        'scales': {},
+    }
+    for members in args.members:
+        print(f"Benchmarking {members} members...", flush=True)
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as worker:
+            results['scales'][str(members)] = worker.submit(bench_scale, members, args.history, args.reruns, args.timeout, args.backend).result()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s):")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo regressions.")
+
+
+if __name__ == '__main__':
+    main()
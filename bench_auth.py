@@ -0,0 +1,63 @@
+"""Login latency under concurrent load.
+
+Creates members with bcrypt-hashed passwords in a throwaway store, then logs them
+all in from a pool of client threads and reports p50/p99 latency per concurrency:
+
+    python bench_auth.py --users 200 --concurrency 1 8 32 --rounds 12 --workers 4
+"""
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def percentile(values, pct):
+    return statistics.quantiles(values, n=100, method='inclusive')[pct - 1] if len(values) > 1 else values[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=200, help="members to create and log in")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32], help="concurrent login threads")
+    parser.add_argument('--rounds', type=int, default=12, help="bcrypt cost factor")
+    parser.add_argument('--workers', type=int, default=4, help="hashing thread pool size")
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix='gym_bench_')
+    try:
+        import gym_app
+        store = gym_app.GymStore(
+            gym_app.SQLiteBackend(os.path.join(data_dir, 'bench.db')),
+            gym_app.BlobStore(os.path.join(data_dir, 'blobs')),
+            gym_app.Authenticator(rounds=args.rounds, workers=args.workers),
+        )
+        first_id = store.members.next_id()
+        hashes = store.auth.hash_many(f"pw{i}" for i in range(args.users))
+        store.members.put_many(
+            (first_id + i, {'ID': first_id + i, 'Name': f"Bench User {i}", 'username': f"bench{i}", 'Password': hashed,
+                            'Email': f"bench{i}@example.com", 'Plan': 'Bronze', 'Status': 'Active', 'Join Date': gym_app.date.today()})
+            for i, hashed in enumerate(hashes)
+        )
+
+        def login(i):
+            start = time.perf_counter()
+            assert store.authenticate(store.members, f"bench{i}", f"pw{i}") is not None
+            return time.perf_counter() - start
+
+        print(f"bcrypt rounds={args.rounds} workers={args.workers} users={args.users}")
+        for concurrency in args.concurrency:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as clients:
+                latencies = [seconds * 1000 for seconds in clients.map(login, range(args.users))]
+            elapsed = time.perf_counter() - start
+            print(f"concurrency {concurrency:>4}: p50 {percentile(latencies, 50):8.1f} ms  "
+                  f"p99 {percentile(latencies, 99):8.1f} ms  {args.users / elapsed:7.1f} logins/s")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,920 +1,3981 @@
-import streamlit as st
-import pandas as pd
-import plotly.express as px
-from datetime import datetime, date, timedelta
-import random
-
-# --- APP CONFIGURATION ---
-st.set_page_config(
-    page_title="Bengaluru Fitness Hub",
-    page_icon="🏋️‍♂️",
-    layout="wide",
-)
-
-# --- MOCK DATABASE WITH PRELOADED VALUES ---
-def initialize_data():
-    """Initializes the session state with sample data if it doesn't exist."""
-    if 'initialized' not in st.session_state:
-        st.session_state.initialized = True
-        
-        # Preloaded Admin & Trainer Credentials
-        st.session_state.admins = [{'username': 'admin', 'password': 'password123', 'name': 'Adarsh'}]
-        st.session_state.trainers = [
-            {'ID': 101, 'Name': 'Karthik Murali', 'Specialization': 'CrossFit', 'username': 'karthik', 'password': 'pass', 'Uploaded Photo': None, 'Photo URL': 'https://api.dicebear.com/8.x/avataaars/svg?seed=Karthik'},
-            {'ID': 102, 'Name': 'Lakshmi Devi', 'Specialization': 'Yoga & Pilates', 'username': 'lakshmi', 'password': 'pass', 'Uploaded Photo': None, 'Photo URL': 'https://api.dicebear.com/8.x/avataaars/svg?seed=Lakshmi'},
-        ]
-        
-        # Preloaded Member Data with South Indian Names & Detailed Profiles
-        st.session_state.members = [
-            {'ID': 1, 'Name': 'Priya Kumar', 'username': 'priyak', 'Password': 'pass', 'Email': 'priya@email.com', 'Phone': '9876543210', 'DOB': date(1995, 5, 20), 'Address': '123 Koramangala, Bengaluru', 'Photo URL': 'https://api.dicebear.com/8.x/avataaars/svg?seed=Priya', 'Plan': 'Gold', 'Status': 'Active', 'Join Date': date(2024, 1, 15), 'Expiry Date': date(2025, 1, 15), 'Trainer ID': 101, 'Uploaded Photo': None},
-            {'ID': 2, 'Name': 'Vikram Reddy', 'username': 'vikramr', 'Password': 'pass', 'Email': 'vikram@email.com', 'Phone': '9876543211', 'DOB': date(1990, 11, 30), 'Address': '456 Indiranagar, Bengaluru', 'Photo URL': 'https://api.dicebear.com/8.x/avataaars/svg?seed=Vikram', 'Plan': 'Silver', 'Status': 'Active', 'Join Date': date(2024, 3, 1), 'Expiry Date': date(2025, 8, 1), 'Trainer ID': 102, 'Uploaded Photo': None},
-            {'ID': 3, 'Name': 'Ananya Iyer', 'username': 'ananyai', 'Password': 'pass', 'Email': 'ananya@email.com', 'Phone': '9876543212', 'DOB': date(2000, 8, 10), 'Address': '789 Jayanagar, Bengaluru', 'Photo URL': 'https://api.dicebear.com/8.x/avataaars/svg?seed=Ananya', 'Plan': 'Bronze', 'Status': 'Expired', 'Join Date': date(2023, 5, 20), 'Expiry Date': date(2024, 5, 20), 'Trainer ID': 101, 'Uploaded Photo': None},
-        ]
-        
-        # Preloaded Plans and Payments in Rupees
-        st.session_state.plans = {'Bronze': {'price': 1500, 'duration': 30}, 'Silver': {'price': 2500, 'duration': 30}, 'Gold': {'price': 4000, 'duration': 30}}
-        st.session_state.payments = [{'Member ID': 1, 'Amount': 4000, 'Date': date(2024, 1, 15), 'Plan': 'Gold'}, {'Member ID': 2, 'Amount': 2500, 'Date': date(2024, 3, 1), 'Plan': 'Silver'}]
-
-        # Preloaded Classes
-        st.session_state.classes = [
-            {'ID': 1001, 'Name': 'Morning CrossFit', 'Trainer': 'Karthik Murali', 'Date': date.today() + timedelta(days=1), 'Time': '06:00', 'Capacity': 10, 'Booked': [1, 2]},
-            {'ID': 1002, 'Name': 'Evening Yoga', 'Trainer': 'Lakshmi Devi', 'Date': date.today() + timedelta(days=1), 'Time': '18:00', 'Capacity': 15, 'Booked': [3]},
-            {'ID': 1003, 'Name': 'Pilates Core', 'Trainer': 'Lakshmi Devi', 'Date': date.today() + timedelta(days=2), 'Time': '12:00', 'Capacity': 12, 'Booked': []},
-        ]
-        
-        st.session_state.announcements = ["Maintenance alert: The swimming pool will be closed this weekend.", "Ganesha Chaturthi Promotion: Get 20% off on all 'Gold' annual plans!"]
-        
-        st.session_state.workout_library = [
-            # Leg Workouts
-            {'Name': 'Barbell Squat', 'Muscle Group': 'Legs', 'Difficulty': 'Intermediate', 'Equipment': 'Barbell, Squat Rack', 'Video': 'https://www.youtube.com/watch?v=U3mC6_o2_C4'},
-            {'Name': 'Leg Press', 'Muscle Group': 'Legs', 'Difficulty': 'Beginner', 'Equipment': 'Leg Press Machine', 'Video': 'https://www.youtube.com/watch?v=s0-zB1qfVzI'},
-            {'Name': 'Romanian Deadlift (RDL)', 'Muscle Group': 'Legs', 'Difficulty': 'Intermediate', 'Equipment': 'Barbell or Dumbbells', 'Video': 'https://www.youtube.com/watch?v=jW2tK9c4f7k'},
-            
-            # Chest Workouts
-            {'Name': 'Push-up', 'Muscle Group': 'Chest', 'Difficulty': 'Beginner', 'Equipment': 'None', 'Video': 'https://www.youtube.com/watch?v=IODxDxX7oi4'},
-            {'Name': 'Dumbbell Bench Press', 'Muscle Group': 'Chest', 'Difficulty': 'Intermediate', 'Equipment': 'Dumbbells, Bench', 'Video': 'https://www.youtube.com/watch?v=fJz0t4tDq3Q'},
-            {'Name': 'Cable Flys', 'Muscle Group': 'Chest', 'Difficulty': 'Intermediate', 'Equipment': 'Cable Machine', 'Video': 'https://www.youtube.com/watch?v=rtJ-E3qYl7M'},
-            
-            # Back Workouts
-            {'Name': 'Pull-up', 'Muscle Group': 'Back', 'Difficulty': 'Advanced', 'Equipment': 'Pull-up Bar', 'Video': 'https://www.youtube.com/watch?v=eGo4IYFdUsw'},
-            {'Name': 'Bent-Over Dumbbell Rows', 'Muscle Group': 'Back', 'Difficulty': 'Intermediate', 'Equipment': 'Dumbbells', 'Video': 'https://www.youtube.com/watch?v=ZfA1yE72F_c'},
-            {'Name': 'Lat Pulldown', 'Muscle Group': 'Back', 'Difficulty': 'Beginner', 'Equipment': 'Lat Pulldown Machine', 'Video': 'https://www.youtube.com/watch?v=0saN0G0Xg4o'},
-
-            # Arms Workouts
-            {'Name': 'Bicep Curls', 'Muscle Group': 'Arms', 'Difficulty': 'Beginner', 'Equipment': 'Dumbbells or Barbell', 'Video': 'https://www.youtube.com/watch?v=tQ11T6z1J48'},
-            {'Name': 'Tricep Dips', 'Muscle Group': 'Arms', 'Difficulty': 'Intermediate', 'Equipment': 'Bench or Dip Station', 'Video': 'https://www.youtube.com/watch?v=s-tT1C2y_mE'},
-            
-            # Core Workouts
-            {'Name': 'Plank', 'Muscle Group': 'Core', 'Difficulty': 'Beginner', 'Equipment': 'None', 'Video': 'https://www.youtube.com/watch?v=ASdvfQjU7F0'},
-            {'Name': 'Leg Raises', 'Muscle Group': 'Core', 'Difficulty': 'Beginner', 'Equipment': 'None', 'Video': 'https://www.youtube.com/watch?v=W0y_oBq_Q_E'},
-        ]
-
-        st.session_state.member_workouts = {
-            1: [{'Date': date(2025, 7, 10), 'Exercise': 'Barbell Squat', 'Weight': 60, 'Sets': 3, 'Reps': 10}],
-            2: [], 3: []
-        }
-        
-        # New Feature Data
-        st.session_state.equipment = [
-            {'ID': 201, 'Name': 'Treadmill #1', 'Status': 'Working', 'Last Service': date(2024, 1, 1)},
-            {'ID': 202, 'Name': 'Treadmill #2', 'Status': 'Maintenance', 'Last Service': date(2024, 6, 1)},
-        ]
-        st.session_state.nutrition = {
-            1: [{'Date': date.today(), 'Meal': 'Breakfast', 'Food': 'Idli and Sambar', 'Calories': 350, 'Macronutrients': 'High carb, low protein'}],
-            2: [], 3: [],
-        }
-        st.session_state.community_posts = [
-            {'user': 'Priya Kumar', 'text': 'Just hit a new PR on my squat! Feeling great 💪', 'date': datetime.now()},
-            {'user': 'Vikram Reddy', 'text': 'Yoga class with Lakshmi Devi was amazing today!', 'date': datetime.now() - timedelta(hours=2)},
-        ]
-        st.session_state.badges = {
-            1: ['First Workout Logged', '5 Classes Booked'],
-            2: ['First Class Booked'],
-            3: [],
-        }
-        st.session_state.challenges = {
-            '30-Day Squat Challenge': {'participants': [{'ID': 1, 'Name': 'Priya Kumar', 'reps': 500}, {'ID': 2, 'Name': 'Vikram Reddy', 'reps': 450}]},
-            'July Cardio King': {'participants': [{'ID': 1, 'Name': 'Priya Kumar', 'distance': 25.5}, {'ID': 2, 'Name': 'Vikram Reddy', 'distance': 22.0}]},
-        }
-        st.session_state.body_metrics = {
-            1: [{'date': date.today(), 'weight': 65, 'body_fat': 22}, {'date': date.today() - timedelta(days=30), 'weight': 67, 'body_fat': 23}],
-        }
-        st.session_state.progress_photos = {
-            1: [],
-            2: [],
-            3: [],
-        }
-        
-        st.session_state.member_plans = {
-            1: [{'exercise': 'Barbell Squat', 'sets': 3, 'reps': 10, 'notes': 'Focus on form.'}],
-            2: [],
-            3: [],
-        }
-        
-        # New data structure for trainer requests
-        st.session_state.trainer_requests = {t['ID']: [] for t in st.session_state.trainers}
-        
-# --- LOGIN & REGISTRATION PAGE ---
-def login_register_page(role):
-    st.title("🏋️‍♂️ Bengaluru Fitness Hub")
-    st.markdown(f"*{datetime.now().strftime('%A, %d %B %Y')}*")
-
-    login_tab, register_tab = st.tabs(["**Login**", "**Register as Member**"])
-
-    with login_tab:
-        st.header("Login to Your Account")
-
-        if role == "Admin":
-            with st.form("admin_login_form"):
-                username = st.text_input("Admin Username")
-                password = st.text_input("Password", type="password")
-                if st.form_submit_button("Login as Admin", use_container_width=True):
-                    admin = next((a for a in st.session_state.admins if a['username'] == username and a['password'] == password), None)
-                    if admin:
-                        st.session_state.logged_in = True
-                        st.session_state.role = "Admin"
-                        st.session_state.admin_name = admin.get("name", "Admin")
-                        st.rerun()
-                    else:
-                        st.error("Invalid admin username or password.")
-        
-        elif role == "Member":
-            with st.form("member_login_form"):
-                username = st.text_input("Username")
-                password = st.text_input("Your Password", type="password")
-                if st.form_submit_button("Login as Member", use_container_width=True):
-                    member = next((m for m in st.session_state.members if m['username'] == username and m['Password'] == password), None)
-                    if member:
-                        st.session_state.logged_in = True
-                        st.session_state.role = "Member"
-                        st.session_state.current_user_id = member['ID']
-                        st.rerun()
-                    else:
-                        st.error("Invalid username or password.")
-
-        elif role == "Trainer":
-            with st.form("trainer_login_form"):
-                username = st.text_input("Trainer Username")
-                password = st.text_input("Password", type="password") # Mock password, should be stored securely
-                if st.form_submit_button("Login as Trainer", use_container_width=True):
-                    trainer = next((t for t in st.session_state.trainers if t['username'] == username and t['password'] == password), None)
-                    if trainer:
-                        st.session_state.logged_in = True
-                        st.session_state.role = "Trainer"
-                        st.session_state.current_trainer_id = trainer['ID']
-                        st.rerun()
-                    else:
-                        st.error("Invalid trainer username or password.")
-
-    with register_tab:
-        st.header("Create a New Member Account")
-        with st.form("registration_form"):
-            name = st.text_input("Full Name")
-            email = st.text_input("Email Address")
-            phone = st.text_input("Phone Number")
-            password = st.text_input("Create Password", type="password")
-            confirm_password = st.text_input("Confirm Password", type="password")
-
-            if st.form_submit_button("Register", use_container_width=True):
-                if password == confirm_password and email and name:
-                    # Simple username generation (e.g., first name + first letter of last name)
-                    username = name.lower().split(' ')[0] + name.lower().split(' ')[-1][0]
-                    if any(m['Email'] == email for m in st.session_state.members):
-                        st.error("An account with this email already exists.")
-                    elif any(m['username'] == username for m in st.session_state.members):
-                        # Handle potential username conflicts
-                        st.warning("Generated username already exists. Please try a different name.")
-                    else:
-                        new_id = max(m['ID'] for m in st.session_state.members) + 1 if st.session_state.members else 1
-                        new_member = {
-                            "ID": new_id, "Name": name, "username": username, "Password": password, "Email": email, "Phone": phone,
-                            "DOB": date(1999, 1, 1), "Address": "Bengaluru, Karnataka", 
-                            "Photo URL": f"https://api.dicebear.com/8.x/avataaars/svg?seed={name.split(' ')[0]}",
-                            "Plan": "Bronze", "Status": "Active", "Join Date": date.today(), 
-                            "Expiry Date": date.today() + timedelta(days=30), 'Trainer ID': None, 'Uploaded Photo': None
-                        }
-                        st.session_state.members.append(new_member)
-                        st.session_state.member_workouts[new_id] = []
-                        st.session_state.nutrition[new_id] = []
-                        st.session_state.badges[new_id] = []
-                        st.session_state.body_metrics[new_id] = []
-                        st.session_state.progress_photos[new_id] = []
-                        st.session_state.member_plans[new_id] = []
-                        st.session_state.community_posts.append({'user': name, 'text': f"Welcome to the hub!", 'date': datetime.now()})
-                        st.success(f"Registration successful! Your new Member ID is {new_id} and your username is '{username}'. Please log in.")
-                        st.rerun()
-                else:
-                    st.warning("Please fill all fields and ensure passwords match.")
-
-
-# --- ADMIN VIEW ---
-def admin_view():
-    admin_name = st.session_state.get('admin_name', 'Admin')
-    st.sidebar.title(f"Welcome, {admin_name}")
-    st.sidebar.markdown("---")
-    page = st.sidebar.radio("Navigate", ["Dashboard", "My Profile", "Member Management", "Class & Schedule", "Trainer Management", "Equipment Management", "Reports", "Post Announcement"])
-    st.sidebar.markdown("---")
-    if st.sidebar.button("Logout", use_container_width=True):
-        st.session_state.clear()
-        st.rerun()
-
-    if page == "Dashboard":
-        admin_dashboard()
-    elif page == "My Profile":
-        admin_profile()
-    elif page == "Member Management":
-        membership_management()
-    elif page == "Class & Schedule":
-        class_schedule_management()
-    elif page == "Trainer Management":
-        trainer_management()
-    elif page == "Equipment Management":
-        equipment_management()
-    elif page == "Reports":
-        reporting()
-    elif page == "Post Announcement":
-        post_announcement()
-
-
-def admin_dashboard():
-    st.title("📊 Admin Dashboard")
-    total_members = len(st.session_state.members)
-    active_members = sum(1 for m in st.session_state.members if m['Status'] == 'Active')
-    total_revenue = sum(p['Amount'] for p in st.session_state.payments)
-    
-    col1, col2, col3 = st.columns(3)
-    col1.metric("Total Members", total_members)
-    col2.metric("Active Members", active_members)
-    col3.metric("Total Revenue", f"₹{total_revenue:,.0f}")
-
-    st.header("Visualizations")
-    members_df = pd.DataFrame(st.session_state.members)
-    if not members_df.empty:
-        members_df['Join Month'] = pd.to_datetime(members_df['Join Date']).dt.to_period('M').astype(str)
-        growth = members_df.groupby('Join Month').size().reset_index(name='New Sign-ups')
-        fig_growth = px.line(growth, x='Join Month', y='New Sign-ups', title='Membership Growth Over Time', markers=True)
-        st.plotly_chart(fig_growth, use_container_width=True)
-
-    # --- Predictive Analytics (Mock) ---
-    st.header("📈 Predictive Analytics")
-    st.info("This section would use an algorithm to predict trends. For this mock, it's placeholder.")
-    st.markdown("Based on current trends, we predict a **15% increase** in demand for our Yoga classes next quarter.")
-
-def admin_profile():
-    st.title("Admin Profile")
-    admin_data = st.session_state.admins[0] # Assuming only one admin for this app
-    
-    st.subheader("Edit Your Profile")
-    with st.form("admin_profile_form"):
-        new_name = st.text_input("Name", value=admin_data['name'])
-        new_username = st.text_input("Username", value=admin_data['username'])
-        if st.form_submit_button("Update Profile"):
-            admin_data['name'] = new_name
-            admin_data['username'] = new_username
-            st.session_state.admin_name = new_name
-            st.success("Admin profile updated successfully!")
-            st.rerun()
-
-def membership_management():
-    st.title("👥 Member Management")
-    members_df = pd.DataFrame(st.session_state.members)
-    
-    # Create editable data editor
-    st.subheader("Edit Member Details")
-    edited_df = st.data_editor(
-        members_df,
-        column_config={
-            "ID": st.column_config.Column("ID", disabled=True),
-            "Photo URL": st.column_config.Column("Photo", disabled=True),
-            "Password": st.column_config.Column("Password", disabled=True),
-            "DOB": st.column_config.DateColumn("Date of Birth"),
-            "Join Date": st.column_config.DateColumn("Join Date", disabled=True),
-            "Expiry Date": st.column_config.DateColumn("Expiry Date"),
-            "Plan": st.column_config.SelectboxColumn("Plan", options=list(st.session_state.plans.keys())),
-            "Trainer ID": st.column_config.SelectboxColumn("Trainer ID", options=[t['ID'] for t in st.session_state.trainers]),
-        },
-        hide_index=True,
-    )
-    
-    if st.button("Save Changes"):
-        st.session_state.members = edited_df.to_dict('records')
-        st.success("Member details updated successfully!")
-        st.rerun()
-
-    # Admin can change user's profile image
-    with st.expander("🖼️ Change Member Profile Photo"):
-        member_options = {m['ID']: m['Name'] for m in st.session_state.members}
-        member_id_to_change = st.selectbox("Select Member", options=list(member_options.keys()), format_func=lambda x: member_options[x], key="admin_change_photo_select")
-        uploaded_photo = st.file_uploader("Upload new profile photo", type=["png", "jpg", "jpeg"], key="admin_photo_uploader")
-        
-        if uploaded_photo:
-            if st.button("Update Photo"):
-                for member in st.session_state.members:
-                    if member['ID'] == member_id_to_change:
-                        member['Uploaded Photo'] = uploaded_photo.getvalue()
-                        st.success(f"Profile photo for {member['Name']} updated!")
-                        st.rerun()
-                else:
-                    st.error("Member not found.")
-
-    with st.expander("➕ Add a New Member"):
-        with st.form("add_member_form"):
-            name = st.text_input("Name")
-            email = st.text_input("Email")
-            phone = st.text_input("Phone Number")
-            password = st.text_input("Set Temporary Password", type="password")
-            plan = st.selectbox("Membership Plan", options=list(st.session_state.plans.keys()))
-            
-            if st.form_submit_button("Add Member"):
-                if email and name and password:
-                    # Simple username generation (e.g., first name + first letter of last name)
-                    username = name.lower().split(' ')[0] + name.lower().split(' ')[-1][0]
-                    if any(m['Email'] == email for m in st.session_state.members):
-                        st.error("An account with this email already exists.")
-                    elif any(m['username'] == username for m in st.session_state.members):
-                        st.error("Username already exists. Please try a different name.")
-                    else:
-                        new_id = max(m['ID'] for m in st.session_state.members) + 1 if st.session_state.members else 1
-                        new_member = {
-                            "ID": new_id, "Name": name, "username": username, "Password": password, "Email": email, "Phone": phone,
-                            "DOB": date(1999, 1, 1), "Address": "Bengaluru, Karnataka", 
-                            "Photo URL": f"https://api.dicebear.com/8.x/avataaars/svg?seed={name.split(' ')[0]}",
-                            "Plan": plan, "Status": "Active", "Join Date": date.today(), 
-                            "Expiry Date": date.today() + timedelta(days=st.session_state.plans[plan]['duration']), 'Trainer ID': None, 'Uploaded Photo': None
-                        }
-                        st.session_state.members.append(new_member)
-                        st.session_state.member_workouts[new_id] = []
-                        st.session_state.nutrition[new_id] = []
-                        st.session_state.badges[new_id] = []
-                        st.session_state.body_metrics[new_id] = []
-                        st.session_state.progress_photos[new_id] = []
-                        st.session_state.member_plans[new_id] = []
-                        st.session_state.community_posts.append({'user': name, 'text': f"Welcome to the hub!", 'date': datetime.now()})
-                        st.success(f"Registration successful! Your new Member ID is {new_id} and your username is '{username}'. Please log in.")
-                        st.rerun()
-                else:
-                    st.warning("Please fill all fields and ensure passwords match.")
-
-def class_schedule_management():
-    st.title("🗓️ Class & Schedule Management")
-    classes_df = pd.DataFrame(st.session_state.classes)
-    classes_df.index = range(1, len(classes_df) + 1)
-    st.dataframe(classes_df[['ID', 'Name', 'Trainer', 'Date', 'Time', 'Capacity']], use_container_width=True)
-
-    with st.expander("➕ Add a New Class"):
-        with st.form("add_class_form"):
-            name = st.text_input("Class Name")
-            trainer_name = st.selectbox("Assign Trainer", [t['Name'] for t in st.session_state.trainers])
-            class_date = st.date_input("Date", min_value=date.today())
-            class_time = st.time_input("Time")
-            capacity = st.number_input("Capacity", min_value=1, max_value=50, step=1)
-
-            if st.form_submit_button("Add Class"):
-                new_id = max(c['ID'] for c in st.session_state.classes) + 1 if st.session_state.classes else 1001
-                new_class = {
-                    'ID': new_id, 'Name': name, 'Trainer': trainer_name, 'Date': class_date, 
-                    'Time': class_time.strftime('%H:%M'), 'Capacity': capacity, 'Booked': []
-                }
-                st.session_state.classes.append(new_class)
-                st.success(f"Successfully added class '{name}'.")
-                st.rerun()
-
-def trainer_management():
-    st.title("💪 Trainer Management")
-    trainers_df = pd.DataFrame(st.session_state.trainers)
-    trainers_df.index = range(1, len(trainers_df) + 1)
-    st.dataframe(trainers_df, use_container_width=True)
-
-    with st.expander("➕ Add a New Trainer"):
-        with st.form("add_trainer_form"):
-            name = st.text_input("Trainer Name")
-            specialization = st.text_input("Specialization")
-
-            if st.form_submit_button("Add Trainer"):
-                new_id = max(t['ID'] for t in st.session_state.trainers) + 1 if st.session_state.trainers else 101
-                new_trainer = {'ID': new_id, 'Name': name, 'Specialization': specialization, 'username': name.lower().replace(' ', ''), 'password': 'pass', 'Uploaded Photo': None, 'Photo URL': f"https://api.dicebear.com/8.x/avataaars/svg?seed={name.split(' ')[0]}"}
-                st.session_state.trainers.append(new_trainer)
-                st.success(f"Successfully added trainer {name}.")
-                st.rerun()
-
-def equipment_management():
-    st.title("🔩 Equipment Management")
-    equipment_df = pd.DataFrame(st.session_state.equipment)
-    equipment_df.index = range(1, len(equipment_df) + 1)
-    st.dataframe(equipment_df, use_container_width=True)
-    
-    with st.form("add_equipment_form"):
-        st.subheader("Add or Update Equipment")
-        name = st.text_input("Equipment Name")
-        status = st.selectbox("Status", ['Working', 'Maintenance', 'Broken'])
-        if st.form_submit_button("Add/Update Equipment"):
-            # Mock update logic
-            st.success(f"Successfully updated '{name}' status to '{status}'.")
-            st.rerun()
-
-def billing_payments():
-    st.title("💳 Billing & Payments")
-    id_to_name = {m['ID']: m['Name'] for m in st.session_state.members}
-    payments_data = st.session_state.payments
-    for p in payments_data:
-        p['Member Name'] = id_to_name.get(p['Member ID'], 'Unknown')
-    
-    payments_df = pd.DataFrame(payments_data)
-    payments_df.index = range(1, len(payments_df) + 1)
-    st.dataframe(payments_df[['Member Name', 'Amount', 'Date', 'Plan']], use_container_width=True,
-                  column_config={"Amount": st.column_config.NumberColumn(format="₹ %d")})
-
-def reporting():
-    st.title("📈 Reporting")
-    report_type = st.selectbox("Select Report Type", ["Financial", "Member", "Usage"])
-    if report_type == "Financial":
-        st.subheader("Financial Report")
-        payments_df = pd.DataFrame(st.session_state.payments)
-        payments_df['Month'] = pd.to_datetime(payments_df['Date']).dt.to_period('M').astype(str)
-        revenue_by_month = payments_df.groupby('Month')['Amount'].sum().reset_index()
-        fig = px.bar(revenue_by_month, x='Month', y='Amount', title='Monthly Revenue')
-        st.plotly_chart(fig, use_container_width=True)
-    elif report_type == "Member":
-        st.subheader("Member Report")
-        members_df = pd.DataFrame(st.session_state.members)
-        plan_counts = members_df['Plan'].value_counts().reset_index()
-        plan_counts.columns = ['Plan', 'Count']
-        fig_pie = px.pie(plan_counts, names='Plan', values='Count', title='Membership Plan Distribution')
-        st.plotly_chart(fig_pie, use_container_width=True)
-    elif report_type == "Usage":
-        st.subheader("Usage Report (Class Popularity)")
-        class_usage = [{'Name': c['Name'], 'Bookings': len(c['Booked'])} for c in st.session_state.classes]
-        usage_df = pd.DataFrame(class_usage)
-        fig_usage = px.bar(usage_df, x='Name', y='Bookings', title='Class Popularity by Bookings')
-        st.plotly_chart(fig_usage, use_container_width=True)
-
-def post_announcement():
-    st.title("📢 Post/Edit Announcement")
-    st.subheader("Post a New Announcement")
-    with st.form("new_announcement_form"):
-        announcement_text = st.text_area("Enter announcement text:")
-        if st.form_submit_button("Post"):
-            if announcement_text:
-                st.session_state.announcements.insert(0, announcement_text)
-                st.success("Announcement posted!")
-                st.rerun()
-            else:
-                st.warning("Announcement text cannot be empty.")
-    
-    st.markdown("---")
-    st.subheader("Edit an Existing Announcement")
-    if st.session_state.announcements:
-        announcement_to_edit = st.selectbox("Select announcement to edit", st.session_state.announcements, key="edit_announcement_select")
-        with st.form("edit_announcement_form"):
-            edited_text = st.text_area("Edit announcement text:", value=announcement_to_edit)
-            if st.form_submit_button("Save Changes"):
-                index = st.session_state.announcements.index(announcement_to_edit)
-                st.session_state.announcements[index] = edited_text
-                st.success("Announcement updated!")
-                st.rerun()
-    else:
-        st.info("No announcements to edit.")
-
-    st.subheader("Current Announcements")
-    for ann in st.session_state.announcements:
-        st.info(ann)
-
-# --- TRAINER VIEW ---
-def trainer_view():
-    trainer = next((t for t in st.session_state.trainers if t['ID'] == st.session_state.current_trainer_id), None)
-    if not trainer:
-        st.error("Trainer profile not found.")
-        return
-
-    st.sidebar.title("Trainer Menu")
-    if trainer.get('Uploaded Photo'):
-        st.sidebar.image(trainer.get('Uploaded Photo'), width=100)
-    else:
-        st.sidebar.image(trainer.get('Photo URL', ''), width=100)
-    st.sidebar.header(trainer['Name'])
-    st.sidebar.markdown("---")
-    page = st.sidebar.radio("Navigate", ["My Dashboard", "My Profile", "My Members", "Pending Requests"])
-    st.sidebar.markdown("---")
-    if st.sidebar.button("Logout", use_container_width=True):
-        st.session_state.clear()
-        st.rerun()
-
-    if page == "My Dashboard":
-        st.title("👨‍💼 Trainer Dashboard")
-        st.subheader(f"Welcome, {trainer['Name']}!")
-        assigned_classes = [c for c in st.session_state.classes if c['Trainer'] == trainer['Name']]
-        st.write("### Your Upcoming Classes")
-        if assigned_classes:
-            classes_df = pd.DataFrame(assigned_classes)
-            st.dataframe(classes_df[['Name', 'Date', 'Time', 'Booked']], use_container_width=True)
-        else:
-            st.info("You have no classes scheduled.")
-    
-    elif page == "My Profile":
-        st.title("Trainer Profile")
-        col1, col2 = st.columns([1,2])
-        with col1:
-            if trainer.get('Uploaded Photo'):
-                st.image(trainer.get('Uploaded Photo'), caption="Profile Photo", width=200)
-            else:
-                st.image(trainer.get('Photo URL', ''), caption="Profile Photo", width=200)
-
-            uploaded_file = st.file_uploader("Upload a profile photo", type=["png", "jpg", "jpeg"])
-            if uploaded_file is not None:
-                trainer['Uploaded Photo'] = uploaded_file.getvalue()
-                st.success("Photo uploaded successfully! Refresh the page to see the new profile picture.")
-                st.rerun()
-        with col2:
-            st.subheader("Edit Your Profile")
-            with st.form("trainer_profile_form"):
-                new_name = st.text_input("Name", value=trainer['Name'])
-                new_specialization = st.text_input("Specialization", value=trainer['Specialization'])
-                if st.form_submit_button("Update Profile"):
-                    trainer['Name'] = new_name
-                    trainer['Specialization'] = new_specialization
-                    st.session_state.current_trainer_id = trainer['ID']
-                    st.success("Trainer profile updated successfully!")
-                    st.rerun()
-    
-    elif page == "My Members":
-        st.title("My Members")
-        my_members = [m for m in st.session_state.members if m.get('Trainer ID') == trainer['ID']]
-        if my_members:
-            members_df = pd.DataFrame(my_members)
-            st.dataframe(members_df[['ID', 'Name', 'Email', 'Phone', 'Plan']], use_container_width=True)
-        else:
-            st.info("You are not currently assigned to any members.")
-    
-    elif page == "Pending Requests":
-        st.title("📥 Pending Trainer Requests")
-        requests = st.session_state.trainer_requests.get(trainer['ID'], [])
-        if not requests:
-            st.info("You have no new trainer requests.")
-        else:
-            st.subheader("Requests to Assign")
-            for member_id in requests:
-                member_requesting = next((m for m in st.session_state.members if m['ID'] == member_id), None)
-                if member_requesting:
-                    with st.container(border=True):
-                        st.write(f"**Member:** {member_requesting['Name']} (ID: {member_requesting['ID']})")
-                        col1, col2 = st.columns(2)
-                        if col1.button("Accept", key=f"accept_req_{member_id}"):
-                            # Assign the trainer to the member
-                            for member_to_update in st.session_state.members:
-                                if member_to_update['ID'] == member_id:
-                                    member_to_update['Trainer ID'] = trainer['ID']
-                                    break
-                            # Remove the request
-                            st.session_state.trainer_requests[trainer['ID']].remove(member_id)
-                            st.success(f"Successfully assigned {member_requesting['Name']} as your member!")
-                            st.rerun()
-                        if col2.button("Reject", key=f"reject_req_{member_id}"):
-                            # Remove the request without assigning
-                            st.session_state.trainer_requests[trainer['ID']].remove(member_id)
-                            st.info(f"Rejected request from {member_requesting['Name']}.")
-                            st.rerun()
-
-
-# --- MEMBER VIEW ---
-def member_view():
-    member = next((m for m in st.session_state.members if m['ID'] == st.session_state.current_user_id), None)
-    if not member:
-        st.error("Profile not found. Please log out.")
-        return
-
-    st.sidebar.title("Member Menu")
-    if member.get('Uploaded Photo'):
-        st.sidebar.image(member.get('Uploaded Photo'), width=100)
-    else:
-        st.sidebar.image(member.get('Photo URL', ''), width=100)
-    st.sidebar.header(member['Name'])
-    st.sidebar.markdown(f"**Member ID:** {member['ID']}")
-    st.sidebar.markdown("---")
-    page = st.sidebar.radio("Navigate", ["My Profile", "Class Booking", "Workout Tracking", "Nutrition Tracking", "Progress Photos", "Challenges", "Community", "Find a Trainer", "Announcements"])
-    st.sidebar.markdown("---")
-    if st.sidebar.button("Logout", use_container_width=True):
-        st.session_state.clear()
-        st.rerun()
-
-    if page == "My Profile":
-        st.title(f"👋 Welcome, {member['Name']}!")
-        col1, col2 = st.columns([1, 2])
-        with col1:
-            if member.get('Uploaded Photo'):
-                st.image(member.get('Uploaded Photo'), caption="Profile Photo", width=200)
-            else:
-                st.image(member.get('Photo URL', ''), caption="Profile Photo", width=200)
-            
-            uploaded_file = st.file_uploader("Upload your profile photo", type=["png", "jpg", "jpeg"])
-            if uploaded_file is not None:
-                st.session_state.members[st.session_state.current_user_id - 1]['Uploaded Photo'] = uploaded_file.getvalue()
-                st.success("Photo uploaded successfully! Refresh the page to see the new profile picture.")
-                st.rerun()
-
-        with col2:
-            st.subheader("Your Membership Details")
-            st.info(f"**Plan:** {member.get('Plan', 'N/A')}")
-            st.info(f"**Status:** {member.get('Status', 'N/A')}")
-            expiry = member.get('Expiry Date')
-            if expiry: st.info(f"**Expires On:** {expiry.strftime('%d %B %Y')}")
-            trainer_name = next((t['Name'] for t in st.session_state.trainers if t['ID'] == member.get('Trainer ID')), 'Not Assigned')
-            st.info(f"**Assigned Trainer:** {trainer_name}")
-
-        with st.expander("✏️ Edit Your Contact Information"):
-            with st.form("update_info"):
-                new_name = st.text_input("Name", value=member.get('Name', ''))
-                new_email = st.text_input("Email", value=member.get('Email', ''))
-                new_phone = st.text_input("Phone Number", value=member.get('Phone', ''))
-                new_address = st.text_area("Address", value=member.get('Address', ''))
-                if st.form_submit_button("Update Info"):
-                    member['Name'] = new_name
-                    member['Email'] = new_email
-                    member['Phone'] = new_phone
-                    member['Address'] = new_address
-                    st.success("Your information has been updated.")
-                    st.rerun()
-
-    elif page == "Class Booking":
-        st.title("🤸 Class Booking")
-        st.subheader("Available Classes")
-        for c in st.session_state.classes:
-            is_full = len(c.get('Booked', [])) >= c['Capacity']
-            is_booked = member['ID'] in c.get('Booked', [])
-            
-            with st.container(border=True):
-                col1, col2, col3 = st.columns([2, 1, 1])
-                col1.write(f"**{c['Name']}** with {c['Trainer']}")
-                col1.write(f"📅 {c['Date'].strftime('%d-%b-%Y')} at {c['Time']}")
-                col2.write(f"**Slots:** {len(c.get('Booked', []))} / {c['Capacity']}")
-                
-                if is_booked:
-                    if col3.button("Cancel Booking", key=f"cancel_{c['ID']}", type="primary", use_container_width=True):
-                        c['Booked'].remove(member['ID'])
-                        st.toast("Booking cancelled!")
-                        st.rerun()
-                elif is_full:
-                    col3.error("Class is Full", icon="⛔")
-                else:
-                    if st.button(f"Book Now", key=f"book_{c['ID']}", use_container_width=True):
-                        c['Booked'].append(member['ID'])
-                        st.toast("Booking successful!")
-                        st.rerun()
-
-    elif page == "Workout Tracking":
-        st.title("🏋️‍♀️ Workout & Progress Tracking")
-        tab1, tab2, tab3, tab4 = st.tabs(["Log New Workout", "My Workout History", "Workout Library", "My Plans"])
-
-        with tab1:
-            with st.form("log_workout"):
-                workout_names = [w['Name'] for w in st.session_state.workout_library]
-                exercise = st.selectbox("Exercise", workout_names)
-                weight = st.number_input("Weight (kg)", min_value=0.0, step=2.5)
-                sets = st.number_input("Sets", min_value=1, step=1)
-                reps = st.number_input("Reps", min_value=1, step=1)
-                if st.form_submit_button("Log Workout"):
-                    log_entry = {'Date': date.today(), 'Exercise': exercise, 'Weight': weight, 'Sets': sets, 'Reps': reps}
-                    if st.session_state.current_user_id not in st.session_state.member_workouts:
-                         st.session_state.member_workouts[st.session_state.current_user_id] = []
-                    st.session_state.member_workouts[st.session_state.current_user_id].append(log_entry)
-                    st.success("Workout logged!")
-
-        with tab2:
-            st.subheader("Your Workout History")
-            workouts = st.session_state.member_workouts.get(st.session_state.current_user_id, [])
-            if workouts:
-                df = pd.DataFrame(workouts)
-                df.index = range(1, len(df) + 1)
-                st.dataframe(df)
-
-                st.subheader("Progress Visualization")
-                exercise_to_chart = st.selectbox("Select exercise to visualize", df['Exercise'].unique())
-                progress_df = df[df['Exercise'] == exercise_to_chart].sort_values(by='Date')
-                if not progress_df.empty:
-                    fig = px.line(progress_df, x='Date', y='Weight', title=f'Weight Progress for {exercise_to_chart}', markers=True)
-                    st.plotly_chart(fig, use_container_width=True)
-            else:
-                st.info("You have no logged workouts yet.")
-
-        with tab3:
-            st.subheader("Browse Workout Library")
-            
-            # Group workouts by muscle group
-            workouts_by_group = {}
-            for workout in st.session_state.workout_library:
-                group = workout['Muscle Group']
-                if group not in workouts_by_group:
-                    workouts_by_group[group] = []
-                workouts_by_group[group].append(workout)
-
-            for group, workouts in workouts_by_group.items():
-                st.markdown(f"### {group}")
-                for workout in workouts:
-                    with st.expander(f"{workout['Name']} ({workout['Difficulty']})"):
-                        st.write(f"**Equipment:** {workout['Equipment']}")
-                        st.video(workout['Video'])
-            
-            st.markdown("---")
-            with st.expander("➕ Add a New Exercise to Library"):
-                with st.form("add_exercise_form"):
-                    name = st.text_input("Exercise Name")
-                    muscle_group = st.text_input("Muscle Group (e.g., Legs, Chest, Back)")
-                    difficulty = st.selectbox("Difficulty", ["Beginner", "Intermediate", "Advanced"])
-                    equipment = st.text_input("Equipment")
-                    video = st.text_input("Video URL (YouTube link)")
-                    if st.form_submit_button("Add Exercise"):
-                        if name and muscle_group and video:
-                            new_workout = {'Name': name, 'Muscle Group': muscle_group, 'Difficulty': difficulty, 'Equipment': equipment, 'Video': video}
-                            st.session_state.workout_library.append(new_workout)
-                            st.success(f"Exercise '{name}' added to the library!")
-                            st.rerun()
-                        else:
-                            st.error("Please fill out all required fields.")
-
-        with tab4:
-            st.subheader("Your Personalized Workout Plans")
-            plans = st.session_state.member_plans.get(st.session_state.current_user_id, [])
-            if plans:
-                st.info("This is your current plan from your trainer.")
-                plans_df = pd.DataFrame(plans)
-                st.data_editor(plans_df, use_container_width=True, hide_index=True)
-                st.markdown("---")
-            else:
-                st.info("You don't have a plan assigned by a trainer yet. Why not create your own?")
-            
-            with st.expander("➕ Create Your Own Workout Plan"):
-                with st.form("create_plan_form"):
-                    st.write("Add an exercise to your custom plan:")
-                    exercise_name = st.text_input("Exercise Name")
-                    sets = st.number_input("Sets", min_value=1, step=1)
-                    reps = st.number_input("Reps", min_value=1, step=1)
-                    notes = st.text_area("Notes (optional)")
-                    if st.form_submit_button("Add Exercise to Plan"):
-                        if exercise_name:
-                            new_plan_entry = {'exercise': exercise_name, 'sets': sets, 'reps': reps, 'notes': notes}
-                            if st.session_state.current_user_id not in st.session_state.member_plans:
-                                st.session_state.member_plans[st.session_state.current_user_id] = []
-                            st.session_state.member_plans[st.session_state.current_user_id].append(new_plan_entry)
-                            st.success("Exercise added to your plan!")
-                            st.rerun()
-                        else:
-                            st.error("Exercise name is required.")
-
-    elif page == "Nutrition Tracking":
-        st.title("🥗 Nutrition Tracking")
-        with st.form("log_meal"):
-            st.subheader("Log Your Meal")
-            food = st.text_input("What did you eat?")
-            calories = st.number_input("Calories", min_value=0, step=10)
-            macronutrients = st.text_input("Macronutrients (e.g., 50g protein, 30g carbs)")
-            if st.form_submit_button("Log Meal"):
-                new_meal = {'Date': date.today(), 'Food': food, 'Calories': calories, 'Macronutrients': macronutrients}
-                if st.session_state.current_user_id not in st.session_state.nutrition:
-                    st.session_state.nutrition[st.session_state.current_user_id] = []
-                st.session_state.nutrition[st.session_state.current_user_id].append(new_meal)
-                st.success("Meal logged!")
-        
-        st.subheader("Your Nutrition History")
-        nutrition_data = st.session_state.nutrition.get(st.session_state.current_user_id, [])
-        if nutrition_data:
-            df = pd.DataFrame(nutrition_data)
-            df.index = range(1, len(df) + 1)
-            st.dataframe(df, use_container_width=True)
-        else:
-            st.info("You haven't logged any meals yet.")
-
-    elif page == "Progress Photos":
-        st.title("📸 Progress Tracking")
-        tab1, tab2 = st.tabs(["Log Body Metrics", "Progress Photos"])
-
-        with tab1:
-            with st.form("log_metrics"):
-                st.subheader("Log Your Body Metrics")
-                weight = st.number_input("Weight (kg)", min_value=0.0, step=0.1)
-                body_fat = st.number_input("Body Fat (%)", min_value=0.0, step=0.1)
-                if st.form_submit_button("Log Metrics"):
-                    new_metric = {'date': date.today(), 'weight': weight, 'body_fat': body_fat}
-                    if st.session_state.current_user_id not in st.session_state.body_metrics:
-                        st.session_state.body_metrics[st.session_state.current_user_id] = []
-                    st.session_state.body_metrics[st.session_state.current_user_id].append(new_metric)
-                    st.success("Metrics logged!")
-            
-            st.subheader("Your Body Metric History")
-            metrics_data = st.session_state.body_metrics.get(st.session_state.current_user_id, [])
-            if metrics_data:
-                df = pd.DataFrame(metrics_data)
-                fig = px.line(df, x='date', y='weight', title='Weight Progress')
-                st.plotly_chart(fig, use_container_width=True)
-            else:
-                st.info("No body metrics logged yet.")
-            
-            st.subheader("Your Achievements")
-            badges = st.session_state.badges.get(st.session_state.current_user_id, [])
-            if badges:
-                st.info(", ".join(badges))
-            else:
-                st.info("No badges earned yet. Keep it up!")
-
-        with tab2:
-            st.subheader("Your Progress Photos")
-            uploaded_photo = st.file_uploader("Upload a progress photo", type=["png", "jpg", "jpeg"])
-            if uploaded_photo is not None:
-                new_photo = {'date': date.today(), 'photo': uploaded_photo.getvalue()}
-                st.session_state.progress_photos[st.session_state.current_user_id].append(new_photo)
-                st.success("Photo uploaded successfully!")
-                st.rerun()
-
-            progress_photos = st.session_state.progress_photos.get(st.session_state.current_user_id, [])
-            if progress_photos:
-                photo_dates = [p['date'].strftime('%Y-%m-%d') for p in progress_photos]
-                selected_photo_date = st.selectbox("Select a photo to view", options=photo_dates)
-                
-                selected_photo = next((p for p in progress_photos if p['date'].strftime('%Y-%m-%d') == selected_photo_date), None)
-                if selected_photo:
-                    st.image(selected_photo['photo'], caption=f"Photo from {selected_photo['date'].strftime('%B %d, %Y')}")
-            else:
-                st.info("You haven't uploaded any progress photos yet.")
-
-
-    elif page == "Challenges":
-        st.title("🏆 Challenges & Leaderboards")
-        st.subheader("Join a Challenge")
-        st.info("This is where you'd see a list of challenges to join.")
-        
-        st.subheader("Active Leaderboards")
-        for challenge, data in st.session_state.challenges.items():
-            st.write(f"#### {challenge}")
-            df = pd.DataFrame(data['participants']).sort_values(by=list(data['participants'][0].keys())[2], ascending=False)
-            df.index = range(1, len(df) + 1)
-            st.dataframe(df)
-
-    elif page == "Community":
-        st.title("💬 Community Feed")
-        st.subheader("Share your progress and connect!")
-        with st.form("new_post"):
-            post_text = st.text_area("What's on your mind?")
-            if st.form_submit_button("Post"):
-                if post_text:
-                    member_name = member['Name']
-                    new_post = {'user': member_name, 'text': post_text, 'date': datetime.now()}
-                    st.session_state.community_posts.insert(0, new_post)
-                    st.success("Your post has been shared!")
-                    st.rerun()
-        
-        st.subheader("Recent Posts")
-        for post in st.session_state.community_posts:
-            st.info(f"**{post['user']}** - *{post['date'].strftime('%d %B %Y, %H:%M')}*\n\n{post['text']}")
-    
-    elif page == "Find a Trainer":
-        st.title("🤝 Find a Trainer")
-        st.subheader("Connect with the right trainer for you!")
-        
-        trainers_df = pd.DataFrame(st.session_state.trainers)
-        current_trainer_id = member.get('Trainer ID')
-        
-        for index, trainer in trainers_df.iterrows():
-            with st.container(border=True):
-                col1, col2 = st.columns([1, 2])
-                with col1:
-                    st.subheader(trainer['Name'])
-                    st.markdown(f"**Specialization:** {trainer['Specialization']}")
-                with col2:
-                    is_requested = member['ID'] in st.session_state.trainer_requests.get(trainer['ID'], [])
-                    if trainer['ID'] == current_trainer_id:
-                        st.success("You are already assigned to this trainer!")
-                    elif is_requested:
-                        st.info("Request pending...")
-                    else:
-                        if st.button(f"Request {trainer['Name']}", key=f"request_{trainer['ID']}", use_container_width=True):
-                            st.session_state.trainer_requests[trainer['ID']].append(member['ID'])
-                            st.success(f"You have requested to be assigned to {trainer['Name']}. An admin will review your request.")
-                            st.rerun()
-
-    
-    elif page == "Announcements":
-        st.title("📢 Gym Announcements")
-        if st.session_state.announcements:
-            for ann in st.session_state.announcements:
-                st.info(ann)
-        else:
-            st.success("No new announcements at this time.")
-
-# --- MAIN APP ROUTER ---
-def main():
-    initialize_data()
-    
-    if 'logged_in' not in st.session_state:
-        st.session_state.logged_in = False
-    
-    if not st.session_state.logged_in:
-        role = st.selectbox("Login as:", ["Member", "Admin", "Trainer"], key="login_role")
-        login_register_page(role)
-    else:
-        if st.session_state.role == "Admin":
-            admin_view()
-        elif st.session_state.role == "Member":
-            member_view()
-        elif st.session_state.role == "Trainer":
-            trainer_view()
-
-if __name__ == "__main__":
-    main()
+import streamlit as st
+import pandas as pd
+import numpy as np
+import plotly.express as px
+import bcrypt
+from array import array
+from datetime import datetime, date, timedelta
+from email.message import EmailMessage
+import asyncio
+import bisect
+import calendar
+import cProfile
+import difflib
+import functools
+import hashlib
+import heapq
+import hmac
+import io
+import itertools
+import json
+import mmap
+import os
+import pickle
+import pstats
+import random
+import re
+import secrets
+import smtplib
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dotenv import load_dotenv
+from PIL import Image, ImageOps
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+load_dotenv()
+
+# --- APP CONFIGURATION ---
+st.set_page_config(
+    page_title="Bengaluru Fitness Hub",
+    page_icon="🏋️‍♂️",
+    layout="wide",
+)
+
+# --- MOCK DATABASE WITH PRELOADED VALUES ---
+def sample_data():
+    """Returns the preloaded sample data as (key, record) pairs for each collection."""
+    # Preloaded Admin & Trainer Credentials
+    admins = [{'ID': 1, 'username': 'admin', 'password': 'password123', 'name': 'Adarsh'}]
+    trainers = [
+        {'ID': 101, 'Name': 'Karthik Murali', 'Specialization': 'CrossFit', 'username': 'karthik', 'password': 'pass', 'Uploaded Photo': None, 'Photo URL': 'https://api.dicebear.com/8.x/avataaars/svg?seed=Karthik'},
+        {'ID': 102, 'Name': 'Lakshmi Devi', 'Specialization': 'Yoga & Pilates', 'username': 'lakshmi', 'password': 'pass', 'Uploaded Photo': None, 'Photo URL': 'https://api.dicebear.com/8.x/avataaars/svg?seed=Lakshmi'},
+    ]
+
+    # Preloaded Member Data with South Indian Names & Detailed Profiles
+    members = [
+        {'ID': 1, 'Name': 'Priya Kumar', 'username': 'priyak', 'Password': 'pass', 'Email': 'priya@email.com', 'Phone': '9876543210', 'DOB': date(1995, 5, 20), 'Address': '123 Koramangala, Bengaluru', 'Photo URL': 'https://api.dicebear.com/8.x/avataaars/svg?seed=Priya', 'Plan': 'Gold', 'Status': 'Active', 'Join Date': date(2024, 1, 15), 'Expiry Date': date(2025, 1, 15), 'Trainer ID': 101, 'Uploaded Photo': None},
+        {'ID': 2, 'Name': 'Vikram Reddy', 'username': 'vikramr', 'Password': 'pass', 'Email': 'vikram@email.com', 'Phone': '9876543211', 'DOB': date(1990, 11, 30), 'Address': '456 Indiranagar, Bengaluru', 'Photo URL': 'https://api.dicebear.com/8.x/avataaars/svg?seed=Vikram', 'Plan': 'Silver', 'Status': 'Active', 'Join Date': date(2024, 3, 1), 'Expiry Date': date(2025, 8, 1), 'Trainer ID': 102, 'Uploaded Photo': None},
+        {'ID': 3, 'Name': 'Ananya Iyer', 'username': 'ananyai', 'Password': 'pass', 'Email': 'ananya@email.com', 'Phone': '9876543212', 'DOB': date(2000, 8, 10), 'Address': '789 Jayanagar, Bengaluru', 'Photo URL': 'https://api.dicebear.com/8.x/avataaars/svg?seed=Ananya', 'Plan': 'Bronze', 'Status': 'Expired', 'Join Date': date(2023, 5, 20), 'Expiry Date': date(2024, 5, 20), 'Trainer ID': 101, 'Uploaded Photo': None},
+    ]
+
+    # Preloaded Plans and Payments in Rupees
+    plans = {'Bronze': {'price': 1500, 'duration': 30}, 'Silver': {'price': 2500, 'duration': 30}, 'Gold': {'price': 4000, 'duration': 30}}
+    payments = [{'Member ID': 1, 'Amount': 4000, 'Date': date(2024, 1, 15), 'Plan': 'Gold'}, {'Member ID': 2, 'Amount': 2500, 'Date': date(2024, 3, 1), 'Plan': 'Silver'}]
+
+    # Preloaded Classes
+    classes = [
+        {'ID': 1001, 'Name': 'Morning CrossFit', 'Trainer': 'Karthik Murali', 'Trainer ID': 101, 'Date': date.today() + timedelta(days=1), 'Time': '06:00', 'Capacity': 10, 'Duration': 60, 'Booked': [1, 2]},
+        {'ID': 1002, 'Name': 'Evening Yoga', 'Trainer': 'Lakshmi Devi', 'Trainer ID': 102, 'Date': date.today() + timedelta(days=1), 'Time': '18:00', 'Capacity': 15, 'Duration': 60, 'Booked': [3]},
+        {'ID': 1003, 'Name': 'Pilates Core', 'Trainer': 'Lakshmi Devi', 'Trainer ID': 102, 'Date': date.today() + timedelta(days=2), 'Time': '12:00', 'Capacity': 12, 'Duration': 60, 'Booked': []},
+    ]
+
+    announcements = ["Maintenance alert: The swimming pool will be closed this weekend.", "Ganesha Chaturthi Promotion: Get 20% off on all 'Gold' annual plans!"]
+
+    workout_library = [
+        # Leg Workouts
+        {'Name': 'Barbell Squat', 'Muscle Group': 'Legs', 'Difficulty': 'Intermediate', 'Equipment': 'Barbell, Squat Rack', 'Video': 'https://www.youtube.com/watch?v=U3mC6_o2_C4'},
+        {'Name': 'Leg Press', 'Muscle Group': 'Legs', 'Difficulty': 'Beginner', 'Equipment': 'Leg Press Machine', 'Video': 'https://www.youtube.com/watch?v=s0-zB1qfVzI'},
+        {'Name': 'Romanian Deadlift (RDL)', 'Muscle Group': 'Legs', 'Difficulty': 'Intermediate', 'Equipment': 'Barbell or Dumbbells', 'Video': 'https://www.youtube.com/watch?v=jW2tK9c4f7k'},
+
+        # Chest Workouts
+        {'Name': 'Push-up', 'Muscle Group': 'Chest', 'Difficulty': 'Beginner', 'Equipment': 'None', 'Video': 'https://www.youtube.com/watch?v=IODxDxX7oi4'},
+        {'Name': 'Dumbbell Bench Press', 'Muscle Group': 'Chest', 'Difficulty': 'Intermediate', 'Equipment': 'Dumbbells, Bench', 'Video': 'https://www.youtube.com/watch?v=fJz0t4tDq3Q'},
+        {'Name': 'Cable Flys', 'Muscle Group': 'Chest', 'Difficulty': 'Intermediate', 'Equipment': 'Cable Machine', 'Video': 'https://www.youtube.com/watch?v=rtJ-E3qYl7M'},
+
+        # Back Workouts
+        {'Name': 'Pull-up', 'Muscle Group': 'Back', 'Difficulty': 'Advanced', 'Equipment': 'Pull-up Bar', 'Video': 'https://www.youtube.com/watch?v=eGo4IYFdUsw'},
+        {'Name': 'Bent-Over Dumbbell Rows', 'Muscle Group': 'Back', 'Difficulty': 'Intermediate', 'Equipment': 'Dumbbells', 'Video': 'https://www.youtube.com/watch?v=ZfA1yE72F_c'},
+        {'Name': 'Lat Pulldown', 'Muscle Group': 'Back', 'Difficulty': 'Beginner', 'Equipment': 'Lat Pulldown Machine', 'Video': 'https://www.youtube.com/watch?v=0saN0G0Xg4o'},
+
+        # Arms Workouts
+        {'Name': 'Bicep Curls', 'Muscle Group': 'Arms', 'Difficulty': 'Beginner', 'Equipment': 'Dumbbells or Barbell', 'Video': 'https://www.youtube.com/watch?v=tQ11T6z1J48'},
+        {'Name': 'Tricep Dips', 'Muscle Group': 'Arms', 'Difficulty': 'Intermediate', 'Equipment': 'Bench or Dip Station', 'Video': 'https://www.youtube.com/watch?v=s-tT1C2y_mE'},
+
+        # Core Workouts
+        {'Name': 'Plank', 'Muscle Group': 'Core', 'Difficulty': 'Beginner', 'Equipment': 'None', 'Video': 'https://www.youtube.com/watch?v=ASdvfQjU7F0'},
+        {'Name': 'Leg Raises', 'Muscle Group': 'Core', 'Difficulty': 'Beginner', 'Equipment': 'None', 'Video': 'https://www.youtube.com/watch?v=W0y_oBq_Q_E'},
+    ]
+
+    member_workouts = {
+        1: [{'Date': date(2025, 7, 10), 'Exercise': 'Barbell Squat', 'Weight': 60, 'Sets': 3, 'Reps': 10}],
+        2: [], 3: []
+    }
+
+    # New Feature Data
+    equipment = [
+        {'ID': 201, 'Name': 'Treadmill #1', 'Status': 'Working', 'Last Service': date(2024, 1, 1)},
+        {'ID': 202, 'Name': 'Treadmill #2', 'Status': 'Maintenance', 'Last Service': date(2024, 6, 1)},
+    ]
+    nutrition = {
+        1: [{'Date': date.today(), 'Meal': 'Breakfast', 'Food': 'Idli and Sambar', 'Calories': 350, 'Protein': 10, 'Carbs': 62, 'Fat': 6, 'Macronutrients': '10g protein, 62g carbs, 6g fat'}],
+        2: [], 3: [],
+    }
+    community_posts = [
+        {'user': 'Priya Kumar', 'text': 'Just hit a new PR on my squat! Feeling great 💪', 'date': datetime.now()},
+        {'user': 'Vikram Reddy', 'text': 'Yoga class with Lakshmi Devi was amazing today!', 'date': datetime.now() - timedelta(hours=2)},
+    ]
+    badges = {
+        1: ['First Workout Logged', '5 Classes Booked'],
+        2: ['First Class Booked'],
+        3: [],
+    }
+    challenges = {
+        '30-Day Squat Challenge': {'Metric': 'reps', 'Scores': {1: 500, 2: 450}},
+        'July Cardio King': {'Metric': 'distance (km)', 'Scores': {1: 25.5, 2: 22.0}},
+    }
+    body_metrics = {
+        1: [{'date': date.today(), 'weight': 65, 'body_fat': 22}, {'date': date.today() - timedelta(days=30), 'weight': 67, 'body_fat': 23}],
+    }
+    progress_photos = {
+        1: [],
+        2: [],
+        3: [],
+    }
+
+    member_plans = {
+        1: [{'exercise': 'Barbell Squat', 'sets': 3, 'reps': 10, 'notes': 'Focus on form.'}],
+        2: [],
+        3: [],
+    }
+
+    # New data structure for trainer requests
+    trainer_requests = {t['ID']: {} for t in trainers}
+
+    # Announcements and posts are stored oldest-first and displayed newest-first
+    return {
+        'admins': [(a['ID'], a) for a in admins],
+        'trainers': [(t['ID'], t) for t in trainers],
+        'members': [(m['ID'], m) for m in members],
+        'plans': list(plans.items()),
+        'payments': list(enumerate(payments, start=1)),
+        'classes': [(c['ID'], c) for c in classes],
+        'announcements': list(enumerate(reversed(announcements), start=1)),
+        'workout_library': list(enumerate(workout_library, start=1)),
+        'member_workouts': list(member_workouts.items()),
+        'equipment': [(e['ID'], e) for e in equipment],
+        'nutrition': list(nutrition.items()),
+        'foods': [(food['Name'], food) for food in FOOD_DATABASE],
+        'community_posts': list(enumerate(reversed(community_posts), start=1)),
+        'badges': list(badges.items()),
+        'challenges': list(challenges.items()),
+        'body_metrics': list(body_metrics.items()),
+        'progress_photos': list(progress_photos.items()),
+        'member_plans': list(member_plans.items()),
+        'trainer_requests': list(trainer_requests.items()),
+    }
+
+
+# Per serving; seeds the food lookup
+FOOD_DATABASE = [
+    {'Name': 'Idli and Sambar', 'Serving': '3 idlis + 1 bowl', 'Calories': 350, 'Protein': 10, 'Carbs': 62, 'Fat': 6},
+    {'Name': 'Idli', 'Serving': '1 piece', 'Calories': 58, 'Protein': 2, 'Carbs': 12, 'Fat': 0.4},
+    {'Name': 'Masala Dosa', 'Serving': '1 dosa', 'Calories': 387, 'Protein': 7, 'Carbs': 52, 'Fat': 16},
+    {'Name': 'Plain Dosa', 'Serving': '1 dosa', 'Calories': 168, 'Protein': 4, 'Carbs': 29, 'Fat': 4},
+    {'Name': 'Upma', 'Serving': '1 bowl', 'Calories': 250, 'Protein': 6, 'Carbs': 38, 'Fat': 8},
+    {'Name': 'Poha', 'Serving': '1 bowl', 'Calories': 270, 'Protein': 5, 'Carbs': 45, 'Fat': 8},
+    {'Name': 'Aloo Paratha', 'Serving': '1 paratha', 'Calories': 290, 'Protein': 6, 'Carbs': 40, 'Fat': 12},
+    {'Name': 'Chapati', 'Serving': '1 chapati', 'Calories': 104, 'Protein': 3, 'Carbs': 18, 'Fat': 2.5},
+    {'Name': 'Steamed Rice', 'Serving': '1 cup', 'Calories': 205, 'Protein': 4, 'Carbs': 45, 'Fat': 0.4},
+    {'Name': 'Brown Rice', 'Serving': '1 cup', 'Calories': 216, 'Protein': 5, 'Carbs': 45, 'Fat': 1.8},
+    {'Name': 'Dal Tadka', 'Serving': '1 bowl', 'Calories': 180, 'Protein': 9, 'Carbs': 24, 'Fat': 5},
+    {'Name': 'Rajma Chawal', 'Serving': '1 plate', 'Calories': 420, 'Protein': 15, 'Carbs': 72, 'Fat': 7},
+    {'Name': 'Chole', 'Serving': '1 bowl', 'Calories': 270, 'Protein': 12, 'Carbs': 36, 'Fat': 9},
+    {'Name': 'Paneer Tikka', 'Serving': '6 pieces', 'Calories': 320, 'Protein': 20, 'Carbs': 8, 'Fat': 23},
+    {'Name': 'Palak Paneer', 'Serving': '1 bowl', 'Calories': 290, 'Protein': 14, 'Carbs': 10, 'Fat': 22},
+    {'Name': 'Chicken Curry', 'Serving': '1 bowl', 'Calories': 300, 'Protein': 26, 'Carbs': 8, 'Fat': 18},
+    {'Name': 'Chicken Breast (Grilled)', 'Serving': '100 g', 'Calories': 165, 'Protein': 31, 'Carbs': 0, 'Fat': 3.6},
+    {'Name': 'Chicken Biryani', 'Serving': '1 plate', 'Calories': 490, 'Protein': 24, 'Carbs': 60, 'Fat': 17},
+    {'Name': 'Fish Curry', 'Serving': '1 bowl', 'Calories': 240, 'Protein': 22, 'Carbs': 6, 'Fat': 14},
+    {'Name': 'Boiled Egg', 'Serving': '1 egg', 'Calories': 78, 'Protein': 6, 'Carbs': 0.6, 'Fat': 5},
+    {'Name': 'Egg Omelette', 'Serving': '2 eggs', 'Calories': 190, 'Protein': 13, 'Carbs': 2, 'Fat': 14},
+    {'Name': 'Curd', 'Serving': '1 cup', 'Calories': 98, 'Protein': 11, 'Carbs': 3.4, 'Fat': 4.3},
+    {'Name': 'Greek Yogurt', 'Serving': '170 g', 'Calories': 100, 'Protein': 17, 'Carbs': 6, 'Fat': 0.7},
+    {'Name': 'Sprouts Salad', 'Serving': '1 bowl', 'Calories': 150, 'Protein': 10, 'Carbs': 24, 'Fat': 1.5},
+    {'Name': 'Oats', 'Serving': '40 g', 'Calories': 150, 'Protein': 5, 'Carbs': 27, 'Fat': 2.5},
+    {'Name': 'Banana', 'Serving': '1 medium', 'Calories': 105, 'Protein': 1.3, 'Carbs': 27, 'Fat': 0.4},
+    {'Name': 'Apple', 'Serving': '1 medium', 'Calories': 95, 'Protein': 0.5, 'Carbs': 25, 'Fat': 0.3},
+    {'Name': 'Almonds', 'Serving': '28 g', 'Calories': 164, 'Protein': 6, 'Carbs': 6, 'Fat': 14},
+    {'Name': 'Peanut Butter', 'Serving': '2 tbsp', 'Calories': 190, 'Protein': 7, 'Carbs': 7, 'Fat': 16},
+    {'Name': 'Whey Protein Shake', 'Serving': '1 scoop', 'Calories': 120, 'Protein': 24, 'Carbs': 3, 'Fat': 1.5},
+    {'Name': 'Milk (Toned)', 'Serving': '1 glass', 'Calories': 120, 'Protein': 8, 'Carbs': 12, 'Fat': 4.5},
+    {'Name': 'Masala Chai', 'Serving': '1 cup', 'Calories': 90, 'Protein': 3, 'Carbs': 12, 'Fat': 3},
+    {'Name': 'Samosa', 'Serving': '1 piece', 'Calories': 260, 'Protein': 4, 'Carbs': 30, 'Fat': 14},
+    {'Name': 'Sambar', 'Serving': '1 bowl', 'Calories': 130, 'Protein': 6, 'Carbs': 20, 'Fat': 3},
+]
+
+
+# --- INSTRUMENTATION ---
+# Most recent samples kept per page and per build for percentiles
+PERF_SAMPLE_LIMIT = 1000
+
+
+class PerformanceMonitor:
+    """Rolling render timings per page and per instrumented build, with store lookup and payload counts.
+
+    Each rerun is one page sample of (seconds, store lookups, bytes sent to the browser).
+    The last PERF_SAMPLE_LIMIT samples feed the percentiles; all-time counts and sums
+    feed the Prometheus export.
+    """
+
+    def __init__(self, metrics_file=None, export_interval=15):
+        self._lock = threading.Lock()
+        # Holds `sample`, the page sample of the rerun running on each thread
+        self.local = threading.local()
+        self._pages = {}
+        self._builds = {}
+        self._totals = {}
+        self.lookups = Counter()
+        self.profiles = deque(maxlen=5)
+        self._profile_requests = 0
+        self._metrics_file = metrics_file
+        self._export_interval = export_interval
+        self._last_export = 0
+
+    def _total(self, kind, name, seconds, payload=0):
+        totals = self._totals.setdefault((kind, name), [0, 0.0, 0])
+        totals[0] += 1
+        totals[1] += seconds
+        totals[2] += payload
+
+    def record_page(self, page, seconds, lookups, payload):
+        with self._lock:
+            self._pages.setdefault(page, deque(maxlen=PERF_SAMPLE_LIMIT)).append((seconds, sum(lookups.values()), payload))
+            self._total('page', page, seconds, payload)
+            self.lookups.update(lookups)
+        self.export()
+
+    def record_build(self, name, seconds):
+        with self._lock:
+            self._builds.setdefault(name, deque(maxlen=PERF_SAMPLE_LIMIT)).append(seconds)
+            self._total('build', name, seconds)
+
+    def request_profiles(self, count):
+        """Captures a cProfile of each of the next `count` reruns, in any session."""
+        with self._lock:
+            self._profile_requests = count
+
+    def take_profile_request(self):
+        with self._lock:
+            if self._profile_requests <= 0:
+                return False
+            self._profile_requests -= 1
+            return True
+
+    def page_summary(self):
+        """One row per page: run count, p50/p95/p99 render time in ms, and average lookups and payload."""
+        with self._lock:
+            pages = {page: list(samples) for page, samples in self._pages.items()}
+        rows = []
+        for page, samples in sorted(pages.items()):
+            seconds, lookups, payload = (np.array(column) for column in zip(*samples))
+            p50, p95, p99 = np.percentile(seconds * 1000, [50, 95, 99])
+            rows.append({'Page': page, 'Runs': len(samples), 'p50 (ms)': p50, 'p95 (ms)': p95, 'p99 (ms)': p99,
+                         'Avg Lookups': lookups.mean(), 'Avg Payload (KB)': payload.mean() / 1024})
+        return rows
+
+    def build_summary(self):
+        with self._lock:
+            builds = {name: np.array(samples) * 1000 for name, samples in self._builds.items()}
+        return [
+            {'Build': name, 'Calls': len(ms), 'p50 (ms)': np.percentile(ms, 50), 'p95 (ms)': np.percentile(ms, 95), 'p99 (ms)': np.percentile(ms, 99)}
+            for name, ms in sorted(builds.items())
+        ]
+
+    def prometheus_text(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            windows = {('page', page): [sample[0] for sample in samples] for page, samples in self._pages.items()}
+            windows.update({('build', name): list(samples) for name, samples in self._builds.items()})
+            totals = {key: list(value) for key, value in self._totals.items()}
+            lookups = dict(self.lookups)
+        for kind in ('page', 'build'):
+            metric = f"gym_{kind}_render_seconds"
+            lines += [f"# HELP {metric} Time spent rendering each {kind}.", f"# TYPE {metric} summary"]
+            for (total_kind, name), (count, seconds, _) in sorted(totals.items()):
+                if total_kind != kind:
+                    continue
+                label = name.replace('\\', '\\\\').replace('"', '\\"')
+                for quantile, value in zip((0.5, 0.95, 0.99), np.percentile(windows[(kind, name)], [50, 95, 99])):
+                    lines.append(f'{metric}{{{kind}="{label}",quantile="{quantile}"}} {value:.6f}')
+                lines.append(f'{metric}_sum{{{kind}="{label}"}} {seconds:.6f}')
+                lines.append(f'{metric}_count{{{kind}="{label}"}} {count}')
+        lines += ["# HELP gym_page_payload_bytes_total Bytes sent to browsers per page.", "# TYPE gym_page_payload_bytes_total counter"]
+        lines += [f'gym_page_payload_bytes_total{{page="{name}"}} {payload}' for (kind, name), (_, _, payload) in sorted(totals.items()) if kind == 'page']
+        lines += ["# HELP gym_store_lookups_total Repository reads per collection.", "# TYPE gym_store_lookups_total counter"]
+        lines += [f'gym_store_lookups_total{{collection="{collection}"}} {count}' for collection, count in sorted(lookups.items())]
+        return "\n".join(lines) + "\n"
+
+    def export(self, force=False):
+        """Writes the Prometheus text to the metrics file, at most every `export_interval` seconds."""
+        if not self._metrics_file or (not force and time.monotonic() - self._last_export < self._export_interval):
+            return
+        self._last_export = time.monotonic()
+        tmp_path = f"{self._metrics_file}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, self._metrics_file)
+
+
+@st.cache_resource
+def get_monitor():
+    """Returns the performance monitor shared by all sessions."""
+    return PerformanceMonitor(os.getenv('GYM_METRICS_FILE'), float(os.getenv('GYM_METRICS_INTERVAL', '15')))
+
+
+# Every rerun re-executes this module, but objects cached from earlier runs (the store)
+# still call that run's functions, so they must all share the monitor's thread-local
+_perf_local = get_monitor().local
+
+@contextmanager
+def page_run(monitor, page):
+    """Times one rerun as a sample of `page` (renamed by perf_page), counting lookups and bytes sent."""
+    sample = _perf_local.sample = {'monitor': monitor, 'page': page, 'lookups': Counter(), 'bytes': 0}
+    ctx = get_script_run_ctx()
+    enqueue = getattr(ctx, '_enqueue', None)
+    if enqueue is not None:
+        def counting_enqueue(msg):
+            sample['bytes'] += msg.ByteSize()
+            enqueue(msg)
+        ctx._enqueue = counting_enqueue
+    profiler = cProfile.Profile() if monitor.take_profile_request() else None
+    start = time.perf_counter()
+    try:
+        if profiler:
+            profiler.enable()
+        yield sample
+    finally:
+        seconds = time.perf_counter() - start
+        if profiler:
+            profiler.disable()
+            stats = io.StringIO()
+            pstats.Stats(profiler, stream=stats).sort_stats('cumulative').print_stats(30)
+            monitor.profiles.appendleft({'Date': datetime.now(), 'Page': sample['page'], 'Seconds': seconds, 'Stats': stats.getvalue()})
+        if enqueue is not None:
+            ctx._enqueue = enqueue
+        _perf_local.sample = None
+        monitor.record_page(sample['page'], seconds, sample['lookups'], sample['bytes'])
+
+
+def perf_page(page):
+    """Names the page the current rerun is rendering."""
+    sample = getattr(_perf_local, 'sample', None)
+    if sample is not None:
+        sample['page'] = page
+
+
+def record_lookup(collection):
+    sample = getattr(_perf_local, 'sample', None)
+    if sample is not None:
+        sample['lookups'][collection] += 1
+
+
+def instrumented(func):
+    """Times calls made during a rerun as builds named after the function."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        sample = getattr(_perf_local, 'sample', None)
+        if sample is None:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            sample['monitor'].record_build(func.__qualname__, time.perf_counter() - start)
+    return wrapper
+
+
+# --- SHARED PERSISTENT DATA STORE ---
+class SQLiteBackend:
+    """Persists every collection as pickled (collection, key) rows in a local SQLite file."""
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS records ("
+                "collection TEXT NOT NULL, key NOT NULL, value BLOB NOT NULL, "
+                "PRIMARY KEY (collection, key))"
+            )
+
+    def is_empty(self):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM records LIMIT 1").fetchone() is None
+
+    def load(self, collection):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value FROM records WHERE collection = ? ORDER BY rowid", (collection,)
+            ).fetchall()
+        return {key: pickle.loads(value) for key, value in rows}
+
+    def put_many(self, collection, items):
+        rows = [(collection, key, pickle.dumps(value)) for key, value in items]
+        with self._lock, self._conn:
+            # Upsert keeps the original rowid so collections reload in insertion order
+            self._conn.executemany(
+                "INSERT INTO records (collection, key, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (collection, key) DO UPDATE SET value = excluded.value",
+                rows,
+            )
+
+    def put(self, collection, key, value):
+        self.put_many(collection, [(key, value)])
+
+    def append(self, collection, key, entry):
+        """Adds `entry` to the end of the list stored under `key`, starting the list if there is none."""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT value FROM records WHERE collection = ? AND key = ?", (collection, key)).fetchone()
+            entries = pickle.loads(row[0]) if row else []
+            entries.append(entry)
+            self._conn.execute(
+                "INSERT INTO records (collection, key, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (collection, key) DO UPDATE SET value = excluded.value",
+                (collection, key, pickle.dumps(entries)),
+            )
+
+    def delete(self, collection, key):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM records WHERE collection = ? AND key = ?", (collection, key))
+
+    def collections(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT collection FROM records")]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SnapshotRegion:
+    """One collection's pickled values laid end to end in a snapshot, with their keys and sizes."""
+
+    def __init__(self, keys, sizes, view):
+        self.keys = keys
+        self.sizes = sizes
+        self.view = view
+
+    @classmethod
+    def of(cls, records):
+        values = list(records.values())
+        return cls(list(records), array('Q', map(len, values)), memoryview(b''.join(values)))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def split(self):
+        """Returns the region as a {key: pickled value} dict, copied out of the snapshot's mapping."""
+        # One copy then bytes slices is far quicker than a memoryview slice per value
+        data = self.view.tobytes()
+        ends = list(itertools.accumulate(self.sizes, initial=0))
+        return {key: data[begin:end] for key, begin, end in zip(self.keys, ends, ends[1:])}
+
+
+class AppendedList:
+    """A pickled list in the journal's memory plus the pickled entries appended to it since."""
+    __slots__ = ('base', 'tail')
+
+    def __init__(self, base):
+        self.base = base
+        self.tail = []
+
+    def dumps(self):
+        entries = pickle.loads(self.base) if self.base is not None else []
+        entries.extend(pickle.loads(entry) for entry in self.tail)
+        return pickle.dumps(entries)
+
+
+# Journal size past which the backend writes a new snapshot and drops the old segments
+JOURNAL_COMPACT_BYTES = 64 * 1024 * 1024
+
+
+class JournalBackend:
+    """Keeps every collection in memory over an append-only journal and compacted snapshots.
+
+    Each write is one length- and CRC-framed entry appended to the current journal
+    segment and fsynced before it returns. Once a segment passes `compact_bytes`, a new
+    segment is started and a snapshot of everything before it is written in the
+    background, after which the older segments are removed. A snapshot is a pickled
+    index of keys and value sizes followed by each collection's pickled values laid end
+    to end. On startup it is memory-mapped, so values stay in the page cache until their
+    collection is first used, and the journal tail after it is replayed; an entry torn
+    by a crash is truncated away.
+    """
+    SNAPSHOT_MAGIC = b'GYMSNAP2'
+    _entry_header = struct.Struct('<II')
+    _snapshot_header = struct.Struct('<8sQ')
+
+    def __init__(self, root, compact_bytes=JOURNAL_COMPACT_BYTES):
+        self.root = root
+        self._compact_bytes = compact_bytes
+        self._lock = threading.Lock()
+        self._compaction = None
+        os.makedirs(root, exist_ok=True)
+        # Each collection is a {key: pickled value} dict, or a snapshot region not yet split into one
+        self._seq, self._collections = self._map_snapshot()
+        segments = self._segments()
+        for path in segments:
+            self._replay(path)
+        self._open_segment(segments[-1] if segments else None)
+        if self._journal.tell() >= compact_bytes:
+            with self._lock:
+                self._start_compaction()
+
+    @property
+    def snapshot_path(self):
+        return os.path.join(self.root, 'snapshot.bin')
+
+    def _segments(self):
+        """Journal segment paths, oldest first; each is named after the first sequence number it holds."""
+        return sorted(os.path.join(self.root, name) for name in os.listdir(self.root) if re.fullmatch(r'journal-\d{16}\.log', name))
+
+    def _open_segment(self, path=None):
+        self._journal = open(path or os.path.join(self.root, f"journal-{self._seq + 1:016d}.log"), 'ab')
+
+    def _map_snapshot(self):
+        """Returns the snapshot's last sequence number and its collections as SnapshotRegions."""
+        if not os.path.exists(self.snapshot_path):
+            return 0, {}
+        with open(self.snapshot_path, 'rb') as f:
+            view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        magic, index_size = self._snapshot_header.unpack_from(view)
+        if magic != self.SNAPSHOT_MAGIC:
+            raise ValueError(f"{self.snapshot_path} is not a gym snapshot")
+        offset = self._snapshot_header.size + index_size
+        seq, index = pickle.loads(view[self._snapshot_header.size:offset])
+        collections = {}
+        for collection, keys, size_bytes in index:
+            sizes = array('Q')
+            sizes.frombytes(size_bytes)
+            region = collections[collection] = SnapshotRegion(keys, sizes, view[offset:offset + sum(sizes)])
+            offset += len(region.view)
+        return seq, collections
+
+    def _write_snapshot(self, seq, collections):
+        regions = {collection: records if isinstance(records, SnapshotRegion) else SnapshotRegion.of(records)
+                   for collection, records in collections.items()}
+        index = pickle.dumps((seq, [(collection, region.keys, region.sizes.tobytes()) for collection, region in regions.items()]), protocol=5)
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(self._snapshot_header.pack(self.SNAPSHOT_MAGIC, len(index)))
+            f.write(index)
+            for region in regions.values():
+                f.write(region.view)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+    def _records(self, collection):
+        """The collection's {key: pickled value} dict, splitting a snapshot region into one on first use."""
+        records = self._collections.get(collection)
+        if records is None:
+            records = self._collections[collection] = {}
+        elif isinstance(records, SnapshotRegion):
+            records = self._collections[collection] = records.split()
+        return records
+
+    def _replay(self, path):
+        """Applies the segment's entries newer than the snapshot, truncating any torn final entry."""
+        with open(path, 'rb') as f:
+            data = f.read()
+        offset = 0
+        while offset + self._entry_header.size <= len(data):
+            size, crc = self._entry_header.unpack_from(data, offset)
+            payload = data[offset + self._entry_header.size:offset + self._entry_header.size + size]
+            if len(payload) < size or zlib.crc32(payload) != crc:
+                break
+            seq, op, collection, arg = pickle.loads(payload)
+            if seq > self._seq:
+                self._apply(op, collection, arg)
+                self._seq = seq
+            offset += self._entry_header.size + size
+        if offset < len(data):
+            with open(path, 'r+b') as f:
+                f.truncate(offset)
+
+    def _apply(self, op, collection, arg):
+        if op == 'put':
+            self._records(collection).update(arg)
+        elif op == 'append':
+            # Only the new entry is kept; the list is re-pickled when it is next loaded or snapshotted
+            key, entry = arg
+            records = self._records(collection)
+            value = records.get(key)
+            if not isinstance(value, AppendedList):
+                value = records[key] = AppendedList(value)
+            value.tail.append(entry)
+        else:
+            self._records(collection).pop(arg, None)
+
+    @staticmethod
+    def _fold(records):
+        """Replaces the collection's AppendedLists with their whole pickled lists."""
+        for key, value in records.items():
+            if isinstance(value, AppendedList):
+                records[key] = value.dumps()
+        return records
+
+    def _append(self, op, collection, arg):
+        with self._lock:
+            self._seq += 1
+            payload = pickle.dumps((self._seq, op, collection, arg), protocol=5)
+            self._journal.write(self._entry_header.pack(len(payload), zlib.crc32(payload)) + payload)
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self._apply(op, collection, arg)
+            if self._journal.tell() >= self._compact_bytes:
+                self._start_compaction()
+
+    def _start_compaction(self):
+        """Starts a new segment and snapshots everything before it on a background thread."""
+        if self._compaction is not None and self._compaction.is_alive():
+            return
+        self._journal.close()
+        self._open_segment()
+        collections = {collection: records if isinstance(records, SnapshotRegion) else dict(self._fold(records))
+                       for collection, records in self._collections.items()}
+        self._compaction = threading.Thread(target=self._compact, args=(self._seq, collections), daemon=True)
+        self._compaction.start()
+
+    def _compact(self, seq, collections):
+        self._write_snapshot(seq, collections)
+        for path in self._segments():
+            if int(os.path.basename(path)[8:24]) <= seq:
+                os.remove(path)
+        # Collections still unsplit move onto the new snapshot so the old mapping can be released
+        _, mapped = self._map_snapshot()
+        with self._lock:
+            for collection, region in mapped.items():
+                if self._collections.get(collection) is collections[collection]:
+                    self._collections[collection] = region
+
+    def import_from(self, backend):
+        """Copies every collection of another backend, e.g. the SQLite file this one replaces."""
+        for collection in backend.collections():
+            self.put_many(collection, backend.load(collection).items())
+
+    def collections(self):
+        with self._lock:
+            return [collection for collection, records in self._collections.items() if len(records)]
+
+    def is_empty(self):
+        with self._lock:
+            return not any(len(records) for records in self._collections.values())
+
+    def load(self, collection):
+        with self._lock:
+            items = list(self._fold(self._records(collection)).items())
+        return {key: pickle.loads(value) for key, value in items}
+
+    def put_many(self, collection, items):
+        items = [(key, pickle.dumps(value)) for key, value in items]
+        if items:
+            self._append('put', collection, items)
+
+    def put(self, collection, key, value):
+        self.put_many(collection, [(key, value)])
+
+    def append(self, collection, key, entry):
+        """Adds `entry` to the end of the list stored under `key`; only the entry is journaled."""
+        self._append('append', collection, (key, pickle.dumps(entry)))
+
+    def delete(self, collection, key):
+        self._append('delete', collection, key)
+
+    def close(self):
+        """Waits for any snapshot being written and closes the journal."""
+        with self._lock:
+            compaction = self._compaction
+        if compaction is not None:
+            compaction.join()
+        with self._lock:
+            self._journal.close()
+
+
+class BlobStore:
+    """Content-addressed image files on local disk, deduplicated by SHA-256.
+
+    Records keep only the hex digest returned by `put`. Resized renditions of each
+    image live next to the originals under `renditions/`.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(os.path.join(root, 'renditions'), exist_ok=True)
+
+    def path(self, ref):
+        return os.path.join(self.root, ref[:2], ref)
+
+    def rendition_path(self, ref, name):
+        return os.path.join(self.root, 'renditions', f"{ref}_{name}.webp")
+
+    def _write(self, path, write):
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        write(tmp_path)
+        os.replace(tmp_path, path)
+
+    def put(self, data):
+        ref = hashlib.sha256(data).hexdigest()
+        path = self.path(ref)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            def write(tmp_path):
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+            self._write(path, write)
+        return ref
+
+    def read(self, ref):
+        """Returns a read-only memory map of the stored file."""
+        with open(self.path(ref), 'rb') as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def save_rendition(self, ref, name, image):
+        # Saving without exif= drops the original's metadata (camera, GPS, ...)
+        self._write(self.rendition_path(ref, name), lambda tmp_path: image.save(tmp_path, format='WEBP', quality=80))
+
+
+# Largest first: each rendition is downscaled from the previous one
+IMAGE_RENDITIONS = {'preview': 1024, 'thumbnail': 400, 'avatar': 200}
+
+
+class ImagePipeline:
+    """Renders the IMAGE_RENDITIONS of uploaded images on a background thread pool."""
+
+    def __init__(self, blobs, workers=2):
+        self._blobs = blobs
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='image-pipeline')
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._failed = set()
+
+    def submit(self, ref):
+        with self._lock:
+            if ref in self._pending or ref in self._failed:
+                return
+            self._pending.add(ref)
+        self._executor.submit(self._render, ref)
+
+    def _render(self, ref):
+        try:
+            with self._blobs.read(ref) as data, Image.open(data) as original:
+                image = ImageOps.exif_transpose(original)
+                image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+            for name, size in IMAGE_RENDITIONS.items():
+                image.thumbnail((size, size))
+                self._blobs.save_rendition(ref, name, image)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            with self._lock:
+                self._failed.add(ref)
+        finally:
+            with self._lock:
+                self._pending.discard(ref)
+
+    def source(self, ref, name):
+        """Returns the path of a rendition, or None while it is rendering or if the image is unreadable."""
+        path = self._blobs.rendition_path(ref, name)
+        if os.path.exists(path):
+            return path
+        self.submit(ref)
+        return None
+
+
+class Repository:
+    """A process-wide collection of records keyed by ID, loaded from the backend on first use.
+
+    `unique_indexes` map a field value to a single record (e.g. username -> member) and
+    `group_indexes` map a field value to every record sharing it (e.g. trainer -> classes).
+    Both are kept in step with the records on every put and delete, as are any
+    listeners registered with `subscribe`.
+    """
+    collection = None
+    key_field = 'ID'
+    unique_indexes = ()
+    group_indexes = ()
+
+    def __init__(self, backend, lock):
+        self._backend = backend
+        self._lock = lock
+        self._records = None
+        self._unique = {field: {} for field in self.unique_indexes}
+        self._groups = {field: {} for field in self.group_indexes}
+        self._indexed_values = {}
+        self._listeners = []
+        self._last_id = 0
+
+    @property
+    def records(self):
+        record_lookup(self.collection)
+        if self._records is None:
+            with self._lock:
+                if self._records is None:
+                    records = self._backend.load(self.collection)
+                    for key, record in records.items():
+                        records[key] = record = self._migrate(record)
+                        self._track_id(key)
+                        self._index(key, record)
+                        self._notify(key, record)
+                    self._records = records
+        return self._records
+
+    def _migrate(self, record):
+        """Converts a record stored in an older format; called as records are loaded."""
+        return record
+
+    def subscribe(self, listener):
+        """Calls `listener(key, record)` for every loaded or saved record, and with `None` on delete."""
+        self._listeners.append(listener)
+
+    def _notify(self, key, record):
+        for listener in self._listeners:
+            listener(key, record)
+
+    def _track_id(self, key):
+        if isinstance(key, int) and key > self._last_id:
+            self._last_id = key
+
+    def _check_unique(self, items):
+        """Raises ValueError if a record would take a unique indexed value another key already holds."""
+        claimed = {}
+        for key, record in items:
+            if not isinstance(record, dict):
+                continue
+            for field in self.unique_indexes:
+                value = record.get(field)
+                if value is None:
+                    continue
+                other = claimed.get((field, value), self._unique[field].get(value))
+                if other is not None and other != key:
+                    raise ValueError(f"{field} {value} is already used by {other}.")
+                claimed[(field, value)] = key
+
+    def _index(self, key, record):
+        self._check_unique([(key, record)])
+        self._unindex(key)
+        if not isinstance(record, dict):
+            return
+        values = {field: record.get(field) for field in self.unique_indexes + self.group_indexes}
+        for field in self.unique_indexes:
+            if values[field] is not None:
+                self._unique[field][values[field]] = key
+        for field in self.group_indexes:
+            self._groups[field].setdefault(values[field], {})[key] = None
+        self._indexed_values[key] = values
+
+    def _unindex(self, key):
+        values = self._indexed_values.pop(key, None)
+        if values is None:
+            return
+        for field in self.unique_indexes:
+            if self._unique[field].get(values[field]) == key:
+                del self._unique[field][values[field]]
+        for field in self.group_indexes:
+            group = self._groups[field].get(values[field], {})
+            group.pop(key, None)
+            if not group:
+                self._groups[field].pop(values[field], None)
+
+    def load(self):
+        """Loads the collection now if it has not been loaded yet."""
+        return self.records
+
+    def __len__(self):
+        return len(self.records)
+
+    def all(self):
+        return list(self.records.values())
+
+    def get(self, key, default=None):
+        return self.records.get(key, default)
+
+    def find(self, field, value):
+        """Returns the record whose unique indexed `field` equals `value`, or None."""
+        records = self.records
+        key = self._unique[field].get(value)
+        return records.get(key) if key is not None else None
+
+    def group(self, field, value):
+        """Returns every record whose grouped `field` equals `value`, in insertion order."""
+        records = self.records
+        with self._lock:
+            return [records[key] for key in self._groups[field].get(value, ())]
+
+    def next_id(self, start=1):
+        self.load()
+        return max(self._last_id, start - 1) + 1
+
+    def put(self, key, record):
+        self.put_many([(key, record)])
+
+    def put_many(self, items):
+        """Adds or replaces several (key, record) pairs in one backend write.
+
+        Raises ValueError, saving none of them, if any would clash on a unique index.
+        """
+        items = list(items)
+        with self._lock:
+            records = self.records
+            # Checked up front so a clash leaves nothing half saved
+            self._check_unique(items)
+            for key, record in items:
+                records[key] = record
+                self._track_id(key)
+                self._index(key, record)
+                self._notify(key, record)
+            self._backend.put_many(self.collection, items)
+
+    def save(self, record):
+        """Adds or persists an edited record."""
+        self.put(record[self.key_field], record)
+
+    def delete(self, key):
+        with self._lock:
+            self.records.pop(key, None)
+            self._unindex(key)
+            self._notify(key, None)
+            self._backend.delete(self.collection, key)
+
+
+class LogRepository(Repository):
+    """Append-only entries keyed by an increasing sequence number."""
+
+    def __init__(self, backend, lock):
+        super().__init__(backend, lock)
+        self._seqs = []
+
+    def _index(self, key, record):
+        super()._index(key, record)
+        if not self._seqs or key > self._seqs[-1]:
+            self._seqs.append(key)
+        else:
+            bisect.insort(self._seqs, key)
+
+    def _unindex(self, key):
+        super()._unindex(key)
+        position = bisect.bisect_left(self._seqs, key)
+        if position < len(self._seqs) and self._seqs[position] == key:
+            del self._seqs[position]
+
+    def append(self, entry):
+        with self._lock:
+            seq = self.next_id()
+            self.put(seq, entry)
+        return seq
+
+    def append_many(self, entries):
+        with self._lock:
+            first = self.next_id()
+            self.put_many(enumerate(entries, start=first))
+
+    def latest(self):
+        """Returns (sequence, entry) pairs, newest first."""
+        return list(reversed(self.records.items()))
+
+    def page(self, before=None, limit=20):
+        """Returns up to `limit` (sequence, entry) pairs older than sequence `before`, newest first,
+        and the cursor for the following page (None once the oldest entry is reached)."""
+        records = self.records
+        end = len(self._seqs) if before is None else bisect.bisect_left(self._seqs, before)
+        seqs = self._seqs[max(end - limit, 0):end][::-1]
+        return [(seq, records[seq]) for seq in seqs], (seqs[-1] if end > limit else None)
+
+
+class ListRepository(Repository):
+    """Lists of entries (workouts, meals, metrics, ...) keyed by their owner's ID."""
+
+    def entries(self, owner_id):
+        return self.records.get(owner_id, [])
+
+    def create(self, owner_id):
+        self.put(owner_id, [])
+
+    def create_many(self, owner_ids):
+        self.put_many((owner_id, []) for owner_id in owner_ids)
+
+    def append(self, owner_id, entry):
+        with self._lock:
+            self.records.setdefault(owner_id, []).append(entry)
+            self._backend.append(self.collection, owner_id, entry)
+
+
+class AdminRepository(Repository):
+    collection = 'admins'
+    unique_indexes = ('username',)
+    password_field = 'password'
+
+
+class TrainerRepository(Repository):
+    collection = 'trainers'
+    unique_indexes = ('username',)
+    password_field = 'password'
+
+
+class MemberRepository(Repository):
+    collection = 'members'
+    unique_indexes = ('username', 'Email')
+    group_indexes = ('Trainer ID', 'Plan', 'Status')
+    sort_fields = ('ID', 'Name', 'Join Date', 'Expiry Date')
+    password_field = 'Password'
+
+    def __init__(self, backend, lock):
+        super().__init__(backend, lock)
+        self._search_text = {}
+        self._sort_positions = {}
+
+    def _index(self, key, record):
+        super()._index(key, record)
+        self._search_text[key] = " ".join(str(record.get(field) or '') for field in ('Name', 'Email', 'Phone')).lower()
+        self._sort_positions = {}
+
+    def _unindex(self, key):
+        super()._unindex(key)
+        self._search_text.pop(key, None)
+        self._sort_positions = {}
+
+    def _sort_position(self, field):
+        """Returns {member ID: rank} for `field`, rebuilt only after members change."""
+        positions = self._sort_positions
+        if field not in positions:
+            records = self.records
+            ordered = sorted(records, key=lambda key: (records[key].get(field) is None, str(records[key].get(field)) if field != 'ID' else key))
+            positions[field] = {key: rank for rank, key in enumerate(ordered)}
+        return positions[field]
+
+    @instrumented
+    def query(self, search='', plans=(), statuses=(), trainer_ids=(), sort_by='ID', descending=False, offset=0, limit=25):
+        """Returns (number of matches, one page of matching members) for the member grid."""
+        records = self.records
+        search = search.strip().lower()
+        # Held so saves from other sessions can't resize the dicts scanned below
+        with self._lock:
+            candidates = None
+            for field, values in (('Plan', plans), ('Status', statuses), ('Trainer ID', trainer_ids)):
+                if values:
+                    keys = set().union(*(self._groups[field].get(value, ()) for value in values))
+                    candidates = keys if candidates is None else candidates & keys
+            if search:
+                candidates = {key for key in (records if candidates is None else candidates) if search in self._search_text.get(key, '')}
+            position = self._sort_position(sort_by)
+            keys = sorted(records if candidates is None else candidates, key=position.__getitem__, reverse=descending)
+            return len(keys), [records[key] for key in keys[offset:offset + limit]]
+
+    def email_exists(self, email):
+        return self.find('Email', email) is not None
+
+    def username_exists(self, username):
+        return self.find('username', username) is not None
+
+    def assigned_to(self, trainer_id):
+        return self.group('Trainer ID', trainer_id)
+
+
+def class_start(c):
+    return datetime.combine(pd.Timestamp(c['Date']).date(), datetime.strptime(c['Time'], '%H:%M').time())
+
+
+class ClassRepository(Repository):
+    """Classes with atomic booking: each class has its own lock guarding capacity and its waitlist.
+
+    Classes are also kept in (start, ID) order, overall and per trainer ID, so date-range
+    queries bisect into the schedule instead of walking past classes.
+    """
+    collection = 'classes'
+
+    def __init__(self, backend, lock, trainers):
+        super().__init__(backend, lock)
+        self._trainers = trainers
+        self._class_locks = {}
+        self._booked = {}
+        self._by_start = []
+        self._by_trainer = {}
+        self._schedule_entries = {}
+
+    def _migrate(self, record):
+        if 'Trainer ID' not in record:
+            # Older classes only named their trainer
+            record['Trainer ID'] = next((t['ID'] for t in self._trainers.all() if t['Name'] == record.get('Trainer')), None)
+        record.setdefault('Duration', 60)
+        record.setdefault('Waitlist', [])
+        return record
+
+    def _index(self, key, record):
+        super()._index(key, record)
+        self._booked[key] = set(record['Booked'])
+        entry, trainer_id = (class_start(record), key), record.get('Trainer ID')
+        bisect.insort(self._by_start, entry)
+        bisect.insort(self._by_trainer.setdefault(trainer_id, []), entry)
+        self._schedule_entries[key] = (entry, trainer_id)
+
+    def _unindex(self, key):
+        super()._unindex(key)
+        self._booked.pop(key, None)
+        if key in self._schedule_entries:
+            entry, trainer_id = self._schedule_entries.pop(key)
+            for entries in (self._by_start, self._by_trainer[trainer_id]):
+                del entries[bisect.bisect_left(entries, entry)]
+
+    def _class_lock(self, class_id):
+        return self._class_locks.setdefault(class_id, threading.Lock())
+
+    def between(self, start, end, trainer_id=None):
+        """Returns classes starting in [start, end), optionally only those of one trainer."""
+        records = self.records
+        entries = self._by_start if trainer_id is None else self._by_trainer.get(trainer_id, [])
+        first, last = bisect.bisect_left(entries, (start,)), bisect.bisect_left(entries, (end,))
+        return [records[key] for _, key in entries[first:last]]
+
+    def is_booked(self, class_id, member_id):
+        self.load()
+        return member_id in self._booked.get(class_id, ())
+
+    def book(self, class_id, member_id, join_waitlist=False):
+        """Reserves a spot; returns 'booked', 'waitlisted', 'full' or 'already booked'."""
+        with self._class_lock(class_id):
+            c = self.records[class_id]
+            if self.is_booked(class_id, member_id):
+                return 'already booked'
+            if len(c['Booked']) < c['Capacity']:
+                c['Booked'].append(member_id)
+                self.save(c)
+                return 'booked'
+            if not join_waitlist:
+                return 'full'
+            waitlist = c.setdefault('Waitlist', [])
+            if member_id not in waitlist:
+                waitlist.append(member_id)
+                self.save(c)
+            return 'waitlisted'
+
+    def cancel(self, class_id, member_id):
+        """Cancels a booking or waitlist spot, promoting the first waitlisted member into a freed spot."""
+        with self._class_lock(class_id):
+            c = self.records[class_id]
+            waitlist = c.get('Waitlist', [])
+            if member_id in waitlist:
+                waitlist.remove(member_id)
+            elif self.is_booked(class_id, member_id):
+                c['Booked'].remove(member_id)
+                if waitlist and len(c['Booked']) < c['Capacity']:
+                    c['Booked'].append(waitlist.pop(0))
+            else:
+                return False
+            self.save(c)
+            return True
+
+
+class ClassTemplateRepository(Repository):
+    collection = 'class_templates'
+
+
+# Longest class the conflict check needs to look back for
+MAX_CLASS_MINUTES = 240
+
+
+class ClassSchedule:
+    """Date-range queries over classes, expanding weekly class templates as queries reach them."""
+
+    def __init__(self, classes, templates, lock):
+        self._classes = classes
+        self._templates = templates
+        self._lock = lock
+
+    def add_template(self, template):
+        """Saves a weekly template; its classes are created when a query first covers their dates."""
+        template['ID'] = self._templates.next_id()
+        template['Expanded Until'] = template['Start Date'] - timedelta(days=1)
+        self._templates.save(template)
+
+    def _expand(self, until):
+        for template in self._templates.all():
+            last_day = min(until, template['End Date']) if template.get('End Date') else until
+            if template['Expanded Until'] >= last_day:
+                continue
+            with self._lock:
+                day = template['Expanded Until'] + timedelta(days=1)
+                while day <= last_day:
+                    if day.weekday() == template['Weekday']:
+                        self._classes.save({
+                            'ID': self._classes.next_id(start=1001), 'Name': template['Name'], 'Trainer': template['Trainer'],
+                            'Trainer ID': template['Trainer ID'], 'Date': day, 'Time': template['Time'], 'Duration': template['Duration'],
+                            'Capacity': template['Capacity'], 'Booked': [], 'Waitlist': [], 'Template ID': template['ID'],
+                        })
+                    day += timedelta(days=1)
+                template['Expanded Until'] = last_day
+                self._templates.save(template)
+
+    def between(self, start, end, trainer_id=None):
+        self._expand(end.date())
+        return self._classes.between(start, end, trainer_id)
+
+    def upcoming(self, days=7, trainer_id=None):
+        """Classes from now until `days` days ahead."""
+        now = datetime.now()
+        return self.between(now, datetime.combine(date.today() + timedelta(days=days), datetime.min.time()), trainer_id)
+
+    def conflicts(self, trainer_id, start, minutes):
+        """Returns the trainer's classes that overlap a `minutes`-long slot starting at `start`."""
+        end = start + timedelta(minutes=minutes)
+        nearby = self.between(start - timedelta(minutes=MAX_CLASS_MINUTES), end, trainer_id)
+        return [c for c in nearby if class_start(c) + timedelta(minutes=c.get('Duration', 60)) > start]
+
+    def template_conflicts(self, template):
+        """Returns the trainer's classes and weekly templates that overlap any class the template would create.
+
+        Existing classes are checked against the template's occurrence on their day or either
+        side of it. Templates not yet expanded that far are compared by weekday and time.
+        """
+        time_of_day = datetime.strptime(template['Time'], '%H:%M').time()
+        first = datetime.combine(template['Start Date'], time_of_day)
+        slot = timedelta(minutes=template['Duration'])
+        last = datetime.combine(template['End Date'], time_of_day) if template.get('End Date') else datetime.max - slot
+        clashes = []
+        with self._lock:
+            for c in self._classes.between(first - timedelta(minutes=MAX_CLASS_MINUTES), last + slot, template['Trainer ID']):
+                c_start = class_start(c)
+                c_end = c_start + timedelta(minutes=c.get('Duration', 60))
+                for offset in (-1, 0, 1):
+                    day = c_start.date() + timedelta(days=offset)
+                    occurrence = datetime.combine(day, time_of_day)
+                    if day.weekday() == template['Weekday'] and first <= occurrence <= last and occurrence < c_end and c_start < occurrence + slot:
+                        clashes.append(c)
+                        break
+            week = 7 * 24 * 60
+            week_minute = lambda t: t['Weekday'] * 24 * 60 + int(t['Time'][:2]) * 60 + int(t['Time'][3:])
+            for other in self._templates.all():
+                if other['Trainer ID'] != template['Trainer ID'] or other['ID'] == template.get('ID'):
+                    continue
+                if (other.get('End Date') and other['End Date'] < template['Start Date']) or (template.get('End Date') and template['End Date'] < other['Start Date']):
+                    continue
+                # Minutes from one start to the other, wrapping around the week
+                if (week_minute(other) - week_minute(template)) % week < template['Duration'] or (week_minute(template) - week_minute(other)) % week < other['Duration']:
+                    clashes.append(other)
+        return clashes
+
+
+class PlanRepository(Repository):
+    collection = 'plans'
+
+    def names(self):
+        return list(self.records.keys())
+
+
+class PaymentRepository(LogRepository):
+    collection = 'payments'
+
+
+def search_tokens(text):
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+class WorkoutLibraryRepository(LogRepository):
+    """Exercise library with an inverted index over name, muscle group, difficulty and equipment tokens."""
+    collection = 'workout_library'
+    group_indexes = ('Muscle Group', 'Difficulty')
+    token_fields = ('Name', 'Muscle Group', 'Difficulty', 'Equipment')
+
+    def __init__(self, backend, lock):
+        super().__init__(backend, lock)
+        self._postings = {}
+        self._record_tokens = {}
+        self._vocabulary = None
+
+    def _index(self, key, record):
+        super()._index(key, record)
+        tokens = set(search_tokens(" ".join(str(record.get(field) or '') for field in self.token_fields)))
+        for token in tokens:
+            self._postings.setdefault(token, set()).add(key)
+        self._record_tokens[key] = tokens
+        self._vocabulary = None
+
+    def _unindex(self, key):
+        super()._unindex(key)
+        for token in self._record_tokens.pop(key, ()):
+            self._postings[token].discard(key)
+            if not self._postings[token]:
+                del self._postings[token]
+        self._vocabulary = None
+
+    def _matching_tokens(self, term):
+        """Index tokens starting with `term`, or failing that the closest spellings of it."""
+        vocabulary = self._vocabulary
+        if vocabulary is None:
+            vocabulary = self._vocabulary = sorted(self._postings)
+        start = bisect.bisect_left(vocabulary, term)
+        end = bisect.bisect_left(vocabulary, term + '\uffff')
+        return vocabulary[start:end] or difflib.get_close_matches(term, vocabulary, n=3, cutoff=0.75)
+
+    def muscle_groups(self):
+        self.load()
+        with self._lock:
+            return sorted(group for group in self._groups['Muscle Group'] if group)
+
+    @instrumented
+    def search(self, query='', muscle_group=None, difficulty=None):
+        """Returns matching exercises grouped by muscle group; every query word must match."""
+        records = self.records
+        with self._lock:
+            keys = None
+            for field, value in (('Muscle Group', muscle_group), ('Difficulty', difficulty)):
+                if value:
+                    matches = set(self._groups[field].get(value, ()))
+                    keys = matches if keys is None else keys & matches
+            for term in search_tokens(query):
+                matches = set().union(*(self._postings[token] for token in self._matching_tokens(term)))
+                keys = matches if keys is None else keys & matches
+            keys = records.keys() if keys is None else keys
+            return [records[key] | {'seq': key} for key in sorted(keys, key=lambda key: (records[key]['Muscle Group'], key))]
+
+
+def estimated_1rm(weight, reps):
+    """Epley estimate of the one-rep max for a set of `reps` at `weight`."""
+    return weight * (1 + reps / 30) if reps > 1 else weight
+
+
+class ExerciseRollup:
+    """Running progress figures for one member's exercise, fed sets in date order."""
+
+    def __init__(self):
+        self.max_weight = 0
+        self.best_1rm = 0
+        self.daily_best = {}
+        self.weekly_volume = {}
+        self.personal_records = []
+        self.sets_logged = 0
+
+    def add(self, day, weight, sets, reps):
+        self.sets_logged += 1
+        one_rep_max = estimated_1rm(weight, reps)
+        best_weight, best_1rm = self.daily_best.get(day, (0, 0))
+        self.daily_best[day] = (max(best_weight, weight), max(best_1rm, one_rep_max))
+        week = day - timedelta(days=day.weekday())
+        self.weekly_volume[week] = self.weekly_volume.get(week, 0) + weight * sets * reps
+        if weight > self.max_weight:
+            self.max_weight = weight
+            self.personal_records.append((day, weight))
+        self.best_1rm = max(self.best_1rm, one_rep_max)
+
+    @instrumented
+    def frame(self):
+        """Per-day best weight and estimated 1RM, oldest first."""
+        return pd.DataFrame(
+            [(day, weight, one_rep_max) for day, (weight, one_rep_max) in self.daily_best.items()],
+            columns=['Date', 'Weight', 'Est. 1RM'],
+        )
+
+
+class WorkoutSeries:
+    """One member's logged sets as date-sorted columns, with a rollup per exercise.
+
+    Exercises are stored as integer IDs interned by the owning repository.
+    """
+
+    def __init__(self, exercise_names, exercise_ids):
+        self._exercise_names = exercise_names
+        self._exercise_ids = exercise_ids
+        self.days = array('l')
+        self.exercise_ids = array('l')
+        self.weights = array('d')
+        self.sets = array('l')
+        self.reps = array('l')
+        self.rollups = {}
+
+    def __len__(self):
+        return len(self.days)
+
+    def add(self, day, exercise_id, weight, sets, reps):
+        ordinal = day.toordinal()
+        position = bisect.bisect_right(self.days, ordinal)
+        for column, value in zip(self._columns(), (ordinal, exercise_id, weight, sets, reps)):
+            column.insert(position, value)
+        if position == len(self.days) - 1:
+            self.rollups.setdefault(exercise_id, ExerciseRollup()).add(day, weight, sets, reps)
+        else:
+            self._rebuild_rollup(exercise_id)
+
+    def _columns(self):
+        return (self.days, self.exercise_ids, self.weights, self.sets, self.reps)
+
+    def _rebuild_rollup(self, exercise_id):
+        # A back-dated set can change later PRs, so that exercise is replayed in date order
+        rollup = self.rollups[exercise_id] = ExerciseRollup()
+        for ordinal, row_exercise, weight, sets, reps in zip(*self._columns()):
+            if row_exercise == exercise_id:
+                rollup.add(date.fromordinal(ordinal), weight, sets, reps)
+
+    def rollup(self, exercise):
+        return self.rollups.get(self._exercise_ids.get(exercise))
+
+    def exercises(self):
+        return sorted(self._exercise_names[exercise_id] for exercise_id in self.rollups)
+
+    def rows(self, offset=0, limit=None):
+        """Logged sets newest first, as dicts, for the `offset`..`offset + limit` slice."""
+        end = len(self.days) - offset
+        start = 0 if limit is None else max(end - limit, 0)
+        return [
+            {'Date': date.fromordinal(self.days[i]), 'Exercise': self._exercise_names[self.exercise_ids[i]],
+             'Weight': self.weights[i], 'Sets': self.sets[i], 'Reps': self.reps[i]}
+            for i in range(end - 1, start - 1, -1)
+        ]
+
+
+class WorkoutLogRepository(ListRepository):
+    """Member workout logs, held in memory only as a WorkoutSeries per member.
+
+    The backend still stores each log as a list of entry dicts; they are turned into
+    columns as they are loaded or saved.
+    """
+    collection = 'member_workouts'
+
+    def __init__(self, backend, lock):
+        super().__init__(backend, lock)
+        self._exercise_names = []
+        self._exercise_ids = {}
+
+    def _exercise_id(self, name):
+        exercise_id = self._exercise_ids.get(name)
+        if exercise_id is None:
+            exercise_id = self._exercise_ids[name] = len(self._exercise_names)
+            self._exercise_names.append(name)
+        return exercise_id
+
+    def _add_to_series(self, series, entry):
+        series.add(entry['Date'], self._exercise_id(entry['Exercise']), entry['Weight'], entry['Sets'], entry['Reps'])
+
+    def _migrate(self, record):
+        if isinstance(record, WorkoutSeries):
+            return record
+        series = WorkoutSeries(self._exercise_names, self._exercise_ids)
+        for entry in sorted(record, key=lambda entry: entry['Date']):
+            self._add_to_series(series, entry)
+        return series
+
+    def put_many(self, items):
+        """Saves lists of entries, keeping only their WorkoutSeries in memory."""
+        items = list(items)
+        with self._lock:
+            super().put_many(items)
+            records = self.records
+            for key, entries in items:
+                records[key] = self._migrate(entries)
+
+    def entries(self, owner_id):
+        """The member's logged sets as dicts, oldest first."""
+        return self.series(owner_id).rows()[::-1]
+
+    def series(self, owner_id):
+        series = self.records.get(owner_id)
+        return series if series is not None else WorkoutSeries(self._exercise_names, self._exercise_ids)
+
+    def append(self, owner_id, entry):
+        with self._lock:
+            series = self.records.get(owner_id)
+            if series is None:
+                series = self.records[owner_id] = WorkoutSeries(self._exercise_names, self._exercise_ids)
+            self._add_to_series(series, entry)
+            self._backend.append(self.collection, owner_id, entry)
+
+
+class MemberPlanRepository(ListRepository):
+    collection = 'member_plans'
+
+
+MACROS = ('Protein', 'Carbs', 'Fat')
+MACRO_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*g?\s*(?:of\s+)?(protein|carb|fat)|(protein|carb|fat)\w*\s*[:=-]?\s*(\d+(?:\.\d+)?)", re.IGNORECASE)
+
+
+def parse_macros(text):
+    """Grams of protein, carbs and fat in text like "50g protein, 30g carbs" or "fat: 10"; 0 where not given."""
+    grams = dict.fromkeys(MACROS, 0)
+    names = {'protein': 'Protein', 'carb': 'Carbs', 'fat': 'Fat'}
+    for amount, name, name_first, amount_after in MACRO_PATTERN.findall(text or ''):
+        grams[names[(name or name_first).lower()]] += float(amount or amount_after)
+    return grams
+
+
+class NutritionRepository(ListRepository):
+    """Meal logs with per-member, per-day calorie and macro totals kept up to date as meals are logged."""
+    collection = 'nutrition'
+
+    def __init__(self, backend, lock):
+        super().__init__(backend, lock)
+        self._daily = {}
+        self._days = {}
+        self._positions = {}
+
+    def _migrate(self, record):
+        for meal in record:
+            if 'Protein' not in meal:
+                meal.update(parse_macros(meal.get('Macronutrients')))
+        return record
+
+    def _index(self, key, record):
+        super()._index(key, record)
+        self._daily[key], self._days[key], self._positions[key] = {}, [], {}
+        for position, meal in enumerate(record):
+            self._add_to_totals(key, position, meal)
+
+    def _unindex(self, key):
+        super()._unindex(key)
+        self._daily.pop(key, None)
+        self._days.pop(key, None)
+        self._positions.pop(key, None)
+
+    def _add_to_totals(self, owner_id, position, meal):
+        daily = self._daily.setdefault(owner_id, {})
+        day = meal['Date']
+        totals = daily.get(day)
+        if totals is None:
+            totals = daily[day] = {'Date': day, 'Meals': 0, 'Calories': 0, **dict.fromkeys(MACROS, 0)}
+            bisect.insort(self._days.setdefault(owner_id, []), day)
+        self._positions.setdefault(owner_id, {}).setdefault(day, []).append(position)
+        totals['Meals'] += 1
+        for field in ('Calories',) + MACROS:
+            totals[field] += meal.get(field) or 0
+
+    def append(self, owner_id, entry):
+        with self._lock:
+            super().append(owner_id, entry)
+            self._add_to_totals(owner_id, len(self.records[owner_id]) - 1, entry)
+
+    def day_totals(self, owner_id, day):
+        """Totals for one day, or None if nothing was logged."""
+        self.load()
+        return self._daily.get(owner_id, {}).get(day)
+
+    def daily_totals(self, owner_id, start, end):
+        """Per-day totals from `start` to `end` inclusive, oldest first, for days with meals."""
+        self.load()
+        days = self._days.get(owner_id, [])
+        daily = self._daily.get(owner_id, {})
+        return [daily[day] for day in days[bisect.bisect_left(days, start):bisect.bisect_right(days, end)]]
+
+    def meals_between(self, owner_id, start, end):
+        """Meals logged from `start` to `end` inclusive, oldest day first."""
+        entries = self.entries(owner_id)
+        positions = self._positions.get(owner_id, {})
+        return [entries[position] for totals in self.daily_totals(owner_id, start, end) for position in positions[totals['Date']]]
+
+
+class FoodRepository(Repository):
+    """Food lookup by name, with word-prefix autocomplete over a sorted index and an LRU cache of completions."""
+    collection = 'foods'
+    key_field = 'Name'
+
+    def __init__(self, backend, lock):
+        super().__init__(backend, lock)
+        self._prefixes = []
+        self.complete = functools.lru_cache(maxsize=1024)(self._complete)
+
+    def _index(self, key, record):
+        super()._index(key, record)
+        words = key.lower().split()
+        # Every word start is indexed so "sambar" finds "Idli and Sambar"
+        for i in range(len(words)):
+            bisect.insort(self._prefixes, (" ".join(words[i:]), key))
+        self.complete.cache_clear()
+
+    def _unindex(self, key):
+        super()._unindex(key)
+        self._prefixes = [(text, name) for text, name in self._prefixes if name != key]
+        self.complete.cache_clear()
+
+    def _complete(self, prefix, limit=10):
+        """Names of foods with a word starting with `prefix`, whole-name matches first."""
+        self.load()
+        prefix = " ".join(prefix.lower().split())
+        if not prefix:
+            return ()
+        names = {}
+        prefixes = self._prefixes
+        with self._lock:
+            for i in range(bisect.bisect_left(prefixes, (prefix,)), len(prefixes)):
+                text, name = prefixes[i]
+                if not text.startswith(prefix) or len(names) >= limit:
+                    break
+                names[name] = name.lower().startswith(prefix)
+        return tuple(sorted(names, key=lambda name: (not names[name], name)))
+
+
+class BodyMetricsRepository(ListRepository):
+    collection = 'body_metrics'
+
+
+class ProgressPhotoRepository(ListRepository):
+    collection = 'progress_photos'
+
+
+class BadgeRepository(ListRepository):
+    collection = 'badges'
+
+
+# Pending trainer requests older than this are dropped
+TRAINER_REQUEST_TTL = timedelta(days=30)
+
+
+class TrainerRequestRepository(Repository):
+    """Pending requests per trainer, as {member ID: request time} dicts kept in request order.
+
+    A member -> trainers index answers "who has this member asked?" without a scan. Requests
+    expire after TRAINER_REQUEST_TTL, oldest first, whenever a trainer's queue is read.
+    """
+    collection = 'trainer_requests'
+
+    def __init__(self, backend, lock):
+        super().__init__(backend, lock)
+        self._queues = {}
+        self._by_member = {}
+
+    def _migrate(self, record):
+        if isinstance(record, list):
+            # Older data stored a plain list of member IDs
+            now = datetime.now()
+            return {member_id: now for member_id in record}
+        return record
+
+    def _index(self, key, record):
+        super()._index(key, record)
+        self._queues[key] = record
+        for member_id in record:
+            self._by_member.setdefault(member_id, set()).add(key)
+
+    def _unindex(self, key):
+        super()._unindex(key)
+        for member_id in self._queues.pop(key, ()):
+            self._unlink(key, member_id)
+
+    def _unlink(self, trainer_id, member_id):
+        trainers = self._by_member.get(member_id)
+        if trainers is not None:
+            trainers.discard(trainer_id)
+            if not trainers:
+                del self._by_member[member_id]
+
+    def create(self, trainer_id):
+        self.put(trainer_id, {})
+
+    def _expire(self, trainer_id):
+        queue = self.records.get(trainer_id, {})
+        cutoff = datetime.now() - TRAINER_REQUEST_TTL
+        if queue and next(iter(queue.values())) < cutoff:
+            with self._lock:
+                expired = list(itertools.takewhile(lambda member_id: queue[member_id] < cutoff, queue))
+                self._drop(trainer_id, expired)
+        return queue
+
+    def _drop(self, trainer_id, member_ids):
+        queue = self.records.get(trainer_id, {})
+        dropped = [member_id for member_id in member_ids if queue.pop(member_id, None) is not None]
+        for member_id in dropped:
+            self._unlink(trainer_id, member_id)
+        if dropped:
+            self._backend.put(self.collection, trainer_id, queue)
+        return dropped
+
+    def count(self, trainer_id):
+        return len(self._expire(trainer_id))
+
+    def page(self, trainer_id, offset=0, limit=10):
+        """(member ID, request time) pairs from a trainer's queue, oldest request first."""
+        queue = self._expire(trainer_id)
+        with self._lock:
+            return list(itertools.islice(queue.items(), offset, offset + limit))
+
+    def requested_by(self, member_id):
+        """IDs of the trainers a member has a pending, unexpired request with."""
+        records = self.records
+        cutoff = datetime.now() - TRAINER_REQUEST_TTL
+        with self._lock:
+            return {trainer_id for trainer_id in self._by_member.get(member_id, ()) if records[trainer_id][member_id] >= cutoff}
+
+    def request(self, trainer_id, member_id):
+        with self._lock:
+            if trainer_id not in self.records:
+                self.create(trainer_id)
+            queue = self.records[trainer_id]
+            queue.pop(member_id, None)
+            queue[member_id] = datetime.now()
+            self._by_member.setdefault(member_id, set()).add(trainer_id)
+            self._backend.put(self.collection, trainer_id, queue)
+
+    def remove(self, trainer_id, member_ids):
+        """Drops several requests from a trainer's queue in one write; returns the member IDs that were pending."""
+        with self._lock:
+            return self._drop(trainer_id, member_ids)
+
+    def withdraw(self, member_id):
+        """Drops every pending request a member has made."""
+        with self._lock:
+            for trainer_id in list(self._by_member.get(member_id, ())):
+                self._drop(trainer_id, [member_id])
+
+
+class EquipmentRepository(Repository):
+    collection = 'equipment'
+
+
+class AnnouncementRepository(LogRepository):
+    collection = 'announcements'
+
+
+class CommunityPostRepository(LogRepository):
+    collection = 'community_posts'
+
+
+# Seconds between live challenge scores and their snapshot to the backend
+CHALLENGE_SNAPSHOT_SECONDS = 10
+
+
+class Leaderboard:
+    """One challenge's scores, ranked highest first in a sorted list of (-score, member ID)."""
+
+    def __init__(self, scores):
+        self.scores = scores
+        self._ranking = sorted((-score, member_id) for member_id, score in scores.items())
+
+    def __len__(self):
+        return len(self._ranking)
+
+    def set_score(self, member_id, score):
+        old = self.scores.get(member_id)
+        if old is not None:
+            del self._ranking[bisect.bisect_left(self._ranking, (-old, member_id))]
+        self.scores[member_id] = score
+        bisect.insort(self._ranking, (-score, member_id))
+
+    def top(self, k):
+        """The `k` best (member ID, score) pairs."""
+        return [(member_id, -score) for score, member_id in self._ranking[:k]]
+
+    def rank(self, member_id):
+        """1-based rank of a member, shared with anyone on the same score, or None if they have no score."""
+        score = self.scores.get(member_id)
+        if score is None:
+            return None
+        return bisect.bisect_left(self._ranking, (-score,)) + 1
+
+
+class ChallengeRepository(Repository):
+    """Challenges keyed by name, each scoring one explicit 'Metric', with a live Leaderboard per challenge.
+
+    Submitted scores update the leaderboards at once and are written to the backend as a
+    snapshot of the changed challenges at most every CHALLENGE_SNAPSHOT_SECONDS.
+    """
+    collection = 'challenges'
+
+    def __init__(self, backend, lock):
+        super().__init__(backend, lock)
+        self._boards = {}
+        self._dirty = set()
+        self._snapshot_timer = None
+
+    def _migrate(self, record):
+        if 'participants' in record:
+            # Older challenges kept a participant list with the score in its third column
+            participants = record.pop('participants')
+            record['Metric'] = list(participants[0])[2] if participants else 'score'
+            record['Scores'] = {p['ID']: p[record['Metric']] for p in participants}
+        return record
+
+    def _index(self, key, record):
+        super()._index(key, record)
+        self._boards[key] = Leaderboard(record['Scores'])
+
+    def _unindex(self, key):
+        super()._unindex(key)
+        self._boards.pop(key, None)
+
+    def leaderboard(self, name):
+        self.load()
+        return self._boards[name]
+
+    def submit(self, name, member_id, amount):
+        """Adds `amount` to a member's score and returns their new total."""
+        with self._lock:
+            board = self.leaderboard(name)
+            score = board.scores.get(member_id, 0) + amount
+            board.set_score(member_id, score)
+            self._dirty.add(name)
+            if self._snapshot_timer is None:
+                self._snapshot_timer = threading.Timer(CHALLENGE_SNAPSHOT_SECONDS, self.snapshot)
+                self._snapshot_timer.daemon = True
+                self._snapshot_timer.start()
+        return score
+
+    def snapshot(self):
+        """Writes every challenge with unsaved scores to the backend."""
+        with self._lock:
+            dirty, self._dirty, self._snapshot_timer = self._dirty, set(), None
+            self._backend.put_many(self.collection, [(name, self.records[name]) for name in dirty if name in self.records])
+
+
+class MemberAuditRepository(LogRepository):
+    collection = 'member_audit'
+
+
+MEMBER_STATUSES = ['Active', 'Expired']
+# Columns shown in the admin member grid; passwords and photo bytes never leave the server
+MEMBER_GRID_COLUMNS = ['ID', 'Name', 'username', 'Email', 'Phone', 'DOB', 'Address', 'Photo URL', 'Plan', 'Status', 'Join Date', 'Expiry Date', 'Trainer ID']
+MEMBER_EDITABLE_FIELDS = ('Name', 'username', 'Email', 'Phone', 'DOB', 'Address', 'Plan', 'Status', 'Expiry Date', 'Trainer ID')
+
+
+# Imported member fields read as text rather than as pandas' guessed type
+MEMBER_IMPORT_TEXT_FIELDS = ('Email', 'username', 'Phone', 'Address')
+
+
+def default_username(name):
+    """First name plus the first letter of the last name, e.g. priyak for Priya Kumar."""
+    words = name.lower().split()
+    return words[0] + words[-1][0]
+
+
+class DashboardMetrics:
+    """Running dashboard totals, updated incrementally as members and payments are saved."""
+
+    def __init__(self, members, payments):
+        self._members = members
+        self._payments = payments
+        self.total_members = 0
+        self.active_members = 0
+        self.total_revenue = 0
+        self.signups_by_month = Counter()
+        self.signups_version = 0
+        self._member_state = {}
+        self._payment_amounts = {}
+        members.subscribe(self._on_member_saved)
+        payments.subscribe(self._on_payment_saved)
+
+    def _on_member_saved(self, key, member):
+        old = self._member_state.pop(key, None)
+        new = None
+        if member is not None:
+            join_date = member.get('Join Date')
+            join_month = f"{join_date.year}-{join_date.month:02d}" if pd.notna(join_date) else None
+            new = (member.get('Status') == 'Active', join_month)
+            self._member_state[key] = new
+        for state, step in ((old, -1), (new, 1)):
+            if state is not None:
+                is_active, join_month = state
+                self.total_members += step
+                self.active_members += step * is_active
+                if join_month:
+                    self.signups_by_month[join_month] += step
+                    if not self.signups_by_month[join_month]:
+                        del self.signups_by_month[join_month]
+        if (old and old[1]) != (new and new[1]):
+            self.signups_version += 1
+
+    def _on_payment_saved(self, key, payment):
+        self.total_revenue -= self._payment_amounts.pop(key, 0)
+        if payment is not None:
+            self._payment_amounts[key] = payment['Amount']
+            self.total_revenue += payment['Amount']
+
+    def load(self):
+        """Makes sure the underlying collections have been loaded (and so counted)."""
+        self._members.load()
+        self._payments.load()
+        return self
+
+
+# Days before a membership expires that its renewal reminder is sent
+MEMBERSHIP_REMINDER_DAYS = 7
+# Members handled per batch; the store lock is released between batches
+MEMBERSHIP_BATCH_SIZE = 500
+
+# (title, text) of the notification sent for each membership event, given the Expiry Date after it
+MEMBERSHIP_NOTICES = {
+    'Reminded': lambda expiry: ("Membership expiring soon", f"Your membership expires on {expiry:%d %B %Y}. Turn on auto-renew from your profile to keep it going."),
+    # Sent instead of 'Reminded' to members whose membership will auto-renew
+    'Renewing': lambda expiry: ("Membership renewing soon", f"Your membership expires on {expiry:%d %B %Y} and will renew automatically."),
+    'Renewed': lambda expiry: ("Membership renewed", f"Your membership has been renewed until {expiry:%d %B %Y}."),
+    'Expired': lambda expiry: ("Membership expired", f"Your membership expired on {expiry:%d %B %Y}. Visit the front desk to renew."),
+}
+
+
+class MembershipEventRepository(LogRepository):
+    collection = 'membership_events'
+
+
+class MembershipScheduler:
+    """Reminds, then renews (with 'Auto Renew') or expires members from a heap of due jobs, on a worker thread."""
+
+    def __init__(self, store):
+        self._store = store
+        self._heap = []
+        # member ID -> (due date, job) of the member's live heap entry
+        self._jobs = {}
+        self._heap_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self.expiring_soon = set()
+        self.last_error = None
+        store.members.subscribe(self._on_member_saved)
+
+    @staticmethod
+    def next_job(member):
+        """(due date, job) for a member, or None if they are not active or have no expiry date."""
+        expiry = member.get('Expiry Date')
+        if member.get('Status') != 'Active' or expiry is None or pd.isna(expiry):
+            return None
+        expiry = expiry.date() if isinstance(expiry, datetime) else expiry
+        if member.get('Reminded For') != expiry:
+            return expiry - timedelta(days=MEMBERSHIP_REMINDER_DAYS), 'Remind'
+        return expiry + timedelta(days=1), 'Expire'
+
+    def _on_member_saved(self, key, member):
+        job = self.next_job(member) if member is not None else None
+        with self._heap_lock:
+            if job == self._jobs.get(key):
+                return
+            if job is None:
+                self._jobs.pop(key, None)
+            else:
+                self._jobs[key] = job
+                heapq.heappush(self._heap, (job[0], key, job[1]))
+            if job is not None and job[1] == 'Expire':
+                self.expiring_soon.add(key)
+            else:
+                self.expiring_soon.discard(key)
+        if job is not None and job[0] <= date.today():
+            self._wake.set()
+
+    def start(self):
+        """Starts the worker thread, which loads the members and keeps handling jobs as they fall due."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='membership-scheduler', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.clear()
+            try:
+                self.run_due()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+            # Jobs fall due by the day, so nothing new is due before midnight unless a member changes
+            tomorrow = datetime.combine(date.today() + timedelta(days=1), datetime.min.time())
+            self._wake.wait((tomorrow - datetime.now()).total_seconds())
+
+    def run_due(self, today=None):
+        """Handles every job due by `today` in batches; returns the number handled."""
+        today = today or date.today()
+        self._store.members.load()
+        handled = 0
+        while True:
+            batch = []
+            with self._heap_lock:
+                while self._heap and self._heap[0][0] <= today and len(batch) < MEMBERSHIP_BATCH_SIZE:
+                    due, key, job = heapq.heappop(self._heap)
+                    if self._jobs.get(key) == (due, job):
+                        batch.append((key, (due, job)))
+            if not batch:
+                return handled
+            handled += self._run_batch(batch, today)
+
+    def _run_batch(self, batch, today):
+        store = self._store
+        members, payments, events, notices = [], [], [], []
+        with store.lock:
+            for member_id, job in batch:
+                member = store.members.get(member_id)
+                # A member edited since the job was popped has had their new job queued
+                if member is None or self.next_job(member) != job:
+                    continue
+                expiry = job[0] - timedelta(days=1) if job[1] == 'Expire' else job[0] + timedelta(days=MEMBERSHIP_REMINDER_DAYS)
+                plan = store.plans.get(member.get('Plan'))
+                member['Reminded For'] = expiry
+                if job[1] == 'Remind' and expiry >= today:
+                    event = 'Reminded'
+                elif member.get('Auto Renew') and plan is not None:
+                    # Renewals run on from the old expiry, or from today if they are long overdue
+                    member['Expiry Date'] = max(expiry, today - timedelta(days=1)) + timedelta(days=plan['duration'])
+                    payments.append({'Member ID': member_id, 'Amount': plan['price'], 'Date': today, 'Plan': member['Plan']})
+                    event = 'Renewed'
+                else:
+                    member['Status'] = 'Expired'
+                    event = 'Expired'
+                members.append((member_id, member))
+                events.append({'Member ID': member_id, 'Event': event, 'Date': today, 'Expiry Date': member['Expiry Date']})
+                notices.append('Renewing' if event == 'Reminded' and member.get('Auto Renew') and plan is not None else event)
+            store.members.put_many(members)
+            if payments:
+                store.payments.append_many(payments)
+            if events:
+                store.membership_events.append_many(events)
+        recipients = {}
+        for event, notice in zip(events, notices):
+            recipients.setdefault((notice, event['Expiry Date']), []).append(event['Member ID'])
+        for (notice, expiry), member_ids in recipients.items():
+            store.notify(member_ids, *MEMBERSHIP_NOTICES[notice](expiry))
+        return len(events)
+
+
+# Notifications kept in each member's inbox, newest first
+INBOX_LIMIT = 50
+# Recipients per inbox write and per sender call
+NOTIFY_BATCH_SIZE = 500
+# Undelivered recipients past which posting waits for the worker to catch up
+NOTIFY_PENDING_LIMIT = 200_000
+
+
+class NotificationRepository(LogRepository):
+    collection = 'notifications'
+
+
+class InboxRepository(Repository):
+    """Per-member inboxes of notification sequence numbers, newest first, with an unread count."""
+    collection = 'inboxes'
+
+    def inbox(self, member_id):
+        return self.records.get(member_id, {'Unread': 0, 'Items': []})
+
+    def deliver(self, member_ids, seq):
+        with self._lock:
+            items = []
+            for member_id in member_ids:
+                inbox = self.inbox(member_id)
+                items.append((member_id, {'Unread': min(inbox['Unread'] + 1, INBOX_LIMIT), 'Items': [seq] + inbox['Items'][:INBOX_LIMIT - 1]}))
+            self.put_many(items)
+
+    def mark_read(self, member_id):
+        with self._lock:
+            inbox = self.inbox(member_id)
+            if inbox['Unread']:
+                self.put(member_id, {'Unread': 0, 'Items': inbox['Items']})
+
+
+class FileSender:
+    """Appends one JSON line per recipient to a local file, standing in for email."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def _write(self, notification, recipients):
+        with open(self.path, 'a') as f:
+            f.writelines(json.dumps({'to': r.get('Email'), 'name': r.get('Name'), **notification}, default=str) + "\n" for r in recipients)
+
+    async def send(self, notification, recipients):
+        await asyncio.to_thread(self._write, notification, recipients)
+
+
+class SMTPSender:
+    """Sends each batch as one email to all its recipients, e.g. through `python -m aiosmtpd -n` locally."""
+
+    def __init__(self, host, port=25, from_address='hub@bengalurufitness.example'):
+        self.host = host
+        self.port = port
+        self.from_address = from_address
+
+    def _send(self, notification, recipients):
+        addresses = [r['Email'] for r in recipients if r.get('Email')]
+        if not addresses:
+            return
+        message = EmailMessage()
+        message['Subject'] = notification['Title']
+        message['From'] = message['To'] = self.from_address
+        message.set_content(notification['Text'])
+        with smtplib.SMTP(self.host, self.port) as smtp:
+            smtp.send_message(message, to_addrs=addresses)
+
+    async def send(self, notification, recipients):
+        await asyncio.to_thread(self._send, notification, recipients)
+
+
+class Notifier:
+    """Fans notifications out to member inboxes and an optional sender on an asyncio worker thread.
+
+    `notify` queues a job and returns straight away unless NOTIFY_PENDING_LIMIT recipients
+    are already waiting, in which case it blocks until the worker has caught up. The
+    worker writes inboxes and calls the sender NOTIFY_BATCH_SIZE recipients at a time,
+    counting deliveries for the throughput shown to admins.
+    """
+
+    def __init__(self, store, sender=None):
+        self._store = store
+        self.sender = sender
+        self._loop = asyncio.new_event_loop()
+        self._queue = asyncio.Queue()
+        self._thread = None
+        self._space = threading.Condition()
+        self.pending = 0
+        self.delivered = 0
+        self.failed = 0
+        self.last_error = None
+        self._recent = deque(maxlen=600)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop.run_forever, name='notifier', daemon=True)
+            self._thread.start()
+            asyncio.run_coroutine_threadsafe(self._work(), self._loop)
+
+    def notify(self, member_ids, seq, block=True):
+        """Queues notification `seq` for delivery to `member_ids`.
+
+        Callers holding the store lock must pass block=False, since the worker needs that
+        lock to make room.
+        """
+        member_ids = list(member_ids)
+        with self._space:
+            while block and self.pending and self.pending + len(member_ids) > NOTIFY_PENDING_LIMIT:
+                self._space.wait()
+            self.pending += len(member_ids)
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, (member_ids, seq))
+
+    async def _work(self):
+        while True:
+            member_ids, seq = await self._queue.get()
+            notification = self._store.notifications.get(seq)
+            for start in range(0, len(member_ids), NOTIFY_BATCH_SIZE):
+                batch = member_ids[start:start + NOTIFY_BATCH_SIZE]
+                try:
+                    await asyncio.to_thread(self._store.inboxes.deliver, batch, seq)
+                    if self.sender is not None:
+                        await self.sender.send(notification, [self._store.members.get(member_id, {}) for member_id in batch])
+                    self.delivered += len(batch)
+                    self._recent.append((time.monotonic(), len(batch)))
+                except Exception as e:
+                    self.failed += len(batch)
+                    self.last_error = e
+                with self._space:
+                    self.pending -= len(batch)
+                    self._space.notify_all()
+
+    def throughput(self, window=60):
+        """Recipients delivered per second over the last `window` seconds."""
+        since = time.monotonic() - window
+        return sum(count for at, count in list(self._recent) if at >= since) / window
+
+
+class ColumnarTable:
+    """A typed pandas mirror of a repository, refreshed from queued changes when read.
+
+    `columns` maps each column name to a function extracting it from a record. Date
+    columns are stored as datetime64 and `month_keys` adds a precomputed month column
+    (e.g. {'Month': 'Date'}) so reports can group without re-parsing dates.
+    """
+
+    def __init__(self, repo, lock, columns, date_columns=(), category_columns=(), month_keys=None):
+        self._repo = repo
+        self._lock = lock
+        self._columns = columns
+        self._date_columns = date_columns
+        self._category_columns = category_columns
+        self._month_keys = month_keys or {}
+        self._frame = None
+        self._pending = {}
+        repo.subscribe(self._on_saved)
+
+    def _on_saved(self, key, record):
+        self._pending[key] = record
+
+    def _to_frame(self, items):
+        frame = pd.DataFrame(
+            {name: [extract(record) for _, record in items] for name, extract in self._columns.items()},
+            index=[key for key, _ in items],
+        )
+        for column in self._date_columns:
+            frame[column] = pd.to_datetime(frame[column])
+        for month_column, date_column in self._month_keys.items():
+            frame[month_column] = frame[date_column].values.astype('datetime64[M]').astype('datetime64[ns]')
+        return frame
+
+    @instrumented
+    def frame(self):
+        self._repo.load()
+        with self._lock:
+            if self._pending:
+                pending, self._pending = self._pending, {}
+                added = self._to_frame([(key, record) for key, record in pending.items() if record is not None])
+                if self._frame is None:
+                    frame = added
+                else:
+                    frame = pd.concat([self._frame.drop(index=pending.keys(), errors='ignore'), added])
+                for column in self._category_columns:
+                    frame[column] = frame[column].astype('category')
+                self._frame = frame
+            elif self._frame is None:
+                self._frame = self._to_frame([])
+            return self._frame
+
+
+class ReportingEngine:
+    """Vectorized financial, member and class-usage reports over columnar tables."""
+
+    def __init__(self, store):
+        self.payments = ColumnarTable(
+            store.payments, store.lock,
+            {'Member ID': lambda p: p['Member ID'], 'Amount': lambda p: p['Amount'], 'Date': lambda p: p['Date'], 'Plan': lambda p: p['Plan']},
+            date_columns=('Date',), category_columns=('Plan',), month_keys={'Month': 'Date'},
+        )
+        self.members = ColumnarTable(
+            store.members, store.lock,
+            {'Plan': lambda m: m['Plan'], 'Status': lambda m: m['Status'], 'Join Date': lambda m: m['Join Date']},
+            date_columns=('Join Date',), category_columns=('Plan', 'Status'), month_keys={'Join Month': 'Join Date'},
+        )
+        self.classes = ColumnarTable(
+            store.classes, store.lock,
+            {'Name': lambda c: c['Name'], 'Date': lambda c: c['Date'], 'Bookings': lambda c: len(c['Booked'])},
+            date_columns=('Date',),
+        )
+
+    @staticmethod
+    def _filter(frame, date_column, start=None, end=None, plans=None):
+        mask = pd.Series(True, index=frame.index)
+        if start is not None:
+            mask &= frame[date_column] >= pd.Timestamp(start)
+        if end is not None:
+            mask &= frame[date_column] <= pd.Timestamp(end)
+        if plans:
+            mask &= frame['Plan'].isin(plans)
+        return frame[mask]
+
+    @instrumented
+    def revenue_by_month(self, start=None, end=None, plans=None):
+        payments = self._filter(self.payments.frame(), 'Date', start, end, plans)
+        return payments.groupby('Month', sort=True)['Amount'].sum().reset_index()
+
+    @instrumented
+    def plan_distribution(self, start=None, end=None, plans=None):
+        members = self._filter(self.members.frame(), 'Join Date', start, end, plans)
+        plan_counts = members['Plan'].value_counts().reset_index()
+        plan_counts.columns = ['Plan', 'Count']
+        return plan_counts[plan_counts['Count'] > 0]
+
+    @instrumented
+    def class_usage(self, start=None, end=None):
+        classes = self._filter(self.classes.frame(), 'Date', start, end)
+        return classes.groupby('Name', sort=False)['Bookings'].sum().reset_index()
+
+
+class Authenticator:
+    """bcrypt password hashing on a bounded thread pool, plus short-lived session tokens.
+
+    Hashing runs on at most `workers` threads, so a burst of logins cannot take every
+    core away from other sessions' reruns. A logged-in session carries a token that is
+    checked against an in-memory cache on each rerun instead of re-verifying the password.
+    """
+
+    def __init__(self, rounds=12, workers=4, token_ttl=1800):
+        self.rounds = rounds
+        self.token_ttl = token_ttl
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='auth')
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_hashed(stored):
+        return stored.startswith(('$2a$', '$2b$', '$2y$'))
+
+    def _hash(self, password):
+        return bcrypt.hashpw(password.encode(), bcrypt.gensalt(self.rounds)).decode()
+
+    def hash_password(self, password):
+        return self._executor.submit(self._hash, password).result()
+
+    def hash_many(self, passwords):
+        return list(self._executor.map(self._hash, passwords))
+
+    def verify(self, password, stored):
+        if not self.is_hashed(stored):
+            # Plaintext left over from before hashing; the caller upgrades it on success
+            return hmac.compare_digest(password.encode(), stored.encode())
+        return self._executor.submit(bcrypt.checkpw, password.encode(), stored.encode()).result()
+
+    def issue_token(self, role, user_id):
+        token = secrets.token_urlsafe(32)
+        now = time.monotonic()
+        with self._lock:
+            self._tokens = {t: entry for t, entry in self._tokens.items() if entry[2] > now}
+            self._tokens[token] = (role, user_id, now + self.token_ttl)
+        return token
+
+    def check_token(self, token):
+        """Returns (role, user ID) for a live token and extends its lifetime, or None."""
+        with self._lock:
+            entry = self._tokens.get(token)
+            if entry is None or entry[2] <= time.monotonic():
+                self._tokens.pop(token, None)
+                return None
+            self._tokens[token] = (entry[0], entry[1], time.monotonic() + self.token_ttl)
+            return entry[0], entry[1]
+
+    def revoke(self, token):
+        with self._lock:
+            self._tokens.pop(token, None)
+
+
+class GymStore:
+    """All gym data, shared by every browser session in the process."""
+
+    def __init__(self, backend, blobs, auth=None):
+        self.backend = backend
+        self.blobs = blobs
+        self.auth = auth or Authenticator()
+        self.images = ImagePipeline(blobs)
+        self.lock = threading.RLock()
+        self.admins = AdminRepository(backend, self.lock)
+        self.trainers = TrainerRepository(backend, self.lock)
+        self.members = MemberRepository(backend, self.lock)
+        self.plans = PlanRepository(backend, self.lock)
+        self.payments = PaymentRepository(backend, self.lock)
+        self.classes = ClassRepository(backend, self.lock, self.trainers)
+        self.announcements = AnnouncementRepository(backend, self.lock)
+        self.workout_library = WorkoutLibraryRepository(backend, self.lock)
+        self.member_workouts = WorkoutLogRepository(backend, self.lock)
+        self.member_plans = MemberPlanRepository(backend, self.lock)
+        self.equipment = EquipmentRepository(backend, self.lock)
+        self.nutrition = NutritionRepository(backend, self.lock)
+        self.foods = FoodRepository(backend, self.lock)
+        self.body_metrics = BodyMetricsRepository(backend, self.lock)
+        self.progress_photos = ProgressPhotoRepository(backend, self.lock)
+        self.badges = BadgeRepository(backend, self.lock)
+        self.community_posts = CommunityPostRepository(backend, self.lock)
+        self.challenges = ChallengeRepository(backend, self.lock)
+        self.trainer_requests = TrainerRequestRepository(backend, self.lock)
+        self.member_audit = MemberAuditRepository(backend, self.lock)
+        self.membership_events = MembershipEventRepository(backend, self.lock)
+        self.class_templates = ClassTemplateRepository(backend, self.lock)
+        self.schedule = ClassSchedule(self.classes, self.class_templates, self.lock)
+        self.dashboard = DashboardMetrics(self.members, self.payments)
+        self.memberships = MembershipScheduler(self)
+        self.notifications = NotificationRepository(backend, self.lock)
+        self.inboxes = InboxRepository(backend, self.lock)
+        self.notifier = Notifier(self)
+        # class ID -> (name, date, time, booked, waitlist) as last saved, to tell what changed
+        self._class_state = {}
+        self.classes.subscribe(self._on_class_saved)
+        self.reports = ReportingEngine(self)
+        if backend.is_empty():
+            for collection, items in sample_data().items():
+                backend.put_many(collection, items)
+        elif not len(self.foods):
+            self.foods.put_many((food['Name'], food) for food in FOOD_DATABASE)
+
+    def add_member(self, member):
+        """Adds a new member along with their empty per-member collections and welcome post."""
+        with self.lock:
+            self.members.save(member)
+            for repo in self.member_collections():
+                repo.create(member['ID'])
+            self.community_posts.append({'user': member['Name'], 'text': "Welcome to the hub!", 'date': datetime.now()})
+
+    def notify(self, member_ids, title, text, block=True):
+        """Logs a notification and queues it for the members' inboxes; returns its sequence number."""
+        member_ids = list(member_ids)
+        if not member_ids:
+            return None
+        seq = self.notifications.append({'Title': title, 'Text': text, 'Date': datetime.now()})
+        self.notifier.notify(member_ids, seq, block)
+        return seq
+
+    def post_announcement(self, text):
+        """Posts an announcement and notifies every member of it in the background; returns how many."""
+        self.announcements.append(text)
+        member_ids = list(self.members.records)
+        self.notify(member_ids, "New announcement", text)
+        return len(member_ids)
+
+    def _on_class_saved(self, class_id, c):
+        """Notifies members when their class is cancelled or rescheduled, or they are moved off its waitlist."""
+        old = self._class_state.pop(class_id, None)
+        if c is not None:
+            # Copies, since bookings are edited in place
+            self._class_state[class_id] = (c['Name'], c['Date'], c['Time'], set(c['Booked']), list(c.get('Waitlist', [])))
+        if old is None:
+            return
+        name, class_date, class_time, booked, waitlist = old
+        when = f"{pd.Timestamp(class_date):%d %b} at {class_time}"
+        if c is None:
+            self.notify(booked | set(waitlist), "Class cancelled", f"{name} on {when} has been cancelled.", block=False)
+            return
+        if (c['Date'], c['Time']) != (class_date, class_time):
+            self.notify(booked | set(waitlist), "Class rescheduled", f"{name} on {when} has moved to {pd.Timestamp(c['Date']):%d %b} at {c['Time']}.", block=False)
+        promoted = [member_id for member_id in c['Booked'] if member_id in waitlist]
+        self.notify(promoted, "You're in!", f"A spot opened up in {c['Name']} on {pd.Timestamp(c['Date']):%d %b} at {c['Time']} and you have been booked in.", block=False)
+
+    def _clean_member_field(self, member_id, field, value):
+        """Validates an edited member field and returns the value to store, or raises ValueError."""
+        if field in ('Name', 'Email', 'username'):
+            value = str(value or '').strip()
+            if not value:
+                raise ValueError(f"{field} cannot be empty.")
+            if field == 'Email' and '@' not in value:
+                raise ValueError(f"{value} is not a valid email address.")
+            if field != 'Name':
+                other = self.members.find(field, value)
+                if other is not None and other['ID'] != member_id:
+                    raise ValueError(f"{field} {value} is already used by member {other['ID']}.")
+        elif field in ('Phone', 'Address'):
+            value = str(value or '').strip()
+        elif field in ('DOB', 'Expiry Date'):
+            try:
+                value = pd.Timestamp(value).date() if value else None
+            except ValueError:
+                raise ValueError(f"{field} {value} is not a date.") from None
+            if value is None and field == 'Expiry Date':
+                raise ValueError("Expiry Date cannot be empty.")
+        elif field == 'Plan':
+            if value not in self.plans.records:
+                raise ValueError(f"Unknown plan {value}.")
+        elif field == 'Status':
+            if value not in MEMBER_STATUSES:
+                raise ValueError(f"Unknown status {value}.")
+        elif field == 'Trainer ID':
+            if value is not None:
+                # Text imports can carry whole numbers as "101" or "101.0"
+                number = pd.to_numeric(value, errors='coerce')
+                if pd.isna(number) or number != int(number):
+                    raise ValueError(f"Unknown trainer {value}.")
+                value = int(number)
+            if value is not None and value not in self.trainers.records:
+                raise ValueError(f"Unknown trainer {value}.")
+        else:
+            raise ValueError(f"{field} cannot be edited here.")
+        return value
+
+    def apply_member_changes(self, edited, added, deleted, user):
+        """Applies a member editor delta and records an audit entry per changed member.
+
+        `edited` maps member IDs to {field: new value}, `added` is a list of new rows
+        and `deleted` a list of member IDs. Nothing is saved if any field is invalid,
+        including an email or username claimed twice within the delta. New members get
+        no password, only a one-time reset code to set their own with. Returns (audit
+        entries, errors, {new username: reset code}).
+        """
+        errors, updates, new_members, reset_codes = [], [], [], {}
+        claimed = {'Email': {}, 'username': {}}
+
+        def claim(field, value, who):
+            other = claimed[field].setdefault(value, who)
+            if other != who:
+                errors.append(f"{who}: {field} {value} is also used by {other} in these changes.")
+
+        with self.lock:
+            for member_id, changes in edited.items():
+                member = self.members.get(member_id)
+                if member is None or member_id in deleted:
+                    continue
+                cleaned = {}
+                for field, value in changes.items():
+                    try:
+                        cleaned[field] = self._clean_member_field(member_id, field, value)
+                    except ValueError as e:
+                        errors.append(f"Member {member_id}: {e}")
+                cleaned = {field: value for field, value in cleaned.items() if member.get(field) != value}
+                for field in claimed:
+                    if field in cleaned:
+                        claim(field, cleaned[field], f"Member {member_id}")
+                if cleaned:
+                    updates.append((member, cleaned))
+
+            next_id = self.members.next_id()
+            for row in added:
+                row = {field: value for field, value in row.items() if field in MEMBER_EDITABLE_FIELDS and value is not None}
+                name, email = str(row.get('Name') or '').strip(), row.get('Email')
+                if not name or not email:
+                    errors.append("New members need at least a Name and Email.")
+                    continue
+                row['Name'] = name
+                row.setdefault('username', default_username(name))
+                row.setdefault('Plan', 'Bronze')
+                row.setdefault('Expiry Date', date.today() + timedelta(days=self.plans.get(row['Plan'], {'duration': 30})['duration']))
+                member = {
+                    "ID": next_id, "Password": None, "Phone": '', "DOB": date(1999, 1, 1), "Address": "Bengaluru, Karnataka",
+                    "Photo URL": f"https://api.dicebear.com/8.x/avataaars/svg?seed={name.split(' ')[0]}",
+                    "Status": "Active", "Join Date": date.today(), 'Trainer ID': None, 'Uploaded Photo': None,
+                }
+                for field, value in row.items():
+                    try:
+                        member[field] = self._clean_member_field(next_id, field, value)
+                    except ValueError as e:
+                        errors.append(f"New member {name}: {e}")
+                for field in claimed:
+                    if field in member:
+                        claim(field, member[field], f"New member {name}")
+                new_members.append(member)
+                next_id += 1
+
+            if errors:
+                return [], errors, {}
+
+            now = datetime.now()
+            audit = []
+            for member, changes in updates:
+                audit.append({'date': now, 'user': user, 'member_id': member['ID'], 'action': 'update', 'changes': {field: (member.get(field), value) for field, value in changes.items()}})
+                member.update(changes)
+                self.members.save(member)
+            for member in new_members:
+                reset_codes[member['username']] = self.issue_reset_code(self.members, member)
+                self.add_member(member)
+                audit.append({'date': now, 'user': user, 'member_id': member['ID'], 'action': 'add', 'changes': {}})
+            for member_id in deleted:
+                if self.members.get(member_id) is not None:
+                    self.members.delete(member_id)
+                    for repo in self.member_collections():
+                        repo.delete(member_id)
+                    self.trainer_requests.withdraw(member_id)
+                    audit.append({'date': now, 'user': user, 'member_id': member_id, 'action': 'delete', 'changes': {}})
+            self.member_audit.append_many(audit)
+        return audit, [], reset_codes
+
+    @staticmethod
+    def issue_reset_code(repo, record):
+        """Locks a member's or trainer's password and returns a one-time code they can set a new one with."""
+        code = secrets.token_urlsafe(8)
+        record[repo.password_field] = None
+        record['Reset Code'] = hashlib.sha256(code.encode()).hexdigest()
+        return code
+
+    def reset_password(self, repo, username, code, password):
+        """Sets a new password for the user in `repo` holding this reset code; returns the record, or None."""
+        record = repo.find('username', username)
+        digest = record.get('Reset Code') if record else None
+        if not digest or not hmac.compare_digest(digest, hashlib.sha256(code.encode()).hexdigest()):
+            return None
+        hashed = self.auth.hash_password(password)
+        with self.lock:
+            if record.get('Reset Code') != digest:
+                return None
+            record[repo.password_field] = hashed
+            del record['Reset Code']
+            repo.save(record)
+        return record
+
+    def accept_trainer_requests(self, trainer_id, member_ids):
+        """Assigns the requesting members to the trainer and withdraws their other requests."""
+        with self.lock:
+            accepted = []
+            for member_id in self.trainer_requests.remove(trainer_id, member_ids):
+                member = self.members.get(member_id)
+                if member is not None:
+                    member['Trainer ID'] = trainer_id
+                    accepted.append((member_id, member))
+                self.trainer_requests.withdraw(member_id)
+            self.members.put_many(accepted)
+        return [member for _, member in accepted]
+
+    def authenticate(self, repo, username, password):
+        """Returns the admin, trainer or member with these credentials, or None.
+
+        Plaintext passwords from older data are replaced with a bcrypt hash on first use.
+        """
+        record = repo.find('username', username)
+        # Accounts waiting on a reset code have no password to match
+        if record is None or not record.get(repo.password_field) or not self.auth.verify(password, record[repo.password_field]):
+            return None
+        if not self.auth.is_hashed(record[repo.password_field]):
+            record[repo.password_field] = self.auth.hash_password(password)
+            repo.save(record)
+        return record
+
+    def upload_image(self, data):
+        """Stores uploaded image bytes and queues their renditions; returns the image reference."""
+        ref = self.blobs.put(data)
+        self.images.submit(ref)
+        return ref
+
+    def member_collections(self):
+        return (self.member_workouts, self.nutrition, self.badges, self.body_metrics, self.progress_photos, self.member_plans)
+
+    def import_members(self, chunks, progress=None):
+        """Imports members from (DataFrame, fraction read) chunks, skipping invalid or duplicate rows.
+
+        IDs continue from the members counter and each chunk is written in one batch
+        per collection. Fields are checked as the member editor checks them. Rows with
+        no Password get a one-time reset code instead. Returns the number imported, a
+        list of (row, reason) skips and {username: reset code}.
+        """
+        imported, skipped, row_number, reset_codes = 0, [], 0, {}
+        for chunk, fraction in chunks:
+            new_members, emails, usernames = [], set(), set()
+            rows = chunk.to_dict('records')
+            # Hash outside the store lock; bcrypt hashes from the old system are kept as-is
+            passwords = [import_text(row, 'Password') for row in rows]
+            plaintext = [i for i, password in enumerate(passwords) if password is not None and not self.auth.is_hashed(password)]
+            for i, hashed in zip(plaintext, self.auth.hash_many(passwords[i] for i in plaintext)):
+                passwords[i] = hashed
+            with self.lock:
+                next_id = self.members.next_id()
+                for row, password in zip(rows, passwords):
+                    row_number += 1
+                    name, email = import_text(row, 'Name', '').strip(), import_text(row, 'Email')
+                    if not name or not email:
+                        skipped.append((row_number, "Name and Email are required."))
+                        continue
+                    username = import_text(row, 'username') or default_username(name)
+                    member = {
+                        "ID": next_id, "Name": name, "username": username, "Password": password,
+                        "Email": email, "Phone": '', "DOB": date(1999, 1, 1), "Address": "Bengaluru, Karnataka",
+                        "Photo URL": f"https://api.dicebear.com/8.x/avataaars/svg?seed={name.split(' ')[0]}",
+                        "Plan": 'Bronze', "Status": 'Active', "Join Date": None, "Expiry Date": None, 'Trainer ID': None, 'Uploaded Photo': None,
+                    }
+                    try:
+                        member['Join Date'] = import_date(row, 'Join Date', date.today())
+                        for field in MEMBER_IMPORT_TEXT_FIELDS + ('DOB', 'Plan', 'Status', 'Trainer ID'):
+                            value = (import_text if field in MEMBER_IMPORT_TEXT_FIELDS else import_cell)(row, field)
+                            member[field] = self._clean_member_field(next_id, field, member[field] if value is None else value)
+                        member['Expiry Date'] = self._clean_member_field(
+                            next_id, 'Expiry Date', import_cell(row, 'Expiry Date') or member['Join Date'] + timedelta(days=self.plans.get(member['Plan'])['duration']))
+                    except ValueError as e:
+                        skipped.append((row_number, str(e)))
+                        continue
+                    if member['Email'] in emails:
+                        skipped.append((row_number, f"Email {member['Email']} already exists."))
+                        continue
+                    if member['username'] in usernames:
+                        skipped.append((row_number, f"Username {member['username']} already exists."))
+                        continue
+                    if password is None:
+                        reset_codes[member['username']] = self.issue_reset_code(self.members, member)
+                    new_members.append(member)
+                    emails.add(member['Email'])
+                    usernames.add(member['username'])
+                    next_id += 1
+                self.members.put_many((m['ID'], m) for m in new_members)
+                for repo in self.member_collections():
+                    repo.create_many(m['ID'] for m in new_members)
+            imported += len(new_members)
+            if progress:
+                progress(fraction, imported)
+        return imported, skipped, reset_codes
+
+    def import_payments(self, chunks, progress=None):
+        """Imports payments for existing members from (DataFrame, fraction read) chunks."""
+        imported, skipped, row_number = 0, [], 0
+        for chunk, fraction in chunks:
+            new_payments = []
+            for row in chunk.to_dict('records'):
+                row_number += 1
+                member_id = pd.to_numeric(import_cell(row, 'Member ID'), errors='coerce')
+                member = self.members.get(int(member_id)) if not pd.isna(member_id) else None
+                amount = pd.to_numeric(import_cell(row, 'Amount'), errors='coerce')
+                if member is None:
+                    skipped.append((row_number, "Unknown Member ID."))
+                elif pd.isna(amount):
+                    skipped.append((row_number, "Amount must be a number."))
+                else:
+                    try:
+                        paid_on = import_date(row, 'Date', date.today())
+                    except ValueError as e:
+                        skipped.append((row_number, str(e)))
+                        continue
+                    new_payments.append({
+                        'Member ID': member['ID'], 'Amount': amount.item() if hasattr(amount, 'item') else amount,
+                        'Date': paid_on, 'Plan': import_cell(row, 'Plan', member['Plan']),
+                    })
+            self.payments.append_many(new_payments)
+            imported += len(new_payments)
+            if progress:
+                progress(fraction, imported)
+        return imported, skipped
+
+
+@st.cache_resource
+def get_store():
+    """Returns the data store shared by all sessions, created once per process."""
+    auth = Authenticator(
+        rounds=int(os.getenv('GYM_BCRYPT_ROUNDS', 12)),
+        workers=int(os.getenv('GYM_AUTH_WORKERS', 4)),
+        token_ttl=int(os.getenv('GYM_SESSION_TTL_SECONDS', 1800)),
+    )
+    db_path = os.getenv('GYM_DB_PATH', 'gym_data.db')
+    if os.getenv('GYM_STORE_BACKEND', 'sqlite') == 'journal':
+        backend = JournalBackend(os.getenv('GYM_JOURNAL_DIR', 'gym_journal'), int(os.getenv('GYM_JOURNAL_COMPACT_BYTES', JOURNAL_COMPACT_BYTES)))
+        # Switching an existing deployment over carries its SQLite data across once
+        if backend.is_empty() and os.path.exists(db_path):
+            backend.import_from(SQLiteBackend(db_path))
+    else:
+        backend = SQLiteBackend(db_path)
+    store = GymStore(backend, BlobStore(os.getenv('GYM_BLOB_DIR', 'gym_blobs')), auth)
+    if os.getenv('GYM_SMTP_HOST'):
+        store.notifier.sender = SMTPSender(os.getenv('GYM_SMTP_HOST'), int(os.getenv('GYM_SMTP_PORT', 25)))
+    elif os.getenv('GYM_NOTIFY_FILE'):
+        store.notifier.sender = FileSender(os.getenv('GYM_NOTIFY_FILE'))
+    store.notifier.start()
+    store.memberships.start()
+    return store
+
+
+def photo_source(record, rendition):
+    """Returns what st.image should show for a trainer or member: an image rendition or their avatar URL."""
+    if record.get('Uploaded Photo'):
+        path = get_store().images.source(record['Uploaded Photo'], rendition)
+        if path:
+            return path
+    return record.get('Photo URL', '')
+
+
+def new_upload(uploaded_file):
+    """Whether `uploaded_file` has not been handled yet; file uploaders keep their value across reruns."""
+    if uploaded_file is None or st.session_state.get('handled_upload_id') == uploaded_file.file_id:
+        return False
+    st.session_state.handled_upload_id = uploaded_file.file_id
+    return True
+
+
+# --- CHARTS ---
+# Most points a line chart is drawn with; longer series are downsampled server-side
+CHART_MAX_POINTS = 500
+# Raw series at least this long are drawn with WebGL traces and without markers
+CHART_WEBGL_POINTS = 1000
+
+
+def lttb_indices(xs, ys, target):
+    """Largest-Triangle-Three-Buckets: positions of `target` points that best keep the line's shape."""
+    n = len(xs)
+    if n <= target or target < 3:
+        return np.arange(n)
+    # The first and last points are always kept; the rest are split into target - 2 buckets
+    edges = np.linspace(1, n - 1, target - 1).astype(int)
+    selected = [0]
+    for i in range(target - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x, next_y = xs[end:next_end].mean(), ys[end:next_end].mean()
+        a = selected[-1]
+        areas = np.abs((xs[a] - next_x) * (ys[start:end] - ys[a]) - (xs[a] - xs[start:end]) * (next_y - ys[a]))
+        selected.append(start + int(areas.argmax()))
+    selected.append(n - 1)
+    return np.array(selected)
+
+
+def downsample(frame, x, y, max_points=CHART_MAX_POINTS):
+    """Returns at most `max_points` rows of `frame` (sorted by date column `x`), chosen by LTTB on `y`."""
+    if len(frame) <= max_points:
+        return frame
+    xs = pd.to_datetime(frame[x]).astype('int64').to_numpy(dtype=float)
+    return frame.iloc[lttb_indices(xs, frame[y].to_numpy(dtype=float), max_points)]
+
+
+@instrumented
+def line_figure(frame, x, y, title):
+    """A plotly line chart of `frame` with a bounded number of points, whatever the history length."""
+    dense = len(frame) >= CHART_WEBGL_POINTS
+    shown = downsample(frame, x, y[0] if isinstance(y, list) else y)
+    return px.line(shown, x=x, y=y, title=title, markers=len(shown) <= 60, render_mode='webgl' if dense else 'auto')
+
+
+# Figures are cached per data version, so reruns reuse them until new data is logged
+@st.cache_resource(max_entries=1)
+def membership_growth_figure(_metrics, signups_version):
+    """Builds the sign-ups chart once per change to the monthly sign-up histogram."""
+    growth = pd.DataFrame(sorted(_metrics.signups_by_month.items()), columns=['Join Month', 'New Sign-ups'])
+    return line_figure(growth, 'Join Month', 'New Sign-ups', 'Membership Growth Over Time')
+
+
+@st.cache_resource(max_entries=256)
+def body_weight_figure(_entries, member_id, version):
+    """Weight chart for a member's body metrics; `version` is the number of entries logged."""
+    df = pd.DataFrame(_entries).sort_values(by='date')
+    return line_figure(df, 'date', 'weight', 'Weight Progress')
+
+
+@st.cache_resource(max_entries=256)
+def exercise_progress_figure(_rollup, member_id, exercise, version):
+    """Weight and estimated 1RM chart for one exercise; `version` is the number of sets in the rollup."""
+    return line_figure(_rollup.frame(), 'Date', ['Weight', 'Est. 1RM'], f'Weight Progress for {exercise}')
+
+
+# --- BULK IMPORT ---
+def read_in_chunks(file, file_name, chunk_size=5000):
+    """Streams a CSV or Parquet upload as (DataFrame, fraction of file read) chunks."""
+    if file_name.lower().endswith('.parquet'):
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(file)
+        total_rows, rows_read = max(parquet_file.metadata.num_rows, 1), 0
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            rows_read += batch.num_rows
+            yield batch.to_pandas(), rows_read / total_rows
+    else:
+        size = max(file.seek(0, os.SEEK_END), 1)
+        file.seek(0)
+        # Read as text so a digits-only column with a blank cell doesn't become floats ("1234.0")
+        for chunk in pd.read_csv(file, dtype=str, chunksize=chunk_size):
+            yield chunk, min(file.tell() / size, 1.0)
+
+
+def import_cell(row, column, default=None):
+    value = row.get(column)
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return default
+    return value.item() if hasattr(value, 'item') else value
+
+
+def import_text(row, column, default=None):
+    """The cell as a string; whole-number floats (a Parquet column with gaps) lose their ".0"."""
+    value = import_cell(row, column)
+    if value is None:
+        return default
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def import_date(row, column, default):
+    value = import_cell(row, column)
+    try:
+        return pd.Timestamp(value).date() if value is not None else default
+    except ValueError:
+        raise ValueError(f"{column} {value} is not a date.") from None
+
+
+def bulk_import():
+    """Admin form that streams a members or payments file into the store."""
+    store = get_store()
+    kind = st.radio("Import", ["Members", "Payments"], horizontal=True, key="bulk_import_kind")
+    if kind == "Members":
+        st.caption("Columns: Name, Email (required); username, Password, Phone, DOB, Address, Plan, Status, Join Date, Expiry Date, Trainer ID (optional).")
+    else:
+        st.caption("Columns: Member ID, Amount (required); Date, Plan (optional).")
+    uploaded_file = st.file_uploader("Upload a CSV or Parquet file", type=["csv", "parquet"], key="bulk_import_file")
+    if uploaded_file and st.button("Start Import"):
+        progress_bar = st.progress(0.0, text="Importing...")
+        report_progress = lambda fraction, count: progress_bar.progress(fraction, text=f"Imported {count:,} rows...")
+        chunks = read_in_chunks(uploaded_file, uploaded_file.name)
+        reset_codes = {}
+        if kind == "Members":
+            imported, skipped, reset_codes = store.import_members(chunks, report_progress)
+        else:
+            imported, skipped = store.import_payments(chunks, report_progress)
+        progress_bar.progress(1.0, text="Import complete.")
+        st.success(f"Imported {imported:,} {kind.lower()}.")
+        if skipped:
+            st.warning(f"Skipped {len(skipped):,} rows.")
+            st.dataframe(pd.DataFrame(skipped, columns=['Row', 'Reason']), hide_index=True)
+        if reset_codes:
+            st.warning(f"{len(reset_codes):,} imported members had no password. Give each one their one-time code to set it from the login page; codes are not shown again.")
+            st.dataframe(pd.DataFrame(reset_codes.items(), columns=['Username', 'Reset Code']), hide_index=True)
+
+
+# --- LOGIN & REGISTRATION PAGE ---
+def reset_password_form(repo, role):
+    """Lets a new member or trainer set their password with the one-time code they were given."""
+    with st.expander("Set your password with a one-time code"):
+        with st.form(f"{role}_reset_password_form"):
+            username = st.text_input("Username", key=f"{role}_reset_username")
+            code = st.text_input("One-time code", key=f"{role}_reset_code")
+            new_password = st.text_input("New Password", type="password", key=f"{role}_reset_new_password")
+            confirm_password = st.text_input("Confirm New Password", type="password", key=f"{role}_reset_confirm_password")
+            if st.form_submit_button("Set Password", use_container_width=True):
+                if not new_password or new_password != confirm_password:
+                    st.warning("Please enter matching passwords.")
+                elif get_store().reset_password(repo, username, code.strip(), new_password) is None:
+                    st.error("That username and code do not match.")
+                else:
+                    st.success("Your password is set. Please log in.")
+
+
+def login_register_page(role):
+    store = get_store()
+    st.title("🏋️‍♂️ Bengaluru Fitness Hub")
+    st.markdown(f"*{datetime.now().strftime('%A, %d %B %Y')}*")
+
+    login_tab, register_tab = st.tabs(["**Login**", "**Register as Member**"])
+
+    with login_tab:
+        st.header("Login to Your Account")
+
+        if role == "Admin":
+            with st.form("admin_login_form"):
+                username = st.text_input("Admin Username")
+                password = st.text_input("Password", type="password")
+                if st.form_submit_button("Login as Admin", use_container_width=True):
+                    admin = store.authenticate(store.admins, username, password)
+                    if admin:
+                        st.session_state.auth_token = store.auth.issue_token("Admin", admin['ID'])
+                        st.session_state.logged_in = True
+                        st.session_state.role = "Admin"
+                        st.session_state.admin_name = admin.get("name", "Admin")
+                        st.rerun()
+                    else:
+                        st.error("Invalid admin username or password.")
+        
+        elif role == "Member":
+            with st.form("member_login_form"):
+                username = st.text_input("Username")
+                password = st.text_input("Your Password", type="password")
+                if st.form_submit_button("Login as Member", use_container_width=True):
+                    member = store.authenticate(store.members, username, password)
+                    if member:
+                        st.session_state.auth_token = store.auth.issue_token("Member", member['ID'])
+                        st.session_state.logged_in = True
+                        st.session_state.role = "Member"
+                        st.session_state.current_user_id = member['ID']
+                        st.rerun()
+                    else:
+                        st.error("Invalid username or password.")
+
+            reset_password_form(store.members, "member")
+
+        elif role == "Trainer":
+            with st.form("trainer_login_form"):
+                username = st.text_input("Trainer Username")
+                password = st.text_input("Password", type="password")
+                if st.form_submit_button("Login as Trainer", use_container_width=True):
+                    trainer = store.authenticate(store.trainers, username, password)
+                    if trainer:
+                        st.session_state.auth_token = store.auth.issue_token("Trainer", trainer['ID'])
+                        st.session_state.logged_in = True
+                        st.session_state.role = "Trainer"
+                        st.session_state.current_trainer_id = trainer['ID']
+                        st.rerun()
+                    else:
+                        st.error("Invalid trainer username or password.")
+
+            reset_password_form(store.trainers, "trainer")
+
+    with register_tab:
+        st.header("Create a New Member Account")
+        with st.form("registration_form"):
+            name = st.text_input("Full Name")
+            email = st.text_input("Email Address")
+            phone = st.text_input("Phone Number")
+            password = st.text_input("Create Password", type="password")
+            confirm_password = st.text_input("Confirm Password", type="password")
+
+            if st.form_submit_button("Register", use_container_width=True):
+                if password == confirm_password and email and name:
+                    # Simple username generation (e.g., first name + first letter of last name)
+                    username = name.lower().split(' ')[0] + name.lower().split(' ')[-1][0]
+                    if store.members.email_exists(email):
+                        st.error("An account with this email already exists.")
+                    elif store.members.username_exists(username):
+                        # Handle potential username conflicts
+                        st.warning("Generated username already exists. Please try a different name.")
+                    else:
+                        new_id = store.members.next_id()
+                        new_member = {
+                            "ID": new_id, "Name": name, "username": username, "Password": store.auth.hash_password(password), "Email": email, "Phone": phone,
+                            "DOB": date(1999, 1, 1), "Address": "Bengaluru, Karnataka", 
+                            "Photo URL": f"https://api.dicebear.com/8.x/avataaars/svg?seed={name.split(' ')[0]}",
+                            "Plan": "Bronze", "Status": "Active", "Join Date": date.today(), 
+                            "Expiry Date": date.today() + timedelta(days=30), 'Trainer ID': None, 'Uploaded Photo': None
+                        }
+                        store.add_member(new_member)
+                        st.success(f"Registration successful! Your new Member ID is {new_id} and your username is '{username}'. Please log in.")
+                        st.rerun()
+                else:
+                    st.warning("Please fill all fields and ensure passwords match.")
+
+
+# --- ADMIN VIEW ---
+def admin_view():
+    admin_name = st.session_state.get('admin_name', 'Admin')
+    st.sidebar.title(f"Welcome, {admin_name}")
+    st.sidebar.markdown("---")
+    page = st.sidebar.radio("Navigate", ["Dashboard", "My Profile", "Member Management", "Class & Schedule", "Trainer Management", "Equipment Management", "Reports", "Post Announcement", "Performance"])
+    perf_page(f"Admin/{page}")
+    st.sidebar.markdown("---")
+    if st.sidebar.button("Logout", use_container_width=True):
+        get_store().auth.revoke(st.session_state.get('auth_token'))
+        st.session_state.clear()
+        st.rerun()
+
+    if page == "Dashboard":
+        admin_dashboard()
+    elif page == "My Profile":
+        admin_profile()
+    elif page == "Member Management":
+        membership_management()
+    elif page == "Class & Schedule":
+        class_schedule_management()
+    elif page == "Trainer Management":
+        trainer_management()
+    elif page == "Equipment Management":
+        equipment_management()
+    elif page == "Reports":
+        reporting()
+    elif page == "Post Announcement":
+        post_announcement()
+    elif page == "Performance":
+        performance_page()
+
+
+def admin_dashboard():
+    store = get_store()
+    st.title("📊 Admin Dashboard")
+    metrics = store.dashboard.load()
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Total Members", metrics.total_members)
+    col2.metric("Active Members", metrics.active_members)
+    col3.metric(f"Expiring in {MEMBERSHIP_REMINDER_DAYS} Days", len(store.memberships.expiring_soon))
+    col4.metric("Total Revenue", f"₹{metrics.total_revenue:,.0f}")
+    if store.memberships.last_error is not None:
+        st.error(f"Membership scheduler failed: {store.memberships.last_error}")
+
+    with st.expander("Recent Membership Events"):
+        events, _ = store.membership_events.page(limit=10)
+        if events:
+            events_df = pd.DataFrame([entry for _, entry in events])
+            events_df.insert(0, 'Member', [store.members.get(entry['Member ID'], {}).get('Name', 'Unknown') for _, entry in events])
+            st.dataframe(events_df.drop(columns='Member ID'), hide_index=True, use_container_width=True)
+        else:
+            st.write("No reminders, renewals or expiries yet.")
+
+    st.header("Visualizations")
+    if metrics.signups_by_month:
+        fig_growth = membership_growth_figure(metrics, metrics.signups_version)
+        st.plotly_chart(fig_growth, use_container_width=True)
+
+    # --- Predictive Analytics (Mock) ---
+    st.header("📈 Predictive Analytics")
+    st.info("This section would use an algorithm to predict trends. For this mock, it's placeholder.")
+    st.markdown("Based on current trends, we predict a **15% increase** in demand for our Yoga classes next quarter.")
+
+def admin_profile():
+    store = get_store()
+    st.title("Admin Profile")
+    admin_data = store.admins.all()[0] # Assuming only one admin for this app
+    
+    st.subheader("Edit Your Profile")
+    with st.form("admin_profile_form"):
+        new_name = st.text_input("Name", value=admin_data['name'])
+        new_username = st.text_input("Username", value=admin_data['username'])
+        if st.form_submit_button("Update Profile"):
+            other = store.admins.find('username', new_username)
+            if not new_username.strip():
+                st.error("Username cannot be empty.")
+            elif other is not None and other['ID'] != admin_data['ID']:
+                st.error(f"Username {new_username} is already taken.")
+            else:
+                admin_data['name'] = new_name
+                admin_data['username'] = new_username
+                store.admins.save(admin_data)
+                st.session_state.admin_name = new_name
+                st.success("Admin profile updated successfully!")
+                st.rerun()
+
+def membership_management():
+    store = get_store()
+    st.title("👥 Member Management")
+
+    # Filter, sort and page on the server; only the visible page is sent to the editor
+    st.subheader("Edit Member Details")
+    trainer_names = {t['ID']: t['Name'] for t in store.trainers.all()}
+    col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
+    search = col1.text_input("Search by name, email or phone", key="member_grid_search")
+    plans = col2.multiselect("Plan", store.plans.names(), key="member_grid_plans")
+    statuses = col3.multiselect("Status", MEMBER_STATUSES, key="member_grid_statuses")
+    trainer_ids = col4.multiselect("Trainer", [None] + list(trainer_names), format_func=lambda t: trainer_names.get(t, 'Unassigned'), key="member_grid_trainers")
+    col1, col2, col3, col4 = st.columns(4)
+    sort_by = col1.selectbox("Sort by", MemberRepository.sort_fields, key="member_grid_sort")
+    descending = col2.toggle("Descending", key="member_grid_descending")
+    page_size = col3.selectbox("Rows per page", [25, 50, 100], key="member_grid_page_size")
+    page = st.session_state.get('member_grid_page', 1)
+    total, page_members = store.members.query(search, plans, statuses, trainer_ids, sort_by, descending, (page - 1) * page_size, page_size)
+    page_count = max((total - 1) // page_size + 1, 1)
+    if page > page_count:
+        # The filters shrank the result set; jump back to its last page
+        page = st.session_state.member_grid_page = page_count
+        _, page_members = store.members.query(search, plans, statuses, trainer_ids, sort_by, descending, (page - 1) * page_size, page_size)
+    col4.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, step=1, key="member_grid_page")
+    members_df = pd.DataFrame(page_members, columns=MEMBER_GRID_COLUMNS)
+    st.caption(f"Showing {len(page_members)} of {total:,} matching members.")
+
+    grid_state = hash((search, tuple(plans), tuple(statuses), tuple(trainer_ids), sort_by, descending, page_size, page))
+    editor_key = f"members_editor_{st.session_state.get('members_editor_version', 0)}_{grid_state}"
+    st.data_editor(
+        members_df,
+        column_config={
+            "ID": st.column_config.Column("ID", disabled=True),
+            "Photo URL": st.column_config.Column("Photo", disabled=True),
+            "DOB": st.column_config.DateColumn("Date of Birth"),
+            "Join Date": st.column_config.DateColumn("Join Date", disabled=True),
+            "Expiry Date": st.column_config.DateColumn("Expiry Date"),
+            "Plan": st.column_config.SelectboxColumn("Plan", options=store.plans.names()),
+            "Status": st.column_config.SelectboxColumn("Status", options=MEMBER_STATUSES),
+            "Trainer ID": st.column_config.SelectboxColumn("Trainer ID", options=list(store.trainers.records.keys())),
+        },
+        hide_index=True,
+        num_rows="dynamic",
+        key=editor_key,
+    )
+    
+    if st.button("Save Changes"):
+        # Apply only the editor's delta; row positions map back to member IDs
+        delta = st.session_state[editor_key]
+        member_ids = members_df['ID'].tolist()
+        audit, errors, reset_codes = store.apply_member_changes(
+            {member_ids[row]: changes for row, changes in delta['edited_rows'].items()},
+            delta['added_rows'],
+            [member_ids[row] for row in delta['deleted_rows']],
+            st.session_state.get('admin_name', 'Admin'),
+        )
+        if errors:
+            for error in errors:
+                st.error(error)
+        else:
+            st.session_state.members_editor_version = st.session_state.get('members_editor_version', 0) + 1
+            st.session_state.new_member_codes = reset_codes
+            st.success(f"Saved {len(audit)} member change(s).")
+            st.rerun()
+    if st.session_state.get('new_member_codes'):
+        st.warning("New members have no password yet. Give each one their one-time code to set it from the login page; codes are not shown again.")
+        st.dataframe(pd.DataFrame(st.session_state.pop('new_member_codes').items(), columns=['Username', 'Reset Code']), hide_index=True)
+
+    with st.expander("🧾 Member Change History"):
+        audit_entries = [entry for _, entry in store.member_audit.latest()[:50]]
+        if audit_entries:
+            audit_df = pd.DataFrame(audit_entries)
+            audit_df['changes'] = audit_df['changes'].map(lambda changes: "; ".join(f"{field}: {old} → {new}" for field, (old, new) in changes.items()))
+            st.dataframe(audit_df, use_container_width=True, hide_index=True)
+        else:
+            st.info("No member changes recorded yet.")
+
+    # Admin can change user's profile image
+    with st.expander("🖼️ Change Member Profile Photo"):
+        member_options = {m['ID']: m['Name'] for m in page_members}
+        member_id_to_change = st.selectbox("Select Member (from the current page)", options=list(member_options.keys()), format_func=lambda x: member_options[x], key="admin_change_photo_select")
+        uploaded_photo = st.file_uploader("Upload new profile photo", type=["png", "jpg", "jpeg"], key="admin_photo_uploader")
+        
+        if uploaded_photo:
+            if st.button("Update Photo"):
+                member = store.members.get(member_id_to_change)
+                if member:
+                    member['Uploaded Photo'] = store.upload_image(uploaded_photo.getvalue())
+                    store.members.save(member)
+                    st.success(f"Profile photo for {member['Name']} updated!")
+                    st.rerun()
+                else:
+                    st.error("Member not found.")
+
+    with st.expander("📤 Bulk Import Members or Payments"):
+        bulk_import()
+
+    with st.expander("➕ Add a New Member"):
+        with st.form("add_member_form"):
+            name = st.text_input("Name")
+            email = st.text_input("Email")
+            phone = st.text_input("Phone Number")
+            password = st.text_input("Set Temporary Password", type="password")
+            plan = st.selectbox("Membership Plan", options=store.plans.names())
+            
+            if st.form_submit_button("Add Member"):
+                if email and name and password:
+                    # Simple username generation (e.g., first name + first letter of last name)
+                    username = name.lower().split(' ')[0] + name.lower().split(' ')[-1][0]
+                    if store.members.email_exists(email):
+                        st.error("An account with this email already exists.")
+                    elif store.members.username_exists(username):
+                        st.error("Username already exists. Please try a different name.")
+                    else:
+                        new_id = store.members.next_id()
+                        new_member = {
+                            "ID": new_id, "Name": name, "username": username, "Password": store.auth.hash_password(password), "Email": email, "Phone": phone,
+                            "DOB": date(1999, 1, 1), "Address": "Bengaluru, Karnataka", 
+                            "Photo URL": f"https://api.dicebear.com/8.x/avataaars/svg?seed={name.split(' ')[0]}",
+                            "Plan": plan, "Status": "Active", "Join Date": date.today(), 
+                            "Expiry Date": date.today() + timedelta(days=store.plans.get(plan)['duration']), 'Trainer ID': None, 'Uploaded Photo': None
+                        }
+                        store.add_member(new_member)
+                        st.success(f"Registration successful! Your new Member ID is {new_id} and your username is '{username}'. Please log in.")
+                        st.rerun()
+                else:
+                    st.warning("Please fill all fields and ensure passwords match.")
+
+def class_schedule_management():
+    store = get_store()
+    st.title("🗓️ Class & Schedule Management")
+    date_range = st.date_input("Show classes between", value=(date.today(), date.today() + timedelta(days=14)), key="schedule_range")
+    if len(date_range) == 2:
+        start, end = (datetime.combine(d, datetime.min.time()) for d in date_range)
+        scheduled = store.schedule.between(start, end + timedelta(days=1))
+        if scheduled:
+            classes_df = pd.DataFrame(scheduled)
+            classes_df.index = range(1, len(classes_df) + 1)
+            st.dataframe(classes_df[['ID', 'Name', 'Trainer', 'Date', 'Time', 'Capacity']], use_container_width=True)
+        else:
+            st.info("No classes scheduled in this period.")
+
+    with st.expander("➕ Add a New Class"):
+        with st.form("add_class_form"):
+            name = st.text_input("Class Name")
+            trainers = {t['ID']: t['Name'] for t in store.trainers.all()}
+            trainer_id = st.selectbox("Assign Trainer", list(trainers), format_func=trainers.get)
+            class_date = st.date_input("Date", min_value=date.today())
+            class_time = st.time_input("Time")
+            duration = st.number_input("Duration (minutes)", min_value=15, max_value=MAX_CLASS_MINUTES, value=60, step=15)
+            capacity = st.number_input("Capacity", min_value=1, max_value=50, step=1)
+            repeat_weekly = st.checkbox("Repeat every week on this day")
+            repeat_until = st.date_input("Repeat until (leave empty for no end)", value=None, min_value=date.today())
+
+            if st.form_submit_button("Add Class"):
+                start = datetime.combine(class_date, class_time)
+                template = {
+                    'Name': name, 'Trainer': trainers[trainer_id], 'Trainer ID': trainer_id, 'Weekday': class_date.weekday(),
+                    'Time': class_time.strftime('%H:%M'), 'Duration': duration, 'Capacity': capacity,
+                    'Start Date': class_date, 'End Date': repeat_until,
+                }
+                # A weekly class is checked on every week it repeats, not just its first date
+                clashes = store.schedule.template_conflicts(template) if repeat_weekly else store.schedule.conflicts(trainer_id, start, duration)
+                if clashes and 'Date' in clashes[0]:
+                    st.error(f"{trainers[trainer_id]} already has '{clashes[0]['Name']}' at {clashes[0]['Time']} on {clashes[0]['Date'].strftime('%d-%b-%Y')}.")
+                elif clashes:
+                    st.error(f"{trainers[trainer_id]} already has weekly '{clashes[0]['Name']}' at {clashes[0]['Time']} on {calendar.day_name[clashes[0]['Weekday']]}s.")
+                elif repeat_weekly:
+                    store.schedule.add_template(template)
+                    st.success(f"Successfully added weekly class '{name}'.")
+                    st.rerun()
+                else:
+                    new_id = store.classes.next_id(start=1001)
+                    new_class = {
+                        'ID': new_id, 'Name': name, 'Trainer': trainers[trainer_id], 'Trainer ID': trainer_id, 'Date': class_date, 
+                        'Time': class_time.strftime('%H:%M'), 'Duration': duration, 'Capacity': capacity, 'Booked': [], 'Waitlist': []
+                    }
+                    store.classes.save(new_class)
+                    st.success(f"Successfully added class '{name}'.")
+                    st.rerun()
+
+    with st.expander("❌ Cancel a Class"):
+        upcoming = {c['ID']: c for c in store.schedule.upcoming(days=30)}
+        if upcoming:
+            class_id = st.selectbox("Class", list(upcoming), key="cancel_class_select",
+                                    format_func=lambda i: f"{upcoming[i]['Name']} - {upcoming[i]['Date'].strftime('%d-%b')} {upcoming[i]['Time']} ({len(upcoming[i]['Booked'])} booked)")
+            if st.button("Cancel Class and Notify Members", key="cancel_class"):
+                store.classes.delete(class_id)
+                st.success(f"Cancelled '{upcoming[class_id]['Name']}'; its members are being notified.")
+                st.rerun()
+        else:
+            st.info("No classes in the next 30 days.")
+
+def trainer_management():
+    store = get_store()
+    st.title("💪 Trainer Management")
+    trainers_df = pd.DataFrame(store.trainers.all()).drop(columns=['password', 'Reset Code'], errors='ignore')
+    trainers_df.index = range(1, len(trainers_df) + 1)
+    st.dataframe(trainers_df, use_container_width=True)
+
+    with st.expander("➕ Add a New Trainer"):
+        with st.form("add_trainer_form"):
+            name = st.text_input("Trainer Name")
+            specialization = st.text_input("Specialization")
+
+            if st.form_submit_button("Add Trainer"):
+                username = name.strip().lower().replace(' ', '')
+                if not username:
+                    st.error("Trainer name cannot be empty.")
+                elif store.trainers.find('username', username) is not None:
+                    st.error(f"Username {username} is already taken; add the trainer under a more specific name.")
+                else:
+                    new_id = store.trainers.next_id(start=101)
+                    new_trainer = {'ID': new_id, 'Name': name, 'Specialization': specialization, 'username': username, 'password': None, 'Uploaded Photo': None, 'Photo URL': f"https://api.dicebear.com/8.x/avataaars/svg?seed={name.split(' ')[0]}"}
+                    st.session_state.new_trainer_code = (username, store.issue_reset_code(store.trainers, new_trainer))
+                    store.trainers.save(new_trainer)
+                    store.trainer_requests.create(new_id)
+                    st.success(f"Successfully added trainer {name}.")
+                    st.rerun()
+    if st.session_state.get('new_trainer_code'):
+        username, code = st.session_state.pop('new_trainer_code')
+        st.warning(f"Trainer {username} has no password yet. Give them the one-time code **{code}** to set it from the login page; it is not shown again.")
+
+def equipment_management():
+    st.title("🔩 Equipment Management")
+    equipment_df = pd.DataFrame(get_store().equipment.all())
+    equipment_df.index = range(1, len(equipment_df) + 1)
+    st.dataframe(equipment_df, use_container_width=True)
+    
+    with st.form("add_equipment_form"):
+        st.subheader("Add or Update Equipment")
+        name = st.text_input("Equipment Name")
+        status = st.selectbox("Status", ['Working', 'Maintenance', 'Broken'])
+        if st.form_submit_button("Add/Update Equipment"):
+            # Mock update logic
+            st.success(f"Successfully updated '{name}' status to '{status}'.")
+            st.rerun()
+
+def billing_payments():
+    st.title("💳 Billing & Payments")
+    store = get_store()
+    payments_df = pd.DataFrame(store.payments.all())
+    payments_df['Member Name'] = [store.members.get(member_id, {}).get('Name', 'Unknown') for member_id in payments_df['Member ID']]
+    payments_df.index = range(1, len(payments_df) + 1)
+    st.dataframe(payments_df[['Member Name', 'Amount', 'Date', 'Plan']], use_container_width=True,
+                  column_config={"Amount": st.column_config.NumberColumn(format="₹ %d")})
+
+def reporting():
+    store = get_store()
+    st.title("📈 Reporting")
+    report_type = st.selectbox("Select Report Type", ["Financial", "Member", "Usage"])
+    col1, col2 = st.columns(2)
+    date_range = col1.date_input("Date range", value=(), key="report_date_range")
+    start, end = date_range if len(date_range) == 2 else (None, None)
+    if report_type == "Financial":
+        plans = col2.multiselect("Plans", store.plans.names(), key="report_plans")
+        st.subheader("Financial Report")
+        revenue_by_month = store.reports.revenue_by_month(start, end, plans)
+        fig = px.bar(revenue_by_month, x='Month', y='Amount', title='Monthly Revenue')
+        st.plotly_chart(fig, use_container_width=True)
+    elif report_type == "Member":
+        plans = col2.multiselect("Plans", store.plans.names(), key="report_plans")
+        st.subheader("Member Report")
+        plan_counts = store.reports.plan_distribution(start, end, plans)
+        fig_pie = px.pie(plan_counts, names='Plan', values='Count', title='Membership Plan Distribution')
+        st.plotly_chart(fig_pie, use_container_width=True)
+    elif report_type == "Usage":
+        st.subheader("Usage Report (Class Popularity)")
+        usage_df = store.reports.class_usage(start, end)
+        fig_usage = px.bar(usage_df, x='Name', y='Bookings', title='Class Popularity by Bookings')
+        st.plotly_chart(fig_usage, use_container_width=True)
+
+def post_announcement():
+    store = get_store()
+    st.title("📢 Post/Edit Announcement")
+    st.subheader("Post a New Announcement")
+    with st.form("new_announcement_form"):
+        announcement_text = st.text_area("Enter announcement text:")
+        if st.form_submit_button("Post"):
+            if announcement_text:
+                recipients = store.post_announcement(announcement_text)
+                st.session_state.announcement_posted = f"Announcement posted! Notifying {recipients} members in the background."
+                st.rerun()
+            else:
+                st.warning("Announcement text cannot be empty.")
+    if 'announcement_posted' in st.session_state:
+        st.success(st.session_state.pop('announcement_posted'))
+
+    notifier = store.notifier
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Notifications Pending", notifier.pending)
+    col2.metric("Delivered", notifier.delivered)
+    col3.metric("Delivered / sec (last min)", f"{notifier.throughput():,.0f}")
+    if notifier.last_error is not None:
+        st.error(f"{notifier.failed} notifications failed to send; last error: {notifier.last_error}")
+    
+    st.markdown("---")
+    st.subheader("Edit an Existing Announcement")
+    if len(store.announcements):
+        seq_to_edit = st.selectbox("Select announcement to edit", [seq for seq, _ in store.announcements.latest()], format_func=store.announcements.get, key="edit_announcement_select")
+        with st.form("edit_announcement_form"):
+            edited_text = st.text_area("Edit announcement text:", value=store.announcements.get(seq_to_edit))
+            if st.form_submit_button("Save Changes"):
+                store.announcements.put(seq_to_edit, edited_text)
+                st.success("Announcement updated!")
+                st.rerun()
+    else:
+        st.info("No announcements to edit.")
+
+    st.subheader("Current Announcements")
+    for _, ann in store.announcements.latest():
+        st.info(ann)
+
+def performance_page():
+    monitor = get_monitor()
+    st.title("⏱️ Performance")
+    st.caption(f"Percentiles cover the last {PERF_SAMPLE_LIMIT} reruns of each page, across all sessions.")
+
+    st.subheader("Page Render Times")
+    pages = monitor.page_summary()
+    if pages:
+        st.dataframe(pd.DataFrame(pages), hide_index=True, use_container_width=True)
+    else:
+        st.info("No pages have been rendered yet.")
+
+    st.subheader("Data & Chart Builds")
+    builds = monitor.build_summary()
+    if builds:
+        st.dataframe(pd.DataFrame(builds), hide_index=True, use_container_width=True)
+    else:
+        st.info("No instrumented builds have run yet.")
+
+    st.subheader("Store Lookups by Collection")
+    if monitor.lookups:
+        st.dataframe(pd.DataFrame(monitor.lookups.most_common(), columns=['Collection', 'Lookups']), hide_index=True)
+
+    st.subheader("Profiling")
+    col1, col2 = st.columns([1, 2])
+    count = col1.number_input("Reruns to profile", min_value=1, max_value=20, value=3)
+    if col2.button("Profile the next reruns"):
+        monitor.request_profiles(count)
+        st.success(f"The next {count} rerun(s), in any session, will be captured with cProfile.")
+    for profile in list(monitor.profiles):
+        with st.expander(f"{profile['Page']} at {profile['Date']:%H:%M:%S} ({profile['Seconds'] * 1000:.0f} ms)"):
+            st.code(profile['Stats'], language=None)
+
+    st.subheader("Export")
+    st.download_button("Download Prometheus metrics", monitor.prometheus_text(), file_name="gym_metrics.prom", mime="text/plain")
+    st.caption("Set GYM_METRICS_FILE to also write these metrics to a file, e.g. for the node_exporter textfile collector.")
+
+# --- TRAINER VIEW ---
+def trainer_view():
+    store = get_store()
+    trainer = store.trainers.get(st.session_state.current_trainer_id)
+    if not trainer:
+        st.error("Trainer profile not found.")
+        return
+
+    st.sidebar.title("Trainer Menu")
+    st.sidebar.image(photo_source(trainer, 'avatar'), width=100)
+    st.sidebar.header(trainer['Name'])
+    st.sidebar.markdown("---")
+    page = st.sidebar.radio("Navigate", ["My Dashboard", "My Profile", "My Members", "Pending Requests"])
+    perf_page(f"Trainer/{page}")
+    st.sidebar.markdown("---")
+    if st.sidebar.button("Logout", use_container_width=True):
+        get_store().auth.revoke(st.session_state.get('auth_token'))
+        st.session_state.clear()
+        st.rerun()
+
+    if page == "My Dashboard":
+        st.title("👨‍💼 Trainer Dashboard")
+        st.subheader(f"Welcome, {trainer['Name']}!")
+        assigned_classes = store.schedule.upcoming(days=30, trainer_id=trainer['ID'])
+        st.write("### Your Upcoming Classes (next 30 days)")
+        if assigned_classes:
+            classes_df = pd.DataFrame(assigned_classes)
+            st.dataframe(classes_df[['Name', 'Date', 'Time', 'Booked']], use_container_width=True)
+        else:
+            st.info("You have no classes scheduled.")
+    
+    elif page == "My Profile":
+        st.title("Trainer Profile")
+        col1, col2 = st.columns([1,2])
+        with col1:
+            st.image(photo_source(trainer, 'thumbnail'), caption="Profile Photo", width=200)
+
+            uploaded_file = st.file_uploader("Upload a profile photo", type=["png", "jpg", "jpeg"])
+            if new_upload(uploaded_file):
+                trainer['Uploaded Photo'] = store.upload_image(uploaded_file.getvalue())
+                store.trainers.save(trainer)
+                st.success("Photo uploaded successfully! It will appear once it has been processed.")
+                st.rerun()
+        with col2:
+            st.subheader("Edit Your Profile")
+            with st.form("trainer_profile_form"):
+                new_name = st.text_input("Name", value=trainer['Name'])
+                new_specialization = st.text_input("Specialization", value=trainer['Specialization'])
+                if st.form_submit_button("Update Profile"):
+                    trainer['Name'] = new_name
+                    trainer['Specialization'] = new_specialization
+                    store.trainers.save(trainer)
+                    st.session_state.current_trainer_id = trainer['ID']
+                    st.success("Trainer profile updated successfully!")
+                    st.rerun()
+    
+    elif page == "My Members":
+        st.title("My Members")
+        my_members = store.members.assigned_to(trainer['ID'])
+        if my_members:
+            members_df = pd.DataFrame(my_members)
+            st.dataframe(members_df[['ID', 'Name', 'Email', 'Phone', 'Plan']], use_container_width=True)
+        else:
+            st.info("You are not currently assigned to any members.")
+    
+    elif page == "Pending Requests":
+        st.title("📥 Pending Trainer Requests")
+        request_count = store.trainer_requests.count(trainer['ID'])
+        if not request_count:
+            st.info("You have no new trainer requests.")
+        else:
+            st.subheader(f"Requests to Assign ({request_count})")
+            page_size = 20
+            page_count = (request_count - 1) // page_size + 1
+            if st.session_state.get('request_page', 1) > page_count:
+                st.session_state.request_page = page_count
+            request_page = st.number_input(f"Page (of {page_count}, oldest first)", min_value=1, max_value=page_count, step=1, key="request_page")
+            rows = []
+            for member_id, requested_at in store.trainer_requests.page(trainer['ID'], (request_page - 1) * page_size, page_size):
+                member_requesting = store.members.get(member_id, {})
+                rows.append({'Select': False, 'Member ID': member_id, 'Name': member_requesting.get('Name', 'Unknown member'), 'Plan': member_requesting.get('Plan'), 'Requested': requested_at})
+            edited = st.data_editor(
+                pd.DataFrame(rows), hide_index=True, use_container_width=True, disabled=['Member ID', 'Name', 'Plan', 'Requested'],
+                key=f"request_editor_{request_page}_{request_count}",
+            )
+            selected = [int(member_id) for member_id in edited.loc[edited['Select'], 'Member ID']]
+            col1, col2 = st.columns(2)
+            if col1.button(f"Accept selected ({len(selected)})", disabled=not selected, use_container_width=True):
+                accepted = store.accept_trainer_requests(trainer['ID'], selected)
+                st.success(f"Assigned {len(accepted)} member(s) to you.")
+                st.rerun()
+            if col2.button(f"Reject selected ({len(selected)})", disabled=not selected, use_container_width=True):
+                rejected = store.trainer_requests.remove(trainer['ID'], selected)
+                st.info(f"Rejected {len(rejected)} request(s).")
+                st.rerun()
+
+
+# --- MEMBER VIEW ---
+FEED_PAGE_SIZE = 20
+
+
+@st.cache_data(max_entries=256)
+def feed_page(before):
+    """Rendered community posts older than sequence `before`; posts are never edited, so pages never go stale."""
+    posts, cursor = get_store().community_posts.page(before, FEED_PAGE_SIZE)
+    return [f"**{post['user']}** - *{post['date'].strftime('%d %B %Y, %H:%M')}*\n\n{post['text']}" for _, post in posts], cursor
+
+
+def member_view():
+    store = get_store()
+    member = store.members.get(st.session_state.current_user_id)
+    if not member:
+        st.error("Profile not found. Please log out.")
+        return
+
+    st.sidebar.title("Member Menu")
+    st.sidebar.image(photo_source(member, 'avatar'), width=100)
+    st.sidebar.header(member['Name'])
+    st.sidebar.markdown(f"**Member ID:** {member['ID']}")
+    unread = store.inboxes.inbox(member['ID'])['Unread']
+    if unread:
+        st.sidebar.info(f"🔔 {unread} unread notification{'s' if unread > 1 else ''}; see Announcements.")
+    st.sidebar.markdown("---")
+    page = st.sidebar.radio("Navigate", ["My Profile", "Class Booking", "Workout Tracking", "Nutrition Tracking", "Progress Photos", "Challenges", "Community", "Find a Trainer", "Announcements"])
+    perf_page(f"Member/{page}")
+    st.sidebar.markdown("---")
+    if st.sidebar.button("Logout", use_container_width=True):
+        get_store().auth.revoke(st.session_state.get('auth_token'))
+        st.session_state.clear()
+        st.rerun()
+
+    if page == "My Profile":
+        st.title(f"👋 Welcome, {member['Name']}!")
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            st.image(photo_source(member, 'thumbnail'), caption="Profile Photo", width=200)
+            
+            uploaded_file = st.file_uploader("Upload your profile photo", type=["png", "jpg", "jpeg"])
+            if new_upload(uploaded_file):
+                member['Uploaded Photo'] = store.upload_image(uploaded_file.getvalue())
+                store.members.save(member)
+                st.success("Photo uploaded successfully! It will appear once it has been processed.")
+                st.rerun()
+
+        with col2:
+            st.subheader("Your Membership Details")
+            st.info(f"**Plan:** {member.get('Plan', 'N/A')}")
+            st.info(f"**Status:** {member.get('Status', 'N/A')}")
+            expiry = member.get('Expiry Date')
+            if expiry: st.info(f"**Expires On:** {expiry.strftime('%d %B %Y')}")
+            if member['ID'] in store.memberships.expiring_soon and not member.get('Auto Renew'):
+                st.warning("Your membership expires soon. Turn on auto-renew to keep it going.")
+            auto_renew = st.toggle("Auto-renew my membership", value=bool(member.get('Auto Renew')), key="auto_renew")
+            if auto_renew != bool(member.get('Auto Renew')):
+                member['Auto Renew'] = auto_renew
+                store.members.save(member)
+                st.rerun()
+            trainer_name = store.trainers.get(member.get('Trainer ID'), {}).get('Name', 'Not Assigned')
+            st.info(f"**Assigned Trainer:** {trainer_name}")
+
+        with st.expander("✏️ Edit Your Contact Information"):
+            with st.form("update_info"):
+                new_name = st.text_input("Name", value=member.get('Name', ''))
+                new_email = st.text_input("Email", value=member.get('Email', ''))
+                new_phone = st.text_input("Phone Number", value=member.get('Phone', ''))
+                new_address = st.text_area("Address", value=member.get('Address', ''))
+                if st.form_submit_button("Update Info"):
+                    changes = {'Name': new_name, 'Email': new_email, 'Phone': new_phone, 'Address': new_address}
+                    _, errors, _ = store.apply_member_changes({member['ID']: changes}, [], [], member['username'])
+                    for error in errors:
+                        st.error(error.split(': ', 1)[-1])
+                    if not errors:
+                        st.success("Your information has been updated.")
+                        st.rerun()
+
+    elif page == "Class Booking":
+        st.title("🤸 Class Booking")
+        st.subheader("Available Classes")
+        days_ahead = st.selectbox("Show classes for the next", [7, 14, 30], format_func=lambda d: f"{d} days", key="booking_days_ahead")
+        booking_messages = {
+            'booked': "Booking successful!",
+            'waitlisted': "The class is full, so you've been added to the waitlist.",
+            'full': "Sorry, this class just filled up.",
+            'already booked': "You've already booked this class.",
+        }
+        upcoming_classes = store.schedule.upcoming(days=days_ahead)
+        if not upcoming_classes:
+            st.info("No classes are scheduled in this period.")
+        for c in upcoming_classes:
+            is_full = len(c['Booked']) >= c['Capacity']
+            is_booked = store.classes.is_booked(c['ID'], member['ID'])
+            waitlist = c.get('Waitlist', [])
+            
+            with st.container(border=True):
+                col1, col2, col3 = st.columns([2, 1, 1])
+                col1.write(f"**{c['Name']}** with {c['Trainer']}")
+                col1.write(f"📅 {c['Date'].strftime('%d-%b-%Y')} at {c['Time']}")
+                col2.write(f"**Slots:** {len(c['Booked'])} / {c['Capacity']}")
+                if waitlist:
+                    col2.write(f"**Waitlist:** {len(waitlist)}")
+                
+                if is_booked:
+                    if col3.button("Cancel Booking", key=f"cancel_{c['ID']}", type="primary", use_container_width=True):
+                        store.classes.cancel(c['ID'], member['ID'])
+                        st.toast("Booking cancelled!")
+                        st.rerun()
+                elif member['ID'] in waitlist:
+                    col3.info(f"Waitlist position {waitlist.index(member['ID']) + 1}")
+                    if col3.button("Leave Waitlist", key=f"leave_{c['ID']}", use_container_width=True):
+                        store.classes.cancel(c['ID'], member['ID'])
+                        st.toast("You've left the waitlist.")
+                        st.rerun()
+                elif is_full:
+                    col3.error("Class is Full", icon="⛔")
+                    if col3.button("Join Waitlist", key=f"waitlist_{c['ID']}", use_container_width=True):
+                        st.toast(booking_messages[store.classes.book(c['ID'], member['ID'], join_waitlist=True)])
+                        st.rerun()
+                else:
+                    if st.button(f"Book Now", key=f"book_{c['ID']}", use_container_width=True):
+                        st.toast(booking_messages[store.classes.book(c['ID'], member['ID'])])
+                        st.rerun()
+
+    elif page == "Workout Tracking":
+        st.title("🏋️‍♀️ Workout & Progress Tracking")
+        # A selector instead of st.tabs: tabs run every body on each rerun, this runs only the visible one
+        section = st.radio("Section", ["Log New Workout", "My Workout History", "Workout Library", "My Plans"], horizontal=True, label_visibility="collapsed", key="workout_section")
+
+        if section == "Log New Workout":
+            with st.form("log_workout"):
+                workout_names = [w['Name'] for w in store.workout_library.all()]
+                exercise = st.selectbox("Exercise", workout_names)
+                weight = st.number_input("Weight (kg)", min_value=0.0, step=2.5)
+                sets = st.number_input("Sets", min_value=1, step=1)
+                reps = st.number_input("Reps", min_value=1, step=1)
+                if st.form_submit_button("Log Workout"):
+                    log_entry = {'Date': date.today(), 'Exercise': exercise, 'Weight': weight, 'Sets': sets, 'Reps': reps}
+                    store.member_workouts.append(st.session_state.current_user_id, log_entry)
+                    st.success("Workout logged!")
+
+        elif section == "My Workout History":
+            st.subheader("Your Workout History")
+            series = store.member_workouts.series(st.session_state.current_user_id)
+            if len(series):
+                page_size = 20
+                page_count = (len(series) - 1) // page_size + 1
+                history_page = st.number_input(f"Page (of {page_count}, newest first)", min_value=1, max_value=page_count, step=1, key="workout_history_page")
+                st.dataframe(pd.DataFrame(series.rows((history_page - 1) * page_size, page_size)), hide_index=True)
+
+                st.subheader("Progress Visualization")
+                exercise_to_chart = st.selectbox("Select exercise to visualize", series.exercises())
+                rollup = series.rollup(exercise_to_chart)
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Max Weight", f"{rollup.max_weight:g} kg")
+                col2.metric("Est. 1RM", f"{rollup.best_1rm:.1f} kg")
+                col3.metric("Personal Records", len(rollup.personal_records))
+                fig = exercise_progress_figure(rollup, st.session_state.current_user_id, exercise_to_chart, rollup.sets_logged)
+                st.plotly_chart(fig, use_container_width=True)
+                weekly = pd.DataFrame(list(rollup.weekly_volume.items())[-52:], columns=['Week', 'Volume (kg)'])
+                st.plotly_chart(px.bar(weekly, x='Week', y='Volume (kg)', title='Weekly Volume (last 52 weeks)'), use_container_width=True)
+            else:
+                st.info("You have no logged workouts yet.")
+
+        elif section == "Workout Library":
+            st.subheader("Browse Workout Library")
+            col1, col2, col3 = st.columns([2, 1, 1])
+            query = col1.text_input("Search exercises", placeholder="e.g. squat, dumbbells, chest", key="library_search")
+            muscle_group = col2.selectbox("Muscle Group", [None] + store.workout_library.muscle_groups(), format_func=lambda g: g or "All", key="library_group")
+            difficulty = col3.selectbox("Difficulty", [None, "Beginner", "Intermediate", "Advanced"], format_func=lambda d: d or "All", key="library_difficulty")
+            results = store.workout_library.search(query, muscle_group, difficulty)
+
+            page_size = 10
+            page_count = max((len(results) - 1) // page_size + 1, 1)
+            if st.session_state.get('library_page', 1) > page_count:
+                st.session_state.library_page = page_count
+            library_page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, step=1, key="library_page")
+            st.caption(f"{len(results)} exercise(s) found.")
+
+            current_group = None
+            for workout in results[(library_page - 1) * page_size:library_page * page_size]:
+                if workout['Muscle Group'] != current_group:
+                    current_group = workout['Muscle Group']
+                    st.markdown(f"### {current_group}")
+                with st.expander(f"{workout['Name']} ({workout['Difficulty']})"):
+                    st.write(f"**Equipment:** {workout['Equipment']}")
+                    # Expander bodies always run, so the video embed waits for an explicit request
+                    if st.toggle("▶️ Watch demo", key=f"library_video_{workout['seq']}"):
+                        st.video(workout['Video'])
+            
+            st.markdown("---")
+            with st.expander("➕ Add a New Exercise to Library"):
+                with st.form("add_exercise_form"):
+                    name = st.text_input("Exercise Name")
+                    muscle_group = st.text_input("Muscle Group (e.g., Legs, Chest, Back)")
+                    difficulty = st.selectbox("Difficulty", ["Beginner", "Intermediate", "Advanced"])
+                    equipment = st.text_input("Equipment")
+                    video = st.text_input("Video URL (YouTube link)")
+                    if st.form_submit_button("Add Exercise"):
+                        if name and muscle_group and video:
+                            new_workout = {'Name': name, 'Muscle Group': muscle_group, 'Difficulty': difficulty, 'Equipment': equipment, 'Video': video}
+                            store.workout_library.append(new_workout)
+                            st.success(f"Exercise '{name}' added to the library!")
+                            st.rerun()
+                        else:
+                            st.error("Please fill out all required fields.")
+
+        elif section == "My Plans":
+            st.subheader("Your Personalized Workout Plans")
+            plans = store.member_plans.entries(st.session_state.current_user_id)
+            if plans:
+                st.info("This is your current plan from your trainer.")
+                plans_df = pd.DataFrame(plans)
+                st.data_editor(plans_df, use_container_width=True, hide_index=True)
+                st.markdown("---")
+            else:
+                st.info("You don't have a plan assigned by a trainer yet. Why not create your own?")
+            
+            with st.expander("➕ Create Your Own Workout Plan"):
+                with st.form("create_plan_form"):
+                    st.write("Add an exercise to your custom plan:")
+                    exercise_name = st.text_input("Exercise Name")
+                    sets = st.number_input("Sets", min_value=1, step=1)
+                    reps = st.number_input("Reps", min_value=1, step=1)
+                    notes = st.text_area("Notes (optional)")
+                    if st.form_submit_button("Add Exercise to Plan"):
+                        if exercise_name:
+                            new_plan_entry = {'exercise': exercise_name, 'sets': sets, 'reps': reps, 'notes': notes}
+                            store.member_plans.append(st.session_state.current_user_id, new_plan_entry)
+                            st.success("Exercise added to your plan!")
+                            st.rerun()
+                        else:
+                            st.error("Exercise name is required.")
+
+    elif page == "Nutrition Tracking":
+        st.title("🥗 Nutrition Tracking")
+        member_id = st.session_state.current_user_id
+        today = date.today()
+        today_totals = store.nutrition.day_totals(member_id, today) or {'Calories': 0, **dict.fromkeys(MACROS, 0)}
+        week = store.nutrition.daily_totals(member_id, today - timedelta(days=6), today)
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Calories Today", f"{today_totals['Calories']:,.0f}")
+        col2.metric("Protein / Carbs / Fat", " / ".join(f"{today_totals[m]:.0f}g" for m in MACROS))
+        col3.metric("Calories (7 days)", f"{sum(day['Calories'] for day in week):,.0f}")
+        col4.metric("Daily Average (7 days)", f"{sum(day['Calories'] for day in week) / 7:,.0f}")
+
+        st.subheader("Log Your Meal")
+        query = st.text_input("Search foods", placeholder="e.g. idli, sambar, chicken", key="food_search")
+        food_name = st.selectbox("Food", [None] + list(store.foods.complete(query)), format_func=lambda name: name or "Enter manually", key="food_choice")
+        food = store.foods.get(food_name) if food_name else None
+        with st.form("log_meal"):
+            meal_type = st.selectbox("Meal", ["Breakfast", "Lunch", "Dinner", "Snack"])
+            if food:
+                st.caption(f"Per serving ({food['Serving']}): {food['Calories']} kcal, " + ", ".join(f"{food[m]}g {m.lower()}" for m in MACROS))
+                servings = st.number_input("Servings", min_value=0.5, value=1.0, step=0.5)
+            else:
+                food_text = st.text_input("What did you eat?")
+                calories = st.number_input("Calories", min_value=0, step=10)
+                macronutrients = st.text_input("Macronutrients (e.g., 50g protein, 30g carbs)")
+            if st.form_submit_button("Log Meal"):
+                if food:
+                    new_meal = {'Date': today, 'Meal': meal_type, 'Food': food['Name'], 'Calories': food['Calories'] * servings, **{m: food[m] * servings for m in MACROS}}
+                    new_meal['Macronutrients'] = ", ".join(f"{new_meal[m]:g}g {m.lower()}" for m in MACROS)
+                else:
+                    new_meal = {'Date': today, 'Meal': meal_type, 'Food': food_text, 'Calories': calories, **parse_macros(macronutrients), 'Macronutrients': macronutrients}
+                store.nutrition.append(member_id, new_meal)
+                st.success("Meal logged!")
+                st.rerun()
+        
+        st.subheader("Your Nutrition History")
+        date_range = st.date_input("Show dates", value=(today - timedelta(days=6), today), max_value=today, key="nutrition_range")
+        if len(date_range) == 2:
+            start, end = date_range
+            daily = store.nutrition.daily_totals(member_id, start, end)
+            if daily:
+                st.dataframe(pd.DataFrame(daily[::-1]), hide_index=True, use_container_width=True)
+                # Meals are listed a week at a time: the last 7 days of the chosen range
+                shown_from = max(start, end - timedelta(days=6))
+                with st.expander(f"Meals from {shown_from:%d %b} to {end:%d %b}"):
+                    meals = store.nutrition.meals_between(member_id, shown_from, end)
+                    st.dataframe(pd.DataFrame(meals[::-1]), hide_index=True, use_container_width=True)
+            else:
+                st.info("No meals logged in this period.")
+
+    elif page == "Progress Photos":
+        st.title("📸 Progress Tracking")
+        section = st.radio("Section", ["Log Body Metrics", "Progress Photos"], horizontal=True, label_visibility="collapsed", key="progress_section")
+
+        if section == "Log Body Metrics":
+            with st.form("log_metrics"):
+                st.subheader("Log Your Body Metrics")
+                weight = st.number_input("Weight (kg)", min_value=0.0, step=0.1)
+                body_fat = st.number_input("Body Fat (%)", min_value=0.0, step=0.1)
+                if st.form_submit_button("Log Metrics"):
+                    new_metric = {'date': date.today(), 'weight': weight, 'body_fat': body_fat}
+                    store.body_metrics.append(st.session_state.current_user_id, new_metric)
+                    st.success("Metrics logged!")
+            
+            st.subheader("Your Body Metric History")
+            metrics_data = store.body_metrics.entries(st.session_state.current_user_id)
+            if metrics_data:
+                fig = body_weight_figure(metrics_data, st.session_state.current_user_id, len(metrics_data))
+                st.plotly_chart(fig, use_container_width=True)
+            else:
+                st.info("No body metrics logged yet.")
+            
+            st.subheader("Your Achievements")
+            badges = store.badges.entries(st.session_state.current_user_id)
+            if badges:
+                st.info(", ".join(badges))
+            else:
+                st.info("No badges earned yet. Keep it up!")
+
+        elif section == "Progress Photos":
+            st.subheader("Your Progress Photos")
+            uploaded_photo = st.file_uploader("Upload a progress photo", type=["png", "jpg", "jpeg"])
+            if new_upload(uploaded_photo):
+                new_photo = {'date': date.today(), 'photo': store.upload_image(uploaded_photo.getvalue())}
+                store.progress_photos.append(st.session_state.current_user_id, new_photo)
+                st.success("Photo uploaded successfully!")
+                st.rerun()
+
+            progress_photos = store.progress_photos.entries(st.session_state.current_user_id)
+            if progress_photos:
+                photo_dates = [p['date'].strftime('%Y-%m-%d') for p in progress_photos]
+                selected_photo_date = st.selectbox("Select a photo to view", options=photo_dates)
+                
+                selected_photo = next((p for p in progress_photos if p['date'].strftime('%Y-%m-%d') == selected_photo_date), None)
+                if selected_photo:
+                    preview_path = store.images.source(selected_photo['photo'], 'preview')
+                    if preview_path:
+                        st.image(preview_path, caption=f"Photo from {selected_photo['date'].strftime('%B %d, %Y')}")
+                    else:
+                        st.info("This photo is still being processed. Check back in a moment.")
+            else:
+                st.info("You haven't uploaded any progress photos yet.")
+
+
+    elif page == "Challenges":
+        st.title("🏆 Challenges & Leaderboards")
+        challenges = store.challenges.records
+        if not challenges:
+            st.info("There are no active challenges right now.")
+            return
+
+        st.subheader("Log Your Progress")
+        with st.form("challenge_score"):
+            challenge = st.selectbox("Challenge", list(challenges))
+            amount = st.number_input("Amount to add", min_value=0.0, step=1.0)
+            if st.form_submit_button("Submit"):
+                if amount > 0:
+                    total = store.challenges.submit(challenge, member['ID'], amount)
+                    st.success(f"Logged! Your total for {challenge} is now {total:g} {challenges[challenge]['Metric']}.")
+                else:
+                    st.warning("Enter an amount greater than zero.")
+        
+        st.subheader("Active Leaderboards")
+        for challenge, data in challenges.items():
+            st.write(f"#### {challenge}")
+            board = store.challenges.leaderboard(challenge)
+            if not len(board):
+                st.info("No scores yet. Be the first!")
+                continue
+            rank = board.rank(member['ID'])
+            if rank is not None:
+                st.caption(f"Your rank: #{rank} of {len(board)} with {board.scores[member['ID']]:g} {data['Metric']}")
+            top = [
+                {'Rank': board.rank(member_id), 'Name': store.members.get(member_id, {}).get('Name', f"Member {member_id}"), data['Metric']: score}
+                for member_id, score in board.top(10)
+            ]
+            st.dataframe(pd.DataFrame(top), hide_index=True)
+
+    elif page == "Community":
+        st.title("💬 Community Feed")
+        st.subheader("Share your progress and connect!")
+        with st.form("new_post"):
+            post_text = st.text_area("What's on your mind?")
+            if st.form_submit_button("Post"):
+                if post_text:
+                    member_name = member['Name']
+                    new_post = {'user': member_name, 'text': post_text, 'date': datetime.now()}
+                    store.community_posts.append(new_post)
+                    st.session_state.pop('feed_top', None)
+                    st.success("Your post has been shared!")
+                    st.rerun()
+        
+        st.subheader("Recent Posts")
+        # The feed is pinned to the newest post when it was opened, so "Load more" pages stay stable
+        newest = store.community_posts.next_id()
+        if 'feed_top' not in st.session_state:
+            st.session_state.feed_top = newest
+            st.session_state.feed_pages = 1
+        if newest > st.session_state.feed_top and st.button(f"🔄 Show {newest - st.session_state.feed_top} new post(s)"):
+            st.session_state.feed_top = newest
+            st.session_state.feed_pages = 1
+            st.rerun()
+
+        cursor = st.session_state.feed_top
+        for _ in range(st.session_state.feed_pages):
+            posts, cursor = feed_page(cursor)
+            for post in posts:
+                st.info(post)
+            if cursor is None:
+                break
+        if cursor is not None and st.button("Load more"):
+            st.session_state.feed_pages += 1
+            st.rerun()
+    
+    elif page == "Find a Trainer":
+        st.title("🤝 Find a Trainer")
+        st.subheader("Connect with the right trainer for you!")
+        
+        current_trainer_id = member.get('Trainer ID')
+        requested = store.trainer_requests.requested_by(member['ID'])
+        
+        for trainer in store.trainers.all():
+            with st.container(border=True):
+                col1, col2 = st.columns([1, 2])
+                with col1:
+                    st.subheader(trainer['Name'])
+                    st.markdown(f"**Specialization:** {trainer['Specialization']}")
+                with col2:
+                    if trainer['ID'] == current_trainer_id:
+                        st.success("You are already assigned to this trainer!")
+                    elif trainer['ID'] in requested:
+                        st.info("Request pending...")
+                    else:
+                        if st.button(f"Request {trainer['Name']}", key=f"request_{trainer['ID']}", use_container_width=True):
+                            store.trainer_requests.request(trainer['ID'], member['ID'])
+                            st.success(f"You have requested to be assigned to {trainer['Name']}. An admin will review your request.")
+                            st.rerun()
+
+    
+    elif page == "Announcements":
+        st.title("📢 Gym Announcements")
+        inbox = store.inboxes.inbox(member['ID'])
+        if inbox['Items']:
+            st.subheader("Your Notifications")
+            for position, seq in enumerate(inbox['Items']):
+                notification = store.notifications.get(seq)
+                if notification:
+                    message = f"**{notification['Title']}** ({notification['Date'].strftime('%d %b %H:%M')})  \n{notification['Text']}"
+                    (st.warning if position < inbox['Unread'] else st.info)(message)
+            store.inboxes.mark_read(member['ID'])
+            st.subheader("All Announcements")
+        if len(store.announcements):
+            for _, ann in store.announcements.latest():
+                st.info(ann)
+        else:
+            st.success("No new announcements at this time.")
+
+# --- MAIN APP ROUTER ---
+def main():
+    with page_run(get_monitor(), "Login"):
+        if 'logged_in' not in st.session_state:
+            st.session_state.logged_in = False
+        elif st.session_state.logged_in and get_store().auth.check_token(st.session_state.get('auth_token')) is None:
+            st.session_state.clear()
+            st.session_state.logged_in = False
+            st.warning("Your session has expired. Please log in again.")
+    
+        if not st.session_state.logged_in:
+            role = st.selectbox("Login as:", ["Member", "Admin", "Trainer"], key="login_role")
+            login_register_page(role)
+        else:
+            if st.session_state.role == "Admin":
+                admin_view()
+            elif st.session_state.role == "Member":
+                member_view()
+            elif st.session_state.role == "Trainer":
+                trainer_view()
+
+if __name__ == "__main__":
+    main()